@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Events-per-second microbenchmark of the bridge hot path with no network I/O.
+
+The mapping run compares the pydantic path (MidiInputEvent ->
+OutboundRequestIntent -> process_intent) with the tuple path (map_message ->
+payload dict) over a null sender, so only mapping and validation are timed.
+
+The headline `speedup=` line times payload serialization alone (json.dumps of the
+payload dict vs encode_event_payload), the part the memoized path removes.
+
+The end-to-end run then sends every path through a real httpx client over a
+mock transport, so request building and httpx overhead are included:
+
+- pydantic: MidiInputEvent -> OutboundRequestIntent -> process_intent
+- json:     map_message -> payload dict serialized by httpx per event
+- memoized: map_message -> process_event (pre-encoded payload bytes)
+
+Usage:
+    uv run python scripts/bench_hot_path.py --events 50000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+import httpx
+import mido
+
+from blink_midi.mapper import map_message
+from blink_midi.models import MidiInputEvent
+from blink_midi.sender import (
+    REQUEST_HEADERS,
+    HttpSender,
+    build_request_intent,
+    deliver_payload,
+    encode_event_payload,
+    event_payload_json,
+    process_event,
+    process_intent,
+)
+
+API_URL = "http://127.0.0.1:8000/midi/events"
+
+
+
+class NullResponse:
+    status_code = 200
+    text = '{"status": "ok"}'
+
+    def json(self) -> dict[str, str]:
+        return {"status": "ok"}
+
+
+class NullSender:
+    """Stands in for HttpSender so only mapping and validation are measured."""
+
+    response = NullResponse()
+
+    def post(self, url: str, payload: object, headers: dict[str, str]) -> NullResponse:
+        return self.response
+
+
+
+def ok_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"status": "ok"})
+
+
+
+def pydantic_path(message: mido.Message, sender: HttpSender | NullSender) -> object:
+    event = MidiInputEvent(
+        event_type=message.type,
+        channel=message.channel,
+        key=message.control,
+        value=message.value,
+        state=None,
+        timestamp=datetime.now(timezone.utc),
+        source_device="bench",
+    )
+    return process_intent(build_request_intent(event, API_URL), sender)  # type: ignore[arg-type]
+
+
+
+def json_path(message: mido.Message, sender: HttpSender | NullSender) -> object:
+    event = map_message(message, source_device="bench")
+    assert event is not None
+    return deliver_payload(API_URL, event_payload_json(event), REQUEST_HEADERS, sender)  # type: ignore[arg-type]
+
+
+
+def memoized_path(message: mido.Message, sender: HttpSender) -> object:
+    event = map_message(message, source_device="bench")
+    assert event is not None
+    return process_event(event, API_URL, sender)
+
+
+
+def measure(
+    name: str,
+    messages: list[mido.Message],
+    handle: Callable[[mido.Message, HttpSender | NullSender], object],
+    sender: HttpSender | NullSender,
+) -> float:
+    started = time.perf_counter()
+    for message in messages:
+        handle(message, sender)
+    elapsed = time.perf_counter() - started
+    rate = len(messages) / elapsed
+    print(f"{name:<13} events={len(messages)} elapsed={elapsed:.3f}s rate={rate:,.0f} events/s")
+    return rate
+
+
+
+def measure_serialization(messages: list[mido.Message]) -> float:
+    """Time payload serialization alone and return the memoized speedup over json.dumps."""
+    events = [map_message(message, source_device="bench") for message in messages]
+    per_event: dict[str, float] = {}
+    for name, encode in [
+        ("json", lambda event: json.dumps(event_payload_json(event)).encode("utf-8")),
+        ("memoized", encode_event_payload),
+    ]:
+        started = time.perf_counter()
+        for event in events:
+            encode(event)
+        elapsed = time.perf_counter() - started
+        per_event[name] = elapsed / len(events)
+        print(f"serialize-{name:<9} per_event={per_event[name] * 1e6:.2f}us")
+    return per_event["json"] / per_event["memoized"]
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--distinct", type=int, default=512, help="Distinct (channel, key, value) combinations")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    messages = [
+        mido.Message(
+            "control_change",
+            channel=(index % args.distinct) % 16,
+            control=(index % args.distinct) // 16 % 128,
+            value=(index % args.distinct) % 128,
+        )
+        for index in range(args.events)
+    ]
+    null_sender = NullSender()
+    pydantic = measure("map-pydantic", messages, pydantic_path, null_sender)
+    tuples = measure("map-tuple", messages, json_path, null_sender)
+    print(f"mapping speedup={tuples / pydantic:.1f}x (tuple vs pydantic, no transport)")
+
+    serialize_speedup = measure_serialization(messages)
+    print(f"speedup={serialize_speedup:.1f}x (memoized vs json.dumps, serialize only, no transport)")
+
+    with HttpSender(transport=httpx.MockTransport(ok_handler)) as sender:
+        baseline = measure("e2e-pydantic", messages, pydantic_path, sender)
+        measure("e2e-json", messages, json_path, sender)
+        memoized = measure("e2e-memoized", messages, memoized_path, sender)  # type: ignore[arg-type]
+    print(f"end-to-end speedup={memoized / baseline:.1f}x (memoized vs pydantic, httpx MockTransport)")
+
+
+if __name__ == "__main__":
+    main()
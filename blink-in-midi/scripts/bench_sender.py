@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Per-event latency benchmark for the bridge sender against a local stand-in API.
+
+With `--mqtt-host` it also times the direct MQTT sender (`--transport mqtt`)
+publishing to that broker, for comparison with the HTTP path. Use
+`--mqtt-qos 1` to include the broker acknowledgement in each sample.
+
+Usage:
+    uv run python scripts/bench_sender.py --events 500
+    uv run python scripts/bench_sender.py --events 500 --mqtt-host 127.0.0.1 --mqtt-qos 1
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from blink_midi.models import MidiInputEvent
+from blink_midi.sender import HttpSender, MqttSender, process_event
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length", "0"))
+        self.rfile.read(length)
+        body = json.dumps({"status": "ok"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return None
+
+
+
+def start_stand_in() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/midi/events"
+
+
+
+def make_event(index: int) -> MidiInputEvent:
+    return MidiInputEvent(
+        event_type="control_change",
+        channel=index % 10,
+        key=7,
+        value=index % 128,
+        state=None,
+        timestamp=datetime.now(timezone.utc),
+        source_device="bench",
+    )
+
+
+
+def measure(name: str, events: int, send: Callable[[MidiInputEvent], object]) -> None:
+    samples: list[float] = []
+    for index in range(events):
+        event = make_event(index)
+        started = time.perf_counter()
+        send(event)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    quantiles = statistics.quantiles(samples, n=100)
+    print(
+        f"{name:<10} events={events} mean={statistics.fmean(samples):.3f}ms "
+        f"p50={quantiles[49]:.3f}ms p95={quantiles[94]:.3f}ms p99={quantiles[98]:.3f}ms"
+    )
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--mqtt-host", default=None, help="Also benchmark the direct MQTT sender against this broker")
+    parser.add_argument("--mqtt-port", type=int, default=1883)
+    parser.add_argument("--mqtt-qos", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    server, url = start_stand_in()
+    try:
+        measure("per-event", args.events, lambda event: process_event(event, url))
+        with HttpSender(pool_size=args.pool_size) as sender:
+            measure("pooled", args.events, lambda event: process_event(event, url, sender))
+        if args.mqtt_host:
+            with MqttSender(args.mqtt_host, args.mqtt_port, qos=args.mqtt_qos) as mqtt_sender:
+                measure(
+                    f"mqtt-qos{args.mqtt_qos}",
+                    args.events,
+                    lambda event: process_event(event, mqtt_sender.url, mqtt_sender),
+                )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,15 @@
 
 __all__ = [
     "cli",
+    "coalescer",
     "config",
     "midi_listener",
     "mapper",
+    "metrics",
     "models",
+    "pipeline",
+    "recording",
+    "resilience",
+    "routing",
     "sender",
 ]
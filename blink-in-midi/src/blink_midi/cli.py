@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import nullcontext
+from pathlib import Path
 
 import typer
 
-from .config import load_config
-from .midi_listener import iter_midi_messages, list_input_devices
+from .config import RuntimeConfig, load_config
+from .midi_listener import DEFAULT_INPUT_QUEUE_SIZE, MidiListener, list_input_devices
 from .mapper import map_message
-from .models import BridgeSession
-from .sender import process_event
+from .metrics import StageMetrics
+from .models import BridgeSession, DeliveryResult
+from .pipeline import EventPipeline
+from .recording import MidiRecorder, ReplaySource
+from .resilience import ResilientDelivery
+from .sender import HttpSender, MqttSender, Sender, WebSocketSender, process_event
 
 app = typer.Typer(help="MIDI input bridge for local API request intents")
 
@@ -29,37 +38,257 @@ def devices() -> None:
 
 
 @app.command()
-def run(
+def record(
     device: str = typer.Option(..., help="MIDI input device name"),
+    output: Path = typer.Option(..., help="Recording file to write"),
+    duration: float | None = typer.Option(None, help="Stop after this many seconds (default: until Ctrl+C)"),
+    input_queue_size: int = typer.Option(
+        DEFAULT_INPUT_QUEUE_SIZE, help="Bounded buffer between the MIDI callback and the writer"
+    ),
+) -> None:
+    """Record MIDI input with capture timestamps for later `run --replay`."""
+    listener = MidiListener(device, maxsize=input_queue_size)
+    timer = threading.Timer(duration, listener.close) if duration is not None else None
+    with MidiRecorder(output) as recorder, listener:
+        if timer is not None:
+            timer.daemon = True
+            timer.start()
+        try:
+            for received_ns, message, _ in listener:
+                recorder.write(received_ns, message)  # type: ignore[arg-type]
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if timer is not None:
+                timer.cancel()
+    typer.echo(f"recorded={recorder.recorded} dropped={listener.overflows} output={output}")
+
+
+def run_sync(
+    messages: Iterable[tuple[int, object, str]],
+    cfg: RuntimeConfig,
+    session: BridgeSession,
+    sender: Sender,
+    metrics: StageMetrics,
+    demo_once: bool = False,
+) -> None:
+    # Retried events complete on the delivery's prober thread, so results are
+    # counted under a lock.
+    lock = threading.Lock()
+
+    def count_result(result: DeliveryResult) -> None:
+        counters = session.device_counters(result.event.source_device)
+        with lock:
+            if result.failure_reason:
+                session.intent_failures += 1
+                counters.intent_failures += 1
+            else:
+                session.processed_events += 1
+                counters.processed_events += 1
+
+    retry = cfg.retry_policy
+    delivery = ResilientDelivery(cfg.target_url, sender, count_result, retry) if retry else None
+    with delivery or nullcontext():
+        for received_ns, message, device in messages:
+            counters = session.device_counters(device)
+            counters.received_events += 1
+            event = map_message(message, source_device=device, received_ns=received_ns, routing=cfg.routing)
+            if event is None:
+                session.ignored_events += 1
+                counters.ignored_events += 1
+                continue
+
+            started_ns = time.monotonic_ns()
+            metrics.observe_ns("map", started_ns - received_ns)
+            if delivery is not None:
+                result = delivery.deliver(event)
+            else:
+                result = process_event(event, cfg.target_url, sender)
+            metrics.observe_delivery(received_ns, started_ns, time.monotonic_ns())
+            if result is not None:
+                count_result(result)
+
+            if demo_once:
+                break
+    if delivery is not None:
+        delivery.add_totals(session)
+
+
+
+def run_pipeline(
+    messages: Iterable[tuple[int, object, str]],
+    cfg: RuntimeConfig,
+    session: BridgeSession,
+    sender: Sender,
+    metrics: StageMetrics,
+) -> None:
+    batching = cfg.batch_window_ms > 0
+    with EventPipeline(
+        session,
+        cfg.target_url,
+        sender,
+        workers=max(cfg.pipeline_workers, 1),
+        queue_size=cfg.queue_size,
+        policy=cfg.backpressure,
+        batch_url=cfg.batch_url if batching else None,
+        batch_window=cfg.batch_window_ms / 1000,
+        batch_size=cfg.batch_size,
+        metrics=metrics,
+        retry=cfg.retry_policy,
+    ) as pipeline:
+        for received_ns, message, device in messages:
+            counters = session.device_counters(device)
+            counters.received_events += 1
+            event = map_message(message, source_device=device, received_ns=received_ns, routing=cfg.routing)
+            if event is None:
+                session.ignored_events += 1
+                counters.ignored_events += 1
+                continue
+            metrics.observe_ns("map", time.monotonic_ns() - received_ns)
+            pipeline.submit(event)
+    if pipeline.delivery is not None:
+        pipeline.delivery.add_totals(session)
+
+
+def open_sender(cfg: RuntimeConfig) -> Sender:
+    if cfg.transport == "mqtt":
+        return MqttSender(
+            cfg.mqtt_host,
+            cfg.mqtt_port,
+            bulb_ids=cfg.midi_bulb_ids,
+            qos=cfg.mqtt_qos,
+            timeout=cfg.http_timeout,
+        )
+    if cfg.transport == "websocket":
+        return WebSocketSender(
+            cfg.target_url,
+            ack=cfg.stream_ack,
+            binary=cfg.stream_binary,
+            timeout=cfg.http_timeout,
+        )
+    pool_size = max(cfg.http_pool_size, cfg.pipeline_workers)
+    return HttpSender(timeout=cfg.http_timeout, pool_size=pool_size, http2=cfg.http2)
+
+
+@app.command()
+def run(
+    device: list[str] | None = typer.Option(
+        None, help="MIDI input device name; repeat to merge several inputs (not used with --replay)"
+    ),
+    replay: Path | None = typer.Option(None, help="Replay a recording (or .mid file) instead of live input"),
+    replay_speed: float = typer.Option(1.0, help="Replay speed multiplier; 0 replays as fast as possible"),
     api_url: str | None = typer.Option(None, help="Local API endpoint URL"),
     log_level: str | None = typer.Option(None, help="Logging level"),
     demo_once: bool = typer.Option(False, help="Run once with a simulated MIDI event"),
+    http_timeout: float | None = typer.Option(None, help="HTTP timeout in seconds"),
+    http_pool_size: int | None = typer.Option(None, help="Max keep-alive connections to the API"),
+    http2: bool | None = typer.Option(None, "--http2/--no-http2", help="Use HTTP/2 (requires httpx[http2])"),
+    input_queue_size: int | None = typer.Option(None, help="Bounded buffer between the MIDI callback and mapping"),
+    workers: int | None = typer.Option(None, help="Concurrent send workers; 0 sends inline"),
+    queue_size: int | None = typer.Option(None, help="Bounded queue size between MIDI input and senders"),
+    backpressure: str | None = typer.Option(
+        None, help="Queue policy: block, drop-oldest or coalesce (latest value per slot)"
+    ),
+    batch_window_ms: float | None = typer.Option(None, help="Micro-batch window in ms; 0 sends one event per request"),
+    batch_size: int | None = typer.Option(None, help="Max events per batch request"),
+    batch_url: str | None = typer.Option(None, help="Batch endpoint URL (default: <api-url>:batch)"),
+    transport: str | None = typer.Option(None, help="Delivery transport: http, websocket or mqtt"),
+    stream_url: str | None = typer.Option(None, help="WebSocket stream URL (default derived from --api-url)"),
+    stream_ack: bool | None = typer.Option(None, "--stream-ack/--no-stream-ack", help="Wait for per-event acks"),
+    stream_binary: bool | None = typer.Option(
+        None, "--stream-binary/--stream-json", help="Use 4-byte binary frames instead of JSON"
+    ),
+    routing_rules: str | None = typer.Option(None, help="JSON filter/remap rules; unmatched events are ignored"),
+    mqtt_host: str | None = typer.Option(None, help="MQTT broker host for --transport mqtt"),
+    mqtt_port: int | None = typer.Option(None, help="MQTT broker port for --transport mqtt"),
+    mqtt_qos: int | None = typer.Option(None, help="MQTT QoS; 1 or 2 waits for the broker per event"),
+    midi_bulb_ids: str | None = typer.Option(None, help="Channel->bulb IDs for --transport mqtt (as MIDI_BULB_IDS)"),
+    breaker_threshold: int | None = typer.Option(
+        None, help="Open the circuit after this many consecutive delivery errors; 0 disables retries"
+    ),
+    retry_queue_size: int | None = typer.Option(None, help="Max (type, channel, key) slots held for retry"),
+    retry_backoff_ms: float | None = typer.Option(None, help="First probe delay after the circuit opens"),
+    retry_backoff_max_ms: float | None = typer.Option(None, help="Cap for the doubling probe delay"),
 ) -> None:
     """Process MIDI events and emit outbound request intents."""
-    cfg = load_config(api_url=api_url, log_level=log_level)
+    if not device and replay is None:
+        raise typer.BadParameter("--device is required unless --replay is given")
+    if device and replay is not None:
+        raise typer.BadParameter("--device cannot be combined with --replay")
+    if replay_speed < 0:
+        raise typer.BadParameter("--replay-speed must be >= 0")
+    try:
+        cfg = load_config(
+            api_url=api_url,
+            log_level=log_level,
+            http_timeout=http_timeout,
+            http_pool_size=http_pool_size,
+            http2=http2,
+            input_queue_size=input_queue_size,
+            pipeline_workers=workers,
+            queue_size=queue_size,
+            backpressure=backpressure,
+            batch_window_ms=batch_window_ms,
+            batch_size=batch_size,
+            batch_url=batch_url,
+            transport=transport,
+            stream_url=stream_url,
+            stream_ack=stream_ack,
+            stream_binary=stream_binary,
+            routing_rules=routing_rules,
+            mqtt_host=mqtt_host,
+            mqtt_port=mqtt_port,
+            mqtt_qos=mqtt_qos,
+            midi_bulb_ids=midi_bulb_ids,
+            breaker_threshold=breaker_threshold,
+            retry_queue_size=retry_queue_size,
+            retry_backoff_ms=retry_backoff_ms,
+            retry_backoff_max_ms=retry_backoff_max_ms,
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
     configure_logging(cfg.log_level)
 
-    session = BridgeSession(selected_device=device, api_url=cfg.api_url)
+    if replay is not None:
+        source: MidiListener | ReplaySource = ReplaySource(replay, speed=replay_speed)
+        device_names = [source.device]
+    else:
+        device_names = list(dict.fromkeys(device or []))
+        source = MidiListener(device_names, maxsize=cfg.input_queue_size, demo_once=demo_once)
+    session = BridgeSession(selected_device=",".join(device_names), api_url=cfg.target_url)
+    # Register every input up front so pipeline workers never add to the dict concurrently.
+    for name in device_names:
+        session.device_counters(name)
 
-    for message in iter_midi_messages(device, demo_once=demo_once):
-        event = map_message(message, source_device=device)
-        if event is None:
-            session.ignored_events += 1
-            continue
-
-        intent = process_event(event, cfg.api_url)
-        if intent.failure_reason:
-            session.intent_failures += 1
+    metrics = StageMetrics()
+    # All inputs share one sender and therefore one connection pool / stream.
+    with open_sender(cfg) as sender, source:
+        if cfg.pipeline_workers > 0 or cfg.batch_window_ms > 0:
+            run_pipeline(source, cfg, session, sender, metrics)
         else:
-            session.processed_events += 1
-
-        if demo_once:
-            break
+            run_sync(source, cfg, session, sender, metrics, demo_once=demo_once)
+    session.dropped_events += source.overflows
 
     typer.echo(
         f"session={session.session_id} processed={session.processed_events} "
-        f"ignored={session.ignored_events} failures={session.intent_failures}"
+        f"ignored={session.ignored_events} failures={session.intent_failures} "
+        f"dropped={session.dropped_events} coalesced={session.coalesced_events}"
     )
+    if len(session.devices) > 1:
+        for name, counters in session.devices.items():
+            typer.echo(
+                f"device={name} received={counters.received_events} processed={counters.processed_events} "
+                f"ignored={counters.ignored_events} failures={counters.intent_failures}"
+            )
+    if cfg.retry_policy is not None:
+        typer.echo(f"breaker opens={session.breaker_opens} deferred={session.deferred_events}")
+    if isinstance(source, ReplaySource):
+        typer.echo(
+            f"replay events={source.replayed} speed={replay_speed:g} "
+            f"max_lag_ms={source.max_lag_ns / 1e6:.3f}"
+        )
+    for line in metrics.format_lines():
+        typer.echo(line)
 
 
 
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Literal
+
+from .models import MidiEvent
+
+PutOutcome = Literal["queued", "dropped", "coalesced"]
+Slot = tuple[str, int, int]
+
+
+
+def event_slot(event: MidiEvent) -> Slot:
+    return (event.event_type, event.channel, event.key)
+
+
+class CoalescingQueue:
+    """Keeps only the latest pending event per (event_type, channel, key) slot.
+
+    A slot that is being sent stays reserved until `task_done` is called, so a
+    newer value for it waits in `pending` and is handed out as soon as the
+    in-flight send finishes. Slots are served in the order they first became
+    pending; when `maxsize` distinct slots are pending the oldest one is dropped.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._pending: dict[Slot, MidiEvent] = {}
+        self._in_flight: set[Slot] = set()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def put(self, event: MidiEvent) -> PutOutcome:
+        slot = event_slot(event)
+        with self._cond:
+            if self._closed:
+                return "dropped"
+            if slot in self._pending:
+                self._pending[slot] = event
+                return "coalesced"
+
+            outcome: PutOutcome = "queued"
+            if len(self._pending) >= self.maxsize:
+                del self._pending[next(iter(self._pending))]
+                outcome = "dropped"
+            self._pending[slot] = event
+            self._cond.notify_all()
+            return outcome
+
+    def get(self, timeout: float | None = None) -> MidiEvent | None:
+        """Wait for a pending slot that is not in flight; return None on timeout or once drained."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for slot in self._pending:
+                    if slot not in self._in_flight:
+                        self._in_flight.add(slot)
+                        return self._pending.pop(slot)
+                if self._closed and not self._pending:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def task_done(self, event: MidiEvent) -> None:
+        with self._cond:
+            self._in_flight.discard(event_slot(event))
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -2,16 +2,179 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from pathlib import Path
+
+from .models import BACKPRESSURE_POLICIES
+from .resilience import RetryPolicy
+from .routing import RoutingTable, load_routing_table
+
+TRANSPORTS = ("http", "websocket", "mqtt")
 
 
 @dataclass(frozen=True)
 class RuntimeConfig:
     api_url: str
     log_level: str = "INFO"
+    http_timeout: float = 2.0
+    http_pool_size: int = 4
+    http2: bool = False
+    input_queue_size: int = 1024
+    pipeline_workers: int = 0
+    queue_size: int = 256
+    backpressure: str = "block"
+    batch_window_ms: float = 0.0
+    batch_size: int = 32
+    batch_url: str | None = None
+    transport: str = "http"
+    stream_url: str | None = None
+    stream_ack: bool = False
+    stream_binary: bool = True
+    routing_rules: str | None = None
+    routing: RoutingTable | None = None
+    mqtt_host: str = "127.0.0.1"
+    mqtt_port: int = 1883
+    mqtt_qos: int = 0
+    midi_bulb_ids: str | None = None
+    breaker_threshold: int = 0
+    retry_queue_size: int = 128
+    retry_backoff_ms: float = 250.0
+    retry_backoff_max_ms: float = 8000.0
+
+    @property
+    def retry_policy(self) -> RetryPolicy | None:
+        if self.breaker_threshold <= 0:
+            return None
+        return RetryPolicy(
+            self.breaker_threshold,
+            self.retry_queue_size,
+            self.retry_backoff_ms / 1000,
+            self.retry_backoff_max_ms / 1000,
+        )
+
+    @property
+    def target_url(self) -> str:
+        if self.transport == "websocket" and self.stream_url:
+            return self.stream_url
+        if self.transport == "mqtt":
+            return f"mqtt://{self.mqtt_host}:{self.mqtt_port}"
+        return self.api_url
+
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+
+def default_stream_url(api_url: str) -> str:
+    base = api_url.removesuffix("/midi/events")
+    if base.startswith("https://"):
+        return "wss://" + base.removeprefix("https://") + "/midi/stream"
+    return "ws://" + base.removeprefix("http://") + "/midi/stream"
 
 
 
-def load_config(api_url: str | None = None, log_level: str | None = None) -> RuntimeConfig:
+def load_config(
+    api_url: str | None = None,
+    log_level: str | None = None,
+    http_timeout: float | None = None,
+    http_pool_size: int | None = None,
+    http2: bool | None = None,
+    input_queue_size: int | None = None,
+    pipeline_workers: int | None = None,
+    queue_size: int | None = None,
+    backpressure: str | None = None,
+    batch_window_ms: float | None = None,
+    batch_size: int | None = None,
+    batch_url: str | None = None,
+    transport: str | None = None,
+    stream_url: str | None = None,
+    stream_ack: bool | None = None,
+    stream_binary: bool | None = None,
+    routing_rules: str | None = None,
+    mqtt_host: str | None = None,
+    mqtt_port: int | None = None,
+    mqtt_qos: int | None = None,
+    midi_bulb_ids: str | None = None,
+    breaker_threshold: int | None = None,
+    retry_queue_size: int | None = None,
+    retry_backoff_ms: float | None = None,
+    retry_backoff_max_ms: float | None = None,
+) -> RuntimeConfig:
     resolved_api_url = api_url or os.getenv("API_URL", "http://127.0.0.1:8000/midi/events")
     resolved_log_level = (log_level or os.getenv("LOG_LEVEL", "INFO")).upper()
-    return RuntimeConfig(api_url=resolved_api_url, log_level=resolved_log_level)
+    resolved_timeout = http_timeout if http_timeout is not None else float(os.getenv("HTTP_TIMEOUT", "2.0"))
+    resolved_pool_size = http_pool_size if http_pool_size is not None else int(os.getenv("HTTP_POOL_SIZE", "4"))
+    resolved_http2 = http2 if http2 is not None else env_flag("HTTP2")
+    resolved_input_queue_size = (
+        input_queue_size if input_queue_size is not None else int(os.getenv("INPUT_QUEUE_SIZE", "1024"))
+    )
+    resolved_workers = pipeline_workers if pipeline_workers is not None else int(os.getenv("PIPELINE_WORKERS", "0"))
+    resolved_queue_size = queue_size if queue_size is not None else int(os.getenv("QUEUE_SIZE", "256"))
+    resolved_backpressure = (backpressure or os.getenv("BACKPRESSURE", "block")).lower()
+    if resolved_backpressure not in BACKPRESSURE_POLICIES:
+        raise ValueError(f"backpressure must be one of {', '.join(BACKPRESSURE_POLICIES)}")
+    resolved_batch_window = (
+        batch_window_ms if batch_window_ms is not None else float(os.getenv("BATCH_WINDOW_MS", "0"))
+    )
+    resolved_batch_size = batch_size if batch_size is not None else int(os.getenv("BATCH_SIZE", "32"))
+    resolved_batch_url = batch_url or os.getenv("BATCH_URL") or f"{resolved_api_url}:batch"
+    resolved_transport = (transport or os.getenv("TRANSPORT", "http")).lower()
+    if resolved_transport not in TRANSPORTS:
+        raise ValueError(f"transport must be one of {', '.join(TRANSPORTS)}")
+    if resolved_transport != "http" and resolved_batch_window > 0:
+        raise ValueError("batching is only supported with the http transport")
+    resolved_stream_url = stream_url or os.getenv("STREAM_URL") or default_stream_url(resolved_api_url)
+    resolved_stream_ack = stream_ack if stream_ack is not None else env_flag("STREAM_ACK")
+    resolved_stream_binary = stream_binary if stream_binary is not None else env_flag("STREAM_BINARY", True)
+    resolved_routing_rules = routing_rules or os.getenv("ROUTING_RULES_FILE") or None
+    routing = load_routing_table(Path(resolved_routing_rules)) if resolved_routing_rules else None
+    resolved_mqtt_host = mqtt_host or os.getenv("MQTT_HOST", "127.0.0.1")
+    resolved_mqtt_port = mqtt_port if mqtt_port is not None else int(os.getenv("MQTT_PORT", "1883"))
+    resolved_mqtt_qos = mqtt_qos if mqtt_qos is not None else int(os.getenv("MQTT_QOS", "0"))
+    if resolved_mqtt_qos not in (0, 1, 2):
+        raise ValueError("mqtt qos must be 0, 1 or 2")
+    resolved_bulb_ids = midi_bulb_ids or os.getenv("MIDI_BULB_IDS") or None
+    resolved_breaker_threshold = (
+        breaker_threshold if breaker_threshold is not None else int(os.getenv("BREAKER_THRESHOLD", "0"))
+    )
+    if resolved_breaker_threshold > 0 and resolved_batch_window > 0:
+        raise ValueError("the circuit breaker is not supported with batching")
+    resolved_retry_queue_size = (
+        retry_queue_size if retry_queue_size is not None else int(os.getenv("RETRY_QUEUE_SIZE", "128"))
+    )
+    resolved_backoff = retry_backoff_ms if retry_backoff_ms is not None else float(os.getenv("RETRY_BACKOFF_MS", "250"))
+    resolved_backoff_max = (
+        retry_backoff_max_ms if retry_backoff_max_ms is not None else float(os.getenv("RETRY_BACKOFF_MAX_MS", "8000"))
+    )
+    return RuntimeConfig(
+        api_url=resolved_api_url,
+        log_level=resolved_log_level,
+        http_timeout=resolved_timeout,
+        http_pool_size=resolved_pool_size,
+        http2=resolved_http2,
+        input_queue_size=resolved_input_queue_size,
+        pipeline_workers=resolved_workers,
+        queue_size=resolved_queue_size,
+        backpressure=resolved_backpressure,
+        batch_window_ms=resolved_batch_window,
+        batch_size=resolved_batch_size,
+        batch_url=resolved_batch_url,
+        transport=resolved_transport,
+        stream_url=resolved_stream_url,
+        stream_ack=resolved_stream_ack,
+        stream_binary=resolved_stream_binary,
+        routing_rules=resolved_routing_rules,
+        routing=routing,
+        mqtt_host=resolved_mqtt_host,
+        mqtt_port=resolved_mqtt_port,
+        mqtt_qos=resolved_mqtt_qos,
+        midi_bulb_ids=resolved_bulb_ids,
+        breaker_threshold=resolved_breaker_threshold,
+        retry_queue_size=resolved_retry_queue_size,
+        retry_backoff_ms=resolved_backoff,
+        retry_backoff_max_ms=resolved_backoff_max,
+    )
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 
 from mido.messages.messages import Message
 
-from .models import MidiInputEvent
+from .models import MidiEvent
+from .routing import RoutingTable
 
 SUPPORTED_TYPES = {"note_on", "note_off", "control_change"}
 
 
 
-def map_message(message: Message, source_device: str) -> MidiInputEvent | None:
+def map_message(
+    message: Message,
+    source_device: str,
+    received_ns: int | None = None,
+    routing: RoutingTable | None = None,
+) -> MidiEvent | None:
     event_type = message.type
     if event_type not in SUPPORTED_TYPES:
         return None
@@ -29,12 +36,30 @@ def map_message(message: Message, source_device: str) -> MidiInputEvent | None:
         value = message.value
         state = None
 
-    return MidiInputEvent(
-        event_type=event_type,
-        channel=message.channel,
-        key=key,
-        value=value,
-        state=state,
-        timestamp=datetime.now(timezone.utc),
-        source_device=source_device,
+    channel = message.channel
+    if routing is not None:
+        # Unroutable events stop here, before any timestamp or event is built.
+        route = routing.route(event_type, channel, key, value)
+        if route is None:
+            return None
+        channel, key = route.channel, route.key
+
+    # Stamp the wall-clock time of capture, not of mapping, so queueing delay
+    # between the MIDI callback and this stage does not skew the timestamp.
+    now_ns = time.monotonic_ns()
+    timestamp = datetime.now(timezone.utc)
+    if received_ns is None:
+        received_ns = now_ns
+    elif received_ns < now_ns:
+        timestamp -= timedelta(microseconds=(now_ns - received_ns) // 1000)
+
+    return MidiEvent(
+        event_type,
+        channel,
+        key,
+        value,
+        state,
+        timestamp,
+        source_device,
+        received_ns,
     )
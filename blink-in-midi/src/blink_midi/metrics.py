@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import threading
+
+# Log-scale buckets with ~5% width: cheap to record, percentiles accurate to
+# within one bucket. Values are tracked in microseconds up to ~10 minutes.
+# control_api.metrics has its own copy of LatencyHistogram on purpose: the API
+# image does not install this package and the bridge does not need the API.
+# Keep the bucket layout identical so bridge and API percentiles compare
+# (tests/unit/test_metrics.py checks it).
+BUCKET_GROWTH = 1.05
+BUCKET_COUNT = 450
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+STAGES = ("map", "queue", "send", "total")
+
+_TRACE_PREFIX = os.urandom(4).hex()
+_trace_counter = itertools.count(1)
+
+
+
+def next_trace_id() -> str:
+    """Process-unique trace ID sent as X-Trace-Id so bridge and API logs can be joined."""
+    return f"{_TRACE_PREFIX}-{next(_trace_counter):x}"
+
+
+class LatencyHistogram:
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self._lock = threading.Lock()
+
+    def observe_ns(self, duration_ns: int) -> None:
+        micros = max(duration_ns, 0) / 1000
+        index = min(int(math.log1p(micros) / _LOG_GROWTH), BUCKET_COUNT - 1)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_us += micros
+            if micros > self.max_us:
+                self.max_us = micros
+
+    def percentile_ms(self, percentile: float) -> float:
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = math.ceil(self.count * percentile / 100)
+            seen = 0
+            for index, bucket in enumerate(self.counts):
+                seen += bucket
+                if seen >= rank:
+                    upper_us = math.expm1((index + 1) * _LOG_GROWTH)
+                    return min(upper_us, self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": (self.total_us / self.count / 1000) if self.count else 0.0,
+            "p50_ms": self.percentile_ms(50),
+            "p95_ms": self.percentile_ms(95),
+            "p99_ms": self.percentile_ms(99),
+            "max_ms": self.max_us / 1000,
+        }
+
+
+class StageMetrics:
+    """Per-stage latency histograms for the bridge (map, queue, send, total)."""
+
+    def __init__(self, stages: tuple[str, ...] = STAGES) -> None:
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+
+    def observe_ns(self, stage: str, duration_ns: int) -> None:
+        self.histograms[stage].observe_ns(duration_ns)
+
+    def observe_delivery(self, received_ns: int, started_ns: int, finished_ns: int) -> None:
+        """Record queue wait, send and end-to-end time for one delivered event."""
+        if received_ns:
+            self.histograms["queue"].observe_ns(started_ns - received_ns)
+            self.histograms["total"].observe_ns(finished_ns - received_ns)
+        self.histograms["send"].observe_ns(finished_ns - started_ns)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def format_lines(self) -> list[str]:
+        lines = []
+        for stage, stats in self.summary().items():
+            if not stats["count"]:
+                continue
+            lines.append(
+                f"stats stage={stage} count={stats['count']} mean={stats['mean_ms']:.3f}ms "
+                f"p50={stats['p50_ms']:.3f}ms p95={stats['p95_ms']:.3f}ms "
+                f"p99={stats['p99_ms']:.3f}ms max={stats['max_ms']:.3f}ms"
+            )
+        return lines
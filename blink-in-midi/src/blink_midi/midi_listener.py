@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator, Sequence
+from functools import partial
 
 import mido
 
+DEFAULT_INPUT_QUEUE_SIZE = 1024
+
 
 
 def list_input_devices() -> list[str]:
@@ -19,3 +25,76 @@ def iter_midi_messages(device_name: str, demo_once: bool = False) -> Iterator[ob
     with mido.open_input(device_name) as port:
         for message in port:
             yield message
+
+
+class MidiListener:
+    """Callback-driven MIDI input that stamps each message on arrival.
+
+    One or more input ports are opened, each with its own mido callback. Every
+    message is tagged with its device name and stored with its
+    `time.monotonic_ns()` capture time in one bounded deque, so several
+    controllers merge into a single stream ordered by arrival. Stamping and
+    appending happen under a lock so callbacks from different ports cannot
+    interleave out of order. When the consumer falls behind the oldest
+    message is discarded and counted in `overflows`.
+    """
+
+    def __init__(
+        self,
+        device_names: str | Sequence[str],
+        maxsize: int = DEFAULT_INPUT_QUEUE_SIZE,
+        demo_once: bool = False,
+    ) -> None:
+        self.device_names = (device_names,) if isinstance(device_names, str) else tuple(device_names)
+        if not self.device_names:
+            raise ValueError("at least one MIDI input device is required")
+        self.demo_once = demo_once
+        self.overflows = 0
+        self._messages: deque[tuple[int, object, str]] = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._closed = False
+        self._ports: list[object] = []
+
+    def open(self) -> None:
+        if self.demo_once:
+            self._on_message(mido.Message("note_on", note=60, velocity=100, channel=0))
+            self._closed = True
+            return
+        try:
+            for name in self.device_names:
+                self._ports.append(mido.open_input(name, callback=partial(self._on_message, device=name)))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._closed = True
+        while self._ports:
+            self._ports.pop().close()  # type: ignore[attr-defined]
+        self._ready.set()
+
+    def _on_message(self, message: object, device: str | None = None) -> None:
+        with self._lock:
+            received_ns = time.monotonic_ns()
+            if len(self._messages) == self._messages.maxlen:
+                self.overflows += 1
+            self._messages.append((received_ns, message, device or self.device_names[0]))
+        self._ready.set()
+
+    def __iter__(self) -> Iterator[tuple[int, object, str]]:
+        """Yield (received_ns, message, device) until the listener is closed and drained."""
+        while True:
+            self._ready.clear()
+            while self._messages:
+                yield self._messages.popleft()
+            if self._closed:
+                return
+            self._ready.wait()
+
+    def __enter__(self) -> MidiListener:
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime, timezone
-from typing import Literal
+from typing import Literal, NamedTuple
 from uuid import uuid4
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 EventType = Literal["note_on", "note_off", "control_change"]
 NoteState = Literal["on", "off"]
+BackpressurePolicy = Literal["block", "drop-oldest", "coalesce"]
+BACKPRESSURE_POLICIES: tuple[BackpressurePolicy, ...] = ("block", "drop-oldest", "coalesce")
 
 
 class MidiInputEvent(BaseModel):
@@ -33,6 +36,37 @@ class MidiInputEvent(BaseModel):
         return parsed.astimezone(timezone.utc)
 
 
+class MidiEvent(NamedTuple):
+    """Hot-path event built straight from a mido message.
+
+    mido already range-checks channel/key/value, so this skips validation and
+    mirrors the `MidiInputEvent` fields; pydantic models stay at the contract
+    boundary. `received_ns` is the `time.monotonic_ns()` capture time of the
+    underlying MIDI message.
+    """
+
+    event_type: EventType
+    channel: int
+    key: int
+    value: int
+    state: NoteState | None
+    timestamp: datetime
+    source_device: str
+    received_ns: int = 0
+
+    def age_ms(self, now_ns: int | None = None) -> float:
+        """Milliseconds elapsed since the MIDI message was captured."""
+        return ((now_ns or time.monotonic_ns()) - self.received_ns) / 1_000_000
+
+
+class DeliveryResult(NamedTuple):
+    event: MidiEvent | MidiInputEvent
+    url: str
+    failure_reason: str | None = None
+    trace_id: str | None = None
+    retryable: bool = False
+
+
 class MidiEventPayload(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -68,11 +102,20 @@ class OutboundRequestIntent(BaseModel):
     @field_validator("url")
     @classmethod
     def validate_url(cls, value: str) -> str:
-        if not value.startswith("http://") and not value.startswith("https://"):
-            raise ValueError("url must start with http:// or https://")
+        if not value.startswith(("http://", "https://", "ws://", "wss://")):
+            raise ValueError("url must start with http://, https://, ws:// or wss://")
         return value
 
 
+class DeviceCounters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    received_events: int = 0
+    processed_events: int = 0
+    ignored_events: int = 0
+    intent_failures: int = 0
+
+
 class BridgeSession(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -83,6 +126,17 @@ class BridgeSession(BaseModel):
     processed_events: int = 0
     ignored_events: int = 0
     intent_failures: int = 0
+    dropped_events: int = 0
+    coalesced_events: int = 0
+    deferred_events: int = 0
+    breaker_opens: int = 0
+    devices: dict[str, DeviceCounters] = Field(default_factory=dict)
+
+    def device_counters(self, device: str) -> DeviceCounters:
+        counters = self.devices.get(device)
+        if counters is None:
+            counters = self.devices[device] = DeviceCounters()
+        return counters
 
 
 REQUIRED_PAYLOAD_FIELDS = ["event_type", "channel", "key", "value", "state", "timestamp"]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+
+from .coalescer import CoalescingQueue, PutOutcome, event_slot
+from .metrics import StageMetrics
+from .models import BackpressurePolicy, BridgeSession, DeliveryResult, MidiEvent
+from .resilience import ResilientDelivery, RetryPolicy
+from .sender import Sender, process_batch, process_event
+
+logger = logging.getLogger(__name__)
+
+
+class EventQueue:
+    """Bounded FIFO of mapped events with an explicit overflow policy.
+
+    `block` makes the producer wait for room and `drop-oldest` evicts the head
+    of the queue. The `coalesce` policy is served by `CoalescingQueue`.
+    """
+
+    def __init__(self, maxsize: int, policy: BackpressurePolicy = "block") -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items: deque[MidiEvent] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def put(self, event: MidiEvent) -> PutOutcome:
+        with self._cond:
+            if self.policy == "block":
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+            if self._closed:
+                return "dropped"
+
+            outcome: PutOutcome = "queued"
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                outcome = "dropped"
+
+            self._items.append(event)
+            self._cond.notify_all()
+            return outcome
+
+    def get(self, timeout: float | None = None) -> MidiEvent | None:
+        """Wait for an event; return None on timeout or once closed and drained."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if not self._items:
+                return None
+            event = self._items.popleft()
+            self._cond.notify_all()
+            return event
+
+    def task_done(self, event: MidiEvent) -> None:
+        return None
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class EventPipeline:
+    """Decouples MIDI reading from delivery with a bounded queue and send workers.
+
+    When `batch_url` is set, each worker collects events arriving within
+    `batch_window` seconds (up to `batch_size`) and sends them as one batch.
+    With a `retry` policy single-event sends go through a ResilientDelivery
+    shared by all workers.
+    """
+
+    def __init__(
+        self,
+        session: BridgeSession,
+        api_url: str,
+        sender: Sender,
+        workers: int = 4,
+        queue_size: int = 256,
+        policy: BackpressurePolicy = "block",
+        batch_url: str | None = None,
+        batch_window: float = 0.003,
+        batch_size: int = 32,
+        metrics: StageMetrics | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.session = session
+        self.api_url = api_url
+        self.sender = sender
+        self.batch_url = batch_url
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.metrics = metrics
+        self.queue: EventQueue | CoalescingQueue = (
+            CoalescingQueue(queue_size) if policy == "coalesce" else EventQueue(queue_size, policy)
+        )
+        self.policy = policy
+        self.delivery = ResilientDelivery(api_url, sender, self.record, retry) if retry else None
+        self._lock = threading.Lock()
+        target = self._run_batch_worker if batch_url else self._run_worker
+        self._threads = [
+            threading.Thread(target=target, name=f"blink-midi-sender-{index}", daemon=True)
+            for index in range(workers)
+        ]
+
+    def start(self) -> None:
+        if self.delivery is not None:
+            self.delivery.start()
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, event: MidiEvent) -> None:
+        outcome = self.queue.put(event)
+        if outcome == "queued":
+            return
+        with self._lock:
+            if outcome == "coalesced":
+                self.session.coalesced_events += 1
+            else:
+                self.session.dropped_events += 1
+        logger.debug("pipeline_event_%s policy=%s slot=%s", outcome, self.policy, event_slot(event))
+
+    def close(self) -> None:
+        """Stop accepting events, let workers drain the queue, and wait for them."""
+        self.queue.close()
+        for thread in self._threads:
+            thread.join()
+        if self.delivery is not None:
+            self.delivery.close()
+
+    def record(self, result: DeliveryResult) -> None:
+        with self._lock:
+            counters = self.session.device_counters(result.event.source_device)
+            if result.failure_reason:
+                self.session.intent_failures += 1
+                counters.intent_failures += 1
+            else:
+                self.session.processed_events += 1
+                counters.processed_events += 1
+
+    def _run_worker(self) -> None:
+        while (event := self.queue.get()) is not None:
+            started_ns = time.monotonic_ns()
+            try:
+                if self.delivery is not None:
+                    result = self.delivery.deliver(event)
+                    if result is not None:
+                        self.record(result)
+                else:
+                    self.record(process_event(event, self.api_url, self.sender))
+            finally:
+                self.queue.task_done(event)
+            if self.metrics is not None:
+                self.metrics.observe_delivery(event.received_ns, started_ns, time.monotonic_ns())
+
+    def _run_batch_worker(self) -> None:
+        assert self.batch_url is not None
+        while (first := self.queue.get()) is not None:
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                event = self.queue.get(timeout=remaining)
+                if event is None:
+                    break
+                batch.append(event)
+            started_ns = time.monotonic_ns()
+            try:
+                for result in process_batch(batch, self.batch_url, self.sender):
+                    self.record(result)
+            finally:
+                for event in batch:
+                    self.queue.task_done(event)
+            if self.metrics is not None:
+                finished_ns = time.monotonic_ns()
+                for event in batch:
+                    self.metrics.observe_delivery(event.received_ns, started_ns, finished_ns)
+
+    def __enter__(self) -> EventPipeline:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import struct
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import mido
+
+# Compact recording format: an 8-byte magic header, then one record per MIDI
+# message: <offset_ns:u64><length:u16><raw MIDI bytes>, where offset_ns is the
+# monotonic capture time relative to the first recorded message. The file is
+# unbuffered and each record is one write, so a recording cut short by a crash
+# of the recorder stays readable up to its last complete record.
+RECORDING_MAGIC = b"BMIDREC1"
+RECORD_HEADER = struct.Struct("<QH")
+
+# Sleep until this close to a message's due time, then spin for precision.
+SPIN_NS = 1_000_000
+
+
+
+class MidiRecorder:
+    """Appends (received_ns, message) pairs to a recording file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.recorded = 0
+        self._origin_ns: int | None = None
+        self._file = None
+
+    def open(self) -> None:
+        self._file = self.path.open("wb", buffering=0)
+        self._file.write(RECORDING_MAGIC)
+
+    def write(self, received_ns: int, message: mido.Message) -> None:
+        if self._origin_ns is None:
+            self._origin_ns = received_ns
+        data = bytes(message.bytes())
+        self._file.write(RECORD_HEADER.pack(received_ns - self._origin_ns, len(data)) + data)
+        self.recorded += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> MidiRecorder:
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+
+def read_recording(path: Path) -> Iterator[tuple[int, mido.Message]]:
+    """Yield (offset_ns, message) from a recording or a standard .mid file."""
+    if path.suffix.lower() in {".mid", ".midi"}:
+        yield from read_midi_file(path)
+        return
+
+    data = path.read_bytes()
+    if not data.startswith(RECORDING_MAGIC):
+        raise ValueError(f"{path} is not a blink-midi recording")
+    offset = len(RECORDING_MAGIC)
+    while offset + RECORD_HEADER.size <= len(data):
+        offset_ns, length = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        if offset + length > len(data):
+            break  # truncated final record
+        yield offset_ns, mido.Message.from_bytes(data[offset : offset + length])
+        offset += length
+
+
+
+def read_midi_file(path: Path) -> Iterator[tuple[int, mido.Message]]:
+    elapsed = 0.0
+    # Iterating a MidiFile merges its tracks and converts delta ticks to seconds.
+    for message in mido.MidiFile(path):
+        elapsed += message.time
+        if not message.is_meta:
+            yield round(elapsed * 1e9), message.copy(time=0)
+
+
+
+def sleep_until(deadline_ns: int) -> None:
+    while True:
+        remaining = deadline_ns - time.monotonic_ns()
+        if remaining <= 0:
+            return
+        if remaining > SPIN_NS:
+            time.sleep((remaining - SPIN_NS) / 1e9)
+
+
+
+class ReplaySource:
+    """Feeds a recording back as (received_ns, message, device), like MidiListener.
+
+    With `speed` > 0 each message is held until its recorded offset divided by
+    `speed` has passed and is stamped with that due time, so time the consumer
+    spends blocked shows up as queueing delay just as it would live. With
+    `speed` 0 messages are yielded as fast as the consumer takes them.
+    `max_lag_ns` is the furthest behind schedule a message was released.
+    """
+
+    def __init__(self, path: Path, speed: float = 1.0, device: str | None = None) -> None:
+        self.path = path
+        self.speed = speed
+        self.device = device or f"replay:{path.name}"
+        self.replayed = 0
+        self.max_lag_ns = 0
+        self.overflows = 0
+
+    def __iter__(self) -> Iterator[tuple[int, object, str]]:
+        started_ns = time.monotonic_ns()
+        for offset_ns, message in read_recording(self.path):
+            now_ns = time.monotonic_ns()
+            if self.speed > 0:
+                due_ns = started_ns + int(offset_ns / self.speed)
+                if due_ns > now_ns:
+                    sleep_until(due_ns)
+                else:
+                    self.max_lag_ns = max(self.max_lag_ns, now_ns - due_ns)
+                received_ns = due_ns
+            else:
+                received_ns = now_ns
+            self.replayed += 1
+            yield received_ns, message, self.device
+
+    def __enter__(self) -> ReplaySource:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
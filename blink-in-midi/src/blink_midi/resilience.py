@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Literal, NamedTuple
+
+from .coalescer import Slot, event_slot
+from .models import BridgeSession, DeliveryResult, MidiEvent
+from .sender import Sender, process_event
+
+logger = logging.getLogger(__name__)
+
+BreakerState = Literal["closed", "open", "half-open"]
+ResultFn = Callable[[DeliveryResult], None]
+
+
+class RetryPolicy(NamedTuple):
+    failure_threshold: int = 3
+    queue_size: int = 128
+    backoff: float = 0.25
+    backoff_max: float = 8.0
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive retryable failures.
+
+    While open, the next probe is allowed at `next_probe_at`. A failed probe
+    doubles the backoff up to `backoff_max`; a success closes the breaker and
+    resets it. Not thread-safe on its own: ResilientDelivery guards it.
+    """
+
+    def __init__(self, threshold: int, backoff: float, backoff_max: float) -> None:
+        self.threshold = max(threshold, 1)
+        self.initial_backoff = backoff
+        self.backoff_max = backoff_max
+        self.state: BreakerState = "closed"
+        self.failures = 0
+        self.opened = 0
+        self.backoff = backoff
+        self.next_probe_at = 0.0
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.backoff = self.initial_backoff
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half-open":
+            self.backoff = min(self.backoff * 2, self.backoff_max)
+            self._open()
+        elif self.state == "closed" and self.failures >= self.threshold:
+            self.opened += 1
+            self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.next_probe_at = time.monotonic() + self.backoff
+
+    def probe_delay(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(self.next_probe_at - time.monotonic(), 0.0)
+
+
+class ResilientDelivery:
+    """Circuit breaker and latest-per-slot retry buffer around `process_event`.
+
+    Events that fail with a retryable error (transport errors, 5xx) are kept
+    in a bounded buffer holding only the newest event per (event type,
+    channel, key); when it is full the oldest slot is evicted. Once the
+    breaker opens, `deliver` buffers events without touching the network, so
+    the MIDI loop never waits on a dead API. One prober thread retries buffered
+    events, on an exponential backoff while the breaker is open and straight
+    away once it has closed, and passes their results to `on_result`.
+    Rejections (4xx, unmapped channels) are returned as failures and not
+    retried.
+    """
+
+    def __init__(self, api_url: str, sender: Sender, on_result: ResultFn, policy: RetryPolicy) -> None:
+        self.api_url = api_url
+        self.sender = sender
+        self.on_result = on_result
+        self.queue_size = max(policy.queue_size, 1)
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.backoff, policy.backoff_max)
+        self.deferred = 0
+        self.superseded = 0
+        self.evicted = 0
+        self.retried = 0
+        self.abandoned = 0
+        self._retry: dict[Slot, MidiEvent] = {}
+        self._probing: Slot | None = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run_prober, name="blink-midi-retry", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def deliver(self, event: MidiEvent) -> DeliveryResult | None:
+        """Send one event; returns None when it was buffered for a later retry."""
+        slot = event_slot(event)
+        with self._cond:
+            if self.breaker.state != "closed" or slot == self._probing:
+                self._defer(slot, event)
+                return None
+            # A live send makes an older buffered value for the same slot stale.
+            if self._retry.pop(slot, None) is not None:
+                self.superseded += 1
+        result = process_event(event, self.api_url, self.sender)
+        with self._cond:
+            if not result.retryable:
+                self.breaker.record_success()
+                self._cond.notify_all()
+                return result
+            self.breaker.record_failure()
+            self._defer(slot, event)
+            return None
+
+    def _defer(self, slot: Slot, event: MidiEvent) -> None:
+        if slot in self._retry:
+            self.superseded += 1
+        elif len(self._retry) >= self.queue_size:
+            del self._retry[next(iter(self._retry))]
+            self.evicted += 1
+        self._retry[slot] = event
+        self.deferred += 1
+        self._cond.notify_all()
+
+    def _run_prober(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (not self._retry or self.breaker.probe_delay() > 0):
+                    self._cond.wait(self.breaker.probe_delay() if self._retry else None)
+                if self._closed:
+                    return
+                if self.breaker.state == "open":
+                    self.breaker.state = "half-open"
+                slot = next(iter(self._retry))
+                event = self._retry.pop(slot)
+                self._probing = slot
+            result = process_event(event, self.api_url, self.sender)
+            with self._cond:
+                self._probing = None
+                self.retried += 1
+                if result.retryable:
+                    self.breaker.record_failure()
+                    if slot in self._retry:
+                        self.superseded += 1
+                    else:
+                        self._retry[slot] = event
+                    self._cond.notify_all()
+                    logger.warning(
+                        "retry_failed state=%s backoff=%.3fs pending=%s",
+                        self.breaker.state,
+                        self.breaker.backoff,
+                        len(self._retry),
+                    )
+                    continue
+                self.breaker.record_success()
+                self._cond.notify_all()
+            self.on_result(result)
+
+    def close(self, drain_timeout: float = 2.0) -> None:
+        """Give a healthy API `drain_timeout` to take the buffer, then stop the prober."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: (not self._retry and self._probing is None) or self.breaker.state != "closed",
+                drain_timeout,
+            )
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.abandoned = len(self._retry)
+
+    def add_totals(self, session: BridgeSession) -> None:
+        """Fold buffer outcomes into the session once the delivery is closed."""
+        session.deferred_events += self.deferred
+        session.breaker_opens += self.breaker.opened
+        session.coalesced_events += self.superseded
+        session.dropped_events += self.evicted + self.abandoned
+
+    def counters(self) -> dict[str, object]:
+        with self._cond:
+            return {
+                "state": self.breaker.state,
+                "opened": self.breaker.opened,
+                "deferred": self.deferred,
+                "retried": self.retried,
+                "superseded": self.superseded,
+                "evicted": self.evicted,
+                "pending": len(self._retry),
+            }
+
+    def __enter__(self) -> ResilientDelivery:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+MIDI_CHANNELS = 16
+MIDI_KEYS = 128
+
+
+
+class RoutingRule(BaseModel):
+    """One filter/remap rule; an event passes if any rule covers its slot.
+
+    `notes` is an inclusive [min, max] note range for note_on events and
+    `controls` a list of CC numbers. Matching events below `min_value`
+    (velocity or CC value) are dropped. `to_channel` and `transpose` rewrite
+    the channel and key that are sent.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    channels: list[int] = Field(default_factory=lambda: list(range(MIDI_CHANNELS)))
+    notes: tuple[int, int] | None = None
+    controls: list[int] | None = None
+    min_value: int = Field(default=0, ge=0, le=127)
+    to_channel: int | None = Field(default=None, ge=0, le=15)
+    transpose: int = 0
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> RoutingRule:
+        if self.notes is None and self.controls is None:
+            raise ValueError("a routing rule needs notes or controls")
+        if any(not 0 <= channel < MIDI_CHANNELS for channel in self.channels):
+            raise ValueError("channels must be in 0..15")
+        keys = [*(self.notes or ()), *(self.controls or ())]
+        if any(not 0 <= key < MIDI_KEYS for key in keys):
+            raise ValueError("notes and controls must be in 0..127")
+        return self
+
+
+class RoutingRules(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    rules: list[RoutingRule]
+
+
+class Route(NamedTuple):
+    channel: int
+    key: int
+    min_value: int
+
+
+class RoutingTable:
+    """Flat 16x128 dispatch tables (note_on and control_change) built from rules.
+
+    Slot `channel << 7 | key` holds the outgoing Route or None, so routing an
+    event is one list index and a threshold check. The first rule covering a
+    slot wins.
+    """
+
+    __slots__ = ("notes", "controls")
+
+    def __init__(self, notes: list[Route | None], controls: list[Route | None]) -> None:
+        self.notes = notes
+        self.controls = controls
+
+    def route(self, event_type: str, channel: int, key: int, value: int) -> Route | None:
+        table = self.notes if event_type == "note_on" else self.controls
+        route = table[channel << 7 | key]
+        if route is None or value < route.min_value:
+            return None
+        return route
+
+
+
+def compile_rules(rules: list[RoutingRule]) -> RoutingTable:
+    notes: list[Route | None] = [None] * (MIDI_CHANNELS * MIDI_KEYS)
+    controls: list[Route | None] = [None] * (MIDI_CHANNELS * MIDI_KEYS)
+    for rule in rules:
+        note_keys = range(rule.notes[0], rule.notes[1] + 1) if rule.notes else ()
+        for table, keys in ((notes, note_keys), (controls, rule.controls or ())):
+            for channel in rule.channels:
+                for key in keys:
+                    slot = channel << 7 | key
+                    if table[slot] is not None:
+                        continue
+                    out_key = key + rule.transpose
+                    if not 0 <= out_key < MIDI_KEYS:
+                        raise ValueError(f"transpose moves key {key} outside 0..127")
+                    out_channel = channel if rule.to_channel is None else rule.to_channel
+                    table[slot] = Route(out_channel, out_key, rule.min_value)
+    return RoutingTable(notes, controls)
+
+
+
+def load_routing_table(path: Path) -> RoutingTable:
+    """Read a JSON rules file ({"rules": [...]}) and compile it; raises ValueError."""
+    try:
+        raw = json.loads(path.read_text())
+    except OSError as exc:
+        raise ValueError(f"cannot read routing rules {path}: {exc}") from exc
+    return compile_rules(RoutingRules.model_validate(raw).rules)
@@ -2,13 +2,233 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
+from functools import lru_cache
 
 import httpx
 
-from .models import MidiEventPayload, MidiInputEvent, OutboundRequestIntent
+from .metrics import next_trace_id
+from .models import DeliveryResult, MidiEvent, MidiEventPayload, MidiInputEvent, OutboundRequestIntent
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_POOL_SIZE = 4
+# Binary stream framing shared with control_api.midi_stream: 4 bytes per event.
+STREAM_EVENT_CODES = {"note_on": 0, "note_off": 1, "control_change": 2}
+# The payload space is 3 types x 16 channels x 128 keys x 128 values; a bounded
+# LRU keeps the working set of a performance pre-encoded.
+PAYLOAD_CACHE_SIZE = 4096
+DEFAULT_MQTT_PORT = 1883
+
+
+class HttpSender:
+    """Long-lived HTTP transport that keeps keep-alive connections to the API."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        http2: bool = False,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.client = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+            http2=http2,
+            transport=transport,
+        )
+
+    def post(self, url: str, payload: object, headers: dict[str, str]) -> httpx.Response:
+        return self.client.post(url, json=payload, headers=headers)
+
+    def post_content(self, url: str, content: bytes, headers: dict[str, str]) -> httpx.Response:
+        return self.client.post(url, content=content, headers=headers)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def __enter__(self) -> HttpSender:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class WebSocketSender:
+    """Keeps one WebSocket open to the control API stream for the whole session.
+
+    Without `ack` sends are fire-and-forget; with it every event waits for the
+    API's per-event result so rejections surface as intent failures. The
+    socket is opened by the first send, not the constructor. A send that finds
+    the socket closed reopens it and tries once more; if the API is
+    still unreachable the error is raised (and is retryable), and the next send
+    tries to reopen it again.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ack: bool = False,
+        binary: bool = True,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        try:
+            from websockets.exceptions import ConnectionClosed
+            from websockets.sync.client import connect
+        except ImportError as exc:  # pragma: no cover - depends on optional extra
+            raise RuntimeError("websocket transport requires the 'stream' extra (websockets)") from exc
+
+        self.url = url
+        self.ack = ack
+        self.binary = binary
+        self.timeout = timeout
+        self.reconnects = 0
+        self._lock = threading.Lock()
+        self._connect = connect
+        self._closed_error = ConnectionClosed
+        separator = "&" if "?" in url else "?"
+        self._endpoint = f"{url}{separator}ack={str(ack).lower()}"
+        self._opened = False
+        self.connection = None
+
+    def encode(self, payload: dict[str, object], trace_id: str | None = None) -> bytes | str:
+        if not self.binary:
+            return json.dumps({**payload, "trace_id": trace_id} if trace_id else payload)
+        return bytes(
+            (
+                STREAM_EVENT_CODES[str(payload["event_type"])],
+                int(payload["channel"]),  # type: ignore[arg-type]
+                int(payload["key"]),  # type: ignore[arg-type]
+                int(payload["value"]),  # type: ignore[arg-type]
+            )
+        )
+
+    def send(self, payload: dict[str, object], trace_id: str | None = None) -> None:
+        frame = self.encode(payload, trace_id)
+        with self._lock:
+            reply = self._exchange(frame)
+        if reply is not None and reply.get("status") != "ok":
+            raise ValueError(f"stream rejected event: {reply.get('message', reply)}")
+
+    def _exchange(self, frame: bytes | str) -> dict | None:
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self._connect(self._endpoint, open_timeout=self.timeout)
+                if self._opened:
+                    self.reconnects += 1
+                self._opened = True
+            try:
+                self.connection.send(frame)
+                if not self.ack:
+                    return None
+                return json.loads(self.connection.recv(timeout=self.timeout))
+            except self._closed_error:
+                self.connection = None
+                if attempt:
+                    raise
+                logger.warning("stream_closed url=%s reconnecting", self.url)
+            except TimeoutError:
+                # A late ack would be read as the next event's result; start over.
+                self.connection.close()
+                self.connection = None
+                raise
+        return None
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+
+    def __enter__(self) -> WebSocketSender:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class MqttSender:
+    """Publishes straight to `zigbee2mqtt/<id>/set`, skipping the control API.
+
+    Channel routes and note brightness come from `control_api.midi_mapping`,
+    so a note resolves to the same topic and payload the API would publish.
+    Server-only features (scenes, group fan-out, rate limiting, the device
+    shadow) are not applied. With `qos` 0 a send returns once the message is
+    queued on the persistent connection; with 1 or 2 it waits for the broker.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_MQTT_PORT,
+        bulb_ids: str | None = None,
+        qos: int = 0,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError as exc:  # pragma: no cover - depends on optional extra
+            raise RuntimeError("mqtt transport requires the 'mqtt' extra (paho-mqtt)") from exc
+        try:
+            from control_api.midi_mapping import MIDI_NOTE_MAX, NOTE_BRIGHTNESS_TABLE, build_midi_routing
+        except ImportError as exc:  # pragma: no cover - depends on the control API being importable
+            raise RuntimeError(
+                "mqtt transport reuses control_api.midi_mapping; install zigbee-infra/infra/control-api"
+            ) from exc
+
+        self.url = f"mqtt://{host}:{port}"
+        self.qos = qos
+        self.timeout = timeout
+        self.routing = build_midi_routing(bulb_ids)
+        self.note_max = MIDI_NOTE_MAX
+        self.payloads = tuple(
+            json.dumps({"brightness": brightness}, separators=(",", ":")).encode("utf-8")
+            for brightness in NOTE_BRIGHTNESS_TABLE
+        )
+        self.off_payload = b'{"brightness":0}'
+        self._success = mqtt.MQTT_ERR_SUCCESS
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.client.connect(host, port)
+        self.client.loop_start()
+
+    def resolve(self, event: MidiEvent | MidiInputEvent) -> tuple[str, bytes]:
+        """Topic and payload for an event, with the control API's validation rules."""
+        route = self.routing.route(event.channel)
+        if route is None or route.mqtt_topic is None:
+            raise ValueError(f"channel {event.channel} is not mapped to a device")
+        if event.key > self.note_max:
+            raise ValueError(f"key {event.key} is outside 0..{self.note_max}")
+        payload = self.off_payload if event.event_type == "note_off" else self.payloads[event.key]
+        return route.mqtt_topic, payload
+
+    def send(self, event: MidiEvent | MidiInputEvent) -> str:
+        topic, payload = self.resolve(event)
+        info = self.client.publish(topic, payload, qos=self.qos)
+        if info.rc != self._success:
+            raise ConnectionError(f"mqtt publish failed rc={info.rc}")
+        if self.qos > 0:
+            info.wait_for_publish(self.timeout)
+            if not info.is_published():
+                raise TimeoutError("mqtt publish was not acknowledged")
+        return topic
+
+    def close(self) -> None:
+        self.client.disconnect()
+        self.client.loop_stop()
+
+    def __enter__(self) -> MqttSender:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+Sender = HttpSender | WebSocketSender | MqttSender
+REQUEST_HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+TRACE_HEADER = "X-Trace-Id"
+
 
 
 def event_to_payload(event: MidiInputEvent) -> MidiEventPayload:
@@ -23,50 +243,128 @@ def event_to_payload(event: MidiInputEvent) -> MidiEventPayload:
 
 
 
+def event_payload_json(event: MidiEvent | MidiInputEvent) -> dict[str, object]:
+    """Build the wire payload directly from an already range-checked event."""
+    return {
+        "event_type": event.event_type,
+        "channel": event.channel,
+        "key": event.key,
+        "value": event.value,
+        "state": event.state,
+        "timestamp": event.timestamp.isoformat(),
+    }
+
+
+
+@lru_cache(maxsize=PAYLOAD_CACHE_SIZE)
+def encoded_payload_prefix(event_type: str, channel: int, key: int, value: int, state: str | None) -> bytes:
+    """JSON bytes of a payload up to the opening quote of its timestamp."""
+    encoded = json.dumps(
+        {
+            "event_type": event_type,
+            "channel": channel,
+            "key": key,
+            "value": value,
+            "state": state,
+            "timestamp": "",
+        },
+        separators=(",", ":"),
+    )
+    return encoded[: -len('"}')].encode("utf-8")
+
+
+
+def encode_event_payload(event: MidiEvent | MidiInputEvent) -> bytes:
+    """Serialized payload for an event: memoized prefix plus the spliced-in timestamp."""
+    prefix = encoded_payload_prefix(event.event_type, event.channel, event.key, event.value, event.state)
+    return prefix + event.timestamp.isoformat().encode("ascii") + b'"}'
+
+
+
 def build_request_intent(event: MidiInputEvent, api_url: str) -> OutboundRequestIntent:
     payload = event_to_payload(event)
     return OutboundRequestIntent(
         method="POST",
         url=api_url,
-        headers={"Content-Type": "application/json", "Accept": "application/json"},
+        headers=dict(REQUEST_HEADERS),
         payload=payload,
         simulated_sent=True,
     )
 
 
 
-def process_intent(intent: OutboundRequestIntent) -> OutboundRequestIntent:
-    try:
-        payload = MidiEventPayload.model_validate(intent.payload)
-        payload_json = payload.model_dump(mode="json")
+class ApiStatusError(ValueError):
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(f"api returned {status_code}: {message}")
+        self.status_code = status_code
 
-        with httpx.Client(timeout=2.0) as client:
-            response = client.post(intent.url, json=payload_json, headers=intent.headers)
 
-        if response.status_code != 200:
-            try:
-                error_body = response.json()
-            except ValueError:
-                error_body = {}
-            message = error_body.get("message", response.text)
-            raise ValueError(f"api returned {response.status_code}: {message}")
 
-        response_body = response.json()
-        if response_body.get("status") != "ok":
-            raise ValueError(f"unexpected api response status: {response_body!r}")
+def is_retryable(exc: Exception) -> bool:
+    """Transport failures and 5xx/429 may succeed later; rejections (ValueError) will not."""
+    if isinstance(exc, ApiStatusError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    return not isinstance(exc, ValueError)
+
+
 
+def check_response(response: httpx.Response) -> None:
+    if response.status_code != 200:
+        try:
+            error_body = response.json()
+        except ValueError:
+            error_body = {}
+        message = error_body.get("message", response.text)
+        raise ApiStatusError(response.status_code, message)
+
+    response_body = response.json()
+    if response_body.get("status") != "ok":
+        raise ValueError(f"unexpected api response status: {response_body!r}")
+
+
+
+def deliver_payload(
+    url: str,
+    payload_json: dict[str, object],
+    headers: dict[str, str],
+    sender: Sender | None = None,
+) -> None:
+    """Send one payload over the given transport, raising on any delivery failure."""
+    trace_id = headers.get(TRACE_HEADER)
+    if isinstance(sender, WebSocketSender):
+        sender.send(payload_json, trace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "outbound_stream_sent %s",
+                json.dumps({"url": url, "payload": payload_json, "acked": sender.ack, "trace_id": trace_id}),
+            )
+        return
+
+    if sender is not None:
+        response = sender.post(url, payload_json, headers)
+    else:
+        with httpx.Client(timeout=DEFAULT_TIMEOUT) as client:
+            response = client.post(url, json=payload_json, headers=headers)
+    check_response(response)
+
+    if logger.isEnabledFor(logging.INFO):
         logger.info(
             "outbound_request_sent %s",
             json.dumps(
-                {
-                    "method": intent.method,
-                    "url": intent.url,
-                    "payload": payload_json,
-                    "status_code": 200,
-                }
+                {"method": "POST", "url": url, "payload": payload_json, "status_code": 200, "trace_id": trace_id}
             ),
         )
 
+
+
+def process_intent(
+    intent: OutboundRequestIntent,
+    sender: Sender | None = None,
+) -> OutboundRequestIntent:
+    """Validate and deliver a contract-level intent (slow path, used at the boundary)."""
+    try:
+        payload = MidiEventPayload.model_validate(intent.payload)
+        deliver_payload(intent.url, payload.model_dump(mode="json"), intent.headers, sender)
         return intent
     except Exception as exc:  # pragma: no cover - defensive for runtime
         failed = intent.model_copy(update={"failure_reason": str(exc), "simulated_sent": False})
@@ -75,23 +373,96 @@ def process_intent(intent: OutboundRequestIntent) -> OutboundRequestIntent:
 
 
 
-def process_event(event: MidiInputEvent, api_url: str) -> OutboundRequestIntent:
+def process_event(
+    event: MidiEvent | MidiInputEvent,
+    api_url: str,
+    sender: Sender | None = None,
+) -> DeliveryResult:
+    """Hot path: serialize and deliver one event without building pydantic models."""
+    trace_id = next_trace_id()
+    headers = {**REQUEST_HEADERS, TRACE_HEADER: trace_id}
+    try:
+        if isinstance(sender, HttpSender):
+            body = encode_event_payload(event)
+            check_response(sender.post_content(api_url, body, headers))
+            if logger.isEnabledFor(logging.INFO):
+                latency = round(event.age_ms(), 3) if isinstance(event, MidiEvent) else None
+                logger.info(
+                    "outbound_request_sent %s",
+                    f'{{"method": "POST", "url": {json.dumps(api_url)}, '
+                    f'"payload": {body.decode("utf-8")}, "status_code": 200, '
+                    f'"latency_ms": {json.dumps(latency)}, "trace_id": "{trace_id}"}}',
+                )
+        elif isinstance(sender, MqttSender):
+            topic = sender.send(event)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "outbound_mqtt_published %s",
+                    json.dumps({"topic": topic, "qos": sender.qos, "trace_id": trace_id}),
+                )
+        else:
+            deliver_payload(api_url, event_payload_json(event), headers, sender)
+    except Exception as exc:
+        logger.error("outbound_intent_failure trace_id=%s event=%s reason=%s", trace_id, event, exc)
+        return DeliveryResult(event, api_url, str(exc), trace_id, is_retryable(exc))
+    return DeliveryResult(event, api_url, None, trace_id)
+
+
+
+def process_batch(
+    events: list[MidiEvent],
+    batch_url: str,
+    sender: HttpSender | None = None,
+) -> list[DeliveryResult]:
+    """Send several events in one request and map per-item results back to events.
+
+    The batch carries one X-Trace-Id; item `i` is traced as `<trace_id>.<i>`.
+    """
+    trace_id = next_trace_id()
+    headers = {**REQUEST_HEADERS, TRACE_HEADER: trace_id}
     try:
-        intent = build_request_intent(event, api_url)
+        payload_json = [event_payload_json(event) for event in events]
+
+        if sender is not None:
+            response = sender.post(batch_url, payload_json, headers)
+        else:
+            with httpx.Client(timeout=DEFAULT_TIMEOUT) as client:
+                response = client.post(batch_url, json=payload_json, headers=headers)
+
+        if response.status_code != 200:
+            raise ValueError(f"api returned {response.status_code}: {response.text}")
+
+        results = response.json().get("results", [])
+        if len(results) != len(events):
+            raise ValueError(f"expected {len(events)} batch results, got {len(results)}")
     except Exception as exc:
-        return OutboundRequestIntent(
-            method="POST",
-            url="http://invalid.local",
-            headers={"Content-Type": "application/json"},
-            payload=MidiEventPayload(
-                event_type=event.event_type,
-                channel=event.channel,
-                key=event.key,
-                value=event.value,
-                state=event.state,
-                timestamp=event.timestamp,
+        logger.error("outbound_batch_failure trace_id=%s size=%s reason=%s", trace_id, len(events), exc)
+        return [
+            DeliveryResult(event, batch_url, str(exc), f"{trace_id}.{index}") for index, event in enumerate(events)
+        ]
+
+    processed: list[DeliveryResult] = []
+    for index, (event, result) in enumerate(zip(events, results)):
+        item_trace_id = f"{trace_id}.{index}"
+        if result.get("status") == "ok":
+            processed.append(DeliveryResult(event, batch_url, None, item_trace_id))
+            continue
+        reason = str(result.get("message", "rejected"))
+        logger.error("outbound_intent_failure trace_id=%s event=%s reason=%s", item_trace_id, event, reason)
+        processed.append(DeliveryResult(event, batch_url, reason, item_trace_id))
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "outbound_batch_sent %s",
+            json.dumps(
+                {
+                    "method": "POST",
+                    "url": batch_url,
+                    "size": len(events),
+                    "failed": sum(1 for result in processed if result.failure_reason),
+                    "status_code": 200,
+                    "trace_id": trace_id,
+                }
             ),
-            simulated_sent=False,
-            failure_reason=str(exc),
         )
-    return process_intent(intent)
+    return processed
@@ -1,4 +1,9 @@
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
+from datetime import datetime, timezone
+
+import pytest
+
+from blink_midi.models import MidiEvent, MidiInputEvent
 
 
 class FakeSource:
@@ -7,3 +12,34 @@ class FakeSource:
 
     def __iter__(self):
         return iter(self.events)
+
+
+
+def build_event(
+    channel: int = 0,
+    key: int = 7,
+    value: int = 10,
+    event_type: str = "control_change",
+    state: str | None = None,
+) -> MidiEvent:
+    timestamp = datetime.now(timezone.utc)
+    return MidiEvent(event_type, channel, key, value, state, timestamp, "demo-device")  # type: ignore[arg-type]
+
+
+
+@pytest.fixture
+def make_event() -> Callable[..., MidiEvent]:
+    """Factory for control_change events, as used by the queue, pipeline and delivery tests."""
+    return build_event
+
+
+
+@pytest.fixture
+def make_input_event() -> Callable[[], MidiInputEvent]:
+    """Factory for a validated note_on event (channel 0, key 60, value 100) for the sender tests."""
+
+    def build() -> MidiInputEvent:
+        event = build_event(key=60, value=100, event_type="note_on", state="on")
+        return MidiInputEvent(**{field: getattr(event, field) for field in MidiInputEvent.model_fields})
+
+    return build
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from unittest.mock import MagicMock
 
+import mido
 from typer.testing import CliRunner
 
 from blink_midi.cli import app
+from blink_midi.recording import MidiRecorder
 
 
 
@@ -18,7 +20,7 @@ def test_demo_once_produces_session_summary(monkeypatch) -> None:
     client.__exit__.return_value = None
     client.post.return_value = response
 
-    monkeypatch.setattr("blink_midi.sender.httpx.Client", lambda timeout: client)
+    monkeypatch.setattr("blink_midi.sender.httpx.Client", lambda **kwargs: client)
 
     runner = CliRunner()
     result = runner.invoke(
@@ -35,3 +37,87 @@ def test_demo_once_produces_session_summary(monkeypatch) -> None:
     assert result.exit_code == 0
     assert "processed=1" in result.stdout
     assert "failures=0" in result.stdout
+
+
+
+def test_replay_feeds_recorded_session_through_run(monkeypatch, tmp_path) -> None:
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"status": "ok"}
+
+    client = MagicMock()
+    client.__enter__.return_value = client
+    client.__exit__.return_value = None
+    client.post.return_value = response
+
+    monkeypatch.setattr("blink_midi.sender.httpx.Client", lambda **kwargs: client)
+
+    recording = tmp_path / "session.bmid"
+    with MidiRecorder(recording) as recorder:
+        recorder.write(0, mido.Message("note_on", note=60, velocity=100, channel=0))
+        recorder.write(1_000_000, mido.Message("control_change", control=7, value=64, channel=1))
+        recorder.write(2_000_000, mido.Message("program_change", program=3, channel=1))
+
+    runner = CliRunner()
+    result = runner.invoke(
+        app,
+        ["run", "--replay", str(recording), "--replay-speed", "0", "--api-url", "http://127.0.0.1:8000/midi/events"],
+    )
+    assert result.exit_code == 0
+    assert "processed=2" in result.stdout
+    assert "ignored=1" in result.stdout
+    assert "replay events=3" in result.stdout
+
+
+
+def test_replay_rejects_a_device(tmp_path) -> None:
+    recording = tmp_path / "session.bmid"
+    with MidiRecorder(recording):
+        pass
+
+    runner = CliRunner()
+    result = runner.invoke(app, ["run", "--replay", str(recording), "--device", "pad"])
+    assert result.exit_code == 2
+    assert "cannot be combined with --replay" in result.output
+
+
+
+def test_multiple_devices_share_one_sender_with_per_device_counters(monkeypatch) -> None:
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"status": "ok"}
+
+    client = MagicMock()
+    client.__enter__.return_value = client
+    client.__exit__.return_value = None
+    client.post.return_value = response
+    clients = []
+
+    def make_client(**kwargs):
+        clients.append(client)
+        return client
+
+    class FakePort:
+        def close(self) -> None:
+            return None
+
+    def fake_open_input(name: str, callback=None) -> FakePort:
+        callback(mido.Message("note_on", note=60, velocity=100, channel=0))
+        if name == "keys":
+            callback(mido.Message("program_change", program=1, channel=0))
+        return FakePort()
+
+    monkeypatch.setattr("blink_midi.sender.httpx.Client", make_client)
+    monkeypatch.setattr("blink_midi.midi_listener.mido.open_input", fake_open_input)
+    monkeypatch.setattr("blink_midi.midi_listener.MidiListener.__iter__", lambda self: iter(list(self._messages)))
+
+    runner = CliRunner()
+    result = runner.invoke(
+        app,
+        ["run", "--device", "pad", "--device", "keys", "--api-url", "http://127.0.0.1:8000/midi/events"],
+    )
+    assert result.exit_code == 0
+    assert len(clients) == 1
+    assert "processed=2" in result.stdout
+    assert "device=pad received=1 processed=1 ignored=0" in result.stdout
+    assert "device=keys received=2 processed=1 ignored=1" in result.stdout
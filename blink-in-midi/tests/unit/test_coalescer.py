@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from blink_midi.coalescer import CoalescingQueue
+
+
+
+def test_keeps_only_latest_value_per_slot(make_event) -> None:
+    queue = CoalescingQueue(8)
+    assert queue.put(make_event(channel=0, value=1)) == "queued"
+    assert queue.put(make_event(channel=1, value=1)) == "queued"
+    assert queue.put(make_event(channel=0, value=99)) == "coalesced"
+    queue.close()
+
+    first = queue.get()
+    second = queue.get()
+    assert first is not None and (first.channel, first.value) == (0, 99)
+    assert second is not None and (second.channel, second.value) == (1, 1)
+
+
+
+def test_in_flight_slot_waits_for_task_done(make_event) -> None:
+    queue = CoalescingQueue(8)
+    queue.put(make_event(channel=0, value=1))
+    in_flight = queue.get()
+    assert in_flight is not None
+
+    queue.put(make_event(channel=0, value=2))
+    queue.put(make_event(channel=0, value=3))
+    queue.put(make_event(channel=1, value=5))
+
+    other = queue.get()
+    assert other is not None and other.channel == 1
+
+    queue.task_done(in_flight)
+    queue.close()
+    latest = queue.get()
+    assert latest is not None and (latest.channel, latest.value) == (0, 3)
+
+
+
+def test_drops_oldest_slot_when_full(make_event) -> None:
+    queue = CoalescingQueue(2)
+    queue.put(make_event(channel=0))
+    queue.put(make_event(channel=1))
+    assert queue.put(make_event(channel=2)) == "dropped"
+    queue.close()
+    assert [queue.get().channel, queue.get().channel] == [1, 2]  # type: ignore[union-attr]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from blink_midi.metrics import LatencyHistogram, StageMetrics, next_trace_id
+
+
+
+def test_histogram_percentiles_are_within_one_bucket() -> None:
+    histogram = LatencyHistogram()
+    for millis in range(1, 101):
+        histogram.observe_ns(millis * 1_000_000)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert 50 <= summary["p50_ms"] <= 50 * 1.05
+    assert 99 <= summary["p99_ms"] <= 100
+    assert summary["max_ms"] == 100
+
+
+
+def test_histogram_matches_the_control_api_copy() -> None:
+    from control_api import metrics as api_metrics
+
+    from blink_midi import metrics
+
+    assert (metrics.BUCKET_GROWTH, metrics.BUCKET_COUNT) == (api_metrics.BUCKET_GROWTH, api_metrics.BUCKET_COUNT)
+    bridge, api = LatencyHistogram(), api_metrics.LatencyHistogram()
+    for micros in (0, 3, 250, 9_999, 1_500_000, 10**12):
+        bridge.observe_ns(micros * 1000)
+        api.observe_ns(micros * 1000)
+    assert bridge.counts == api.counts
+    assert bridge.summary() == api.summary()
+
+
+
+def test_stage_metrics_format_only_observed_stages() -> None:
+    metrics = StageMetrics()
+    metrics.observe_delivery(received_ns=1_000_000, started_ns=2_000_000, finished_ns=5_000_000)
+
+    lines = metrics.format_lines()
+    assert [line.split()[1] for line in lines] == ["stage=queue", "stage=send", "stage=total"]
+    assert metrics.summary()["total"]["max_ms"] == 4.0
+
+
+
+def test_trace_ids_are_unique() -> None:
+    assert len({next_trace_id() for _ in range(100)}) == 100
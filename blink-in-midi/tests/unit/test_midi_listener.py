@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import mido
+
+from blink_midi.mapper import map_message
+from blink_midi.midi_listener import MidiListener
+
+
+
+def test_callback_messages_are_stamped_on_arrival() -> None:
+    listener = MidiListener("demo-device")
+    before = time.monotonic_ns()
+    listener._on_message(mido.Message("note_on", note=64, velocity=90, channel=1))
+    listener.close()
+
+    received = list(listener)
+    assert len(received) == 1
+    received_ns, message, device = received[0]
+    assert received_ns >= before
+    assert message.note == 64  # type: ignore[attr-defined]
+    assert device == "demo-device"
+
+
+
+def test_bounded_buffer_counts_overflows() -> None:
+    listener = MidiListener("demo-device", maxsize=2)
+    for note in range(5):
+        listener._on_message(mido.Message("note_on", note=note, velocity=90, channel=0))
+    listener.close()
+
+    assert [message.note for _, message, _ in listener] == [3, 4]  # type: ignore[attr-defined]
+    assert listener.overflows == 3
+
+
+
+def test_iteration_wakes_up_for_messages_from_callback_thread() -> None:
+    listener = MidiListener("demo-device")
+
+    def produce() -> None:
+        for note in range(3):
+            time.sleep(0.01)
+            listener._on_message(mido.Message("note_on", note=note, velocity=90, channel=0))
+        listener.close()
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    notes = [message.note for _, message, _ in listener]  # type: ignore[attr-defined]
+    thread.join()
+    assert notes == [0, 1, 2]
+
+
+
+def test_multiple_ports_merge_into_one_stream_tagged_by_device() -> None:
+    listener = MidiListener(["pad", "keys"])
+    listener._on_message(mido.Message("note_on", note=60, velocity=90, channel=0), device="keys")
+    listener._on_message(mido.Message("note_on", note=61, velocity=90, channel=0), device="pad")
+    listener._on_message(mido.Message("note_on", note=62, velocity=90, channel=0), device="keys")
+    listener.close()
+
+    received = list(listener)
+    assert [device for _, _, device in received] == ["keys", "pad", "keys"]
+    assert [received_ns for received_ns, _, _ in received] == sorted(received_ns for received_ns, _, _ in received)
+
+
+
+def test_open_failure_closes_already_opened_ports(monkeypatch) -> None:
+    opened = []
+
+    class FakePort:
+        def __init__(self, name: str) -> None:
+            self.name = name
+            self.closed = False
+
+        def close(self) -> None:
+            self.closed = True
+
+    def fake_open_input(name: str, callback=None) -> FakePort:
+        if name == "missing":
+            raise OSError("unknown port")
+        port = FakePort(name)
+        opened.append(port)
+        return port
+
+    monkeypatch.setattr("blink_midi.midi_listener.mido.open_input", fake_open_input)
+    listener = MidiListener(["pad", "missing"])
+    try:
+        listener.open()
+    except OSError:
+        pass
+    assert [port.closed for port in opened] == [True]
+
+
+
+def test_demo_once_yields_single_message() -> None:
+    with MidiListener("demo-device", demo_once=True) as listener:
+        assert len(list(listener)) == 1
+
+
+
+def test_mapped_event_keeps_capture_time() -> None:
+    received_ns = time.monotonic_ns() - 50_000_000
+    event = map_message(mido.Message("note_on", note=60, velocity=20, channel=0), "demo-device", received_ns)
+    assert event is not None
+    assert event.received_ns == received_ns
+    assert event.age_ms() >= 50
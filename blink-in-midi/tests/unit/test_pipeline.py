@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from blink_midi.models import BridgeSession, DeliveryResult, MidiEvent
+from blink_midi.pipeline import EventPipeline, EventQueue
+
+
+
+def drain(queue: EventQueue) -> list[MidiEvent]:
+    queue.close()
+    items = []
+    while (event := queue.get()) is not None:
+        items.append(event)
+    return items
+
+
+
+def test_drop_oldest_evicts_head_of_queue(make_event) -> None:
+    queue = EventQueue(2, "drop-oldest")
+    assert queue.put(make_event(channel=0)) == "queued"
+    assert queue.put(make_event(channel=1)) == "queued"
+    assert queue.put(make_event(channel=2)) == "dropped"
+    assert [event.channel for event in drain(queue)] == [1, 2]
+
+
+
+def test_pipeline_updates_session_counters(monkeypatch, make_event) -> None:
+    def fake_process_event(event: MidiEvent, api_url: str, sender: object) -> DeliveryResult:
+        return DeliveryResult(event, api_url, "boom" if event.value % 2 else None)
+
+    monkeypatch.setattr("blink_midi.pipeline.process_event", fake_process_event)
+
+    session = BridgeSession(selected_device="demo-device", api_url="http://127.0.0.1:8000/midi/events")
+    with EventPipeline(session, session.api_url, MagicMock(), workers=3, queue_size=4) as pipeline:
+        for value in range(10):
+            pipeline.submit(make_event(channel=value % 4, value=value))
+
+    assert session.processed_events == 5
+    assert session.intent_failures == 5
+    assert session.dropped_events == 0
+
+
+
+def test_coalesce_pipeline_counts_superseded_events(monkeypatch, make_event) -> None:
+    def fake_process_event(event: MidiEvent, api_url: str, sender: object) -> DeliveryResult:
+        return DeliveryResult(event, api_url)
+
+    monkeypatch.setattr("blink_midi.pipeline.process_event", fake_process_event)
+
+    session = BridgeSession(selected_device="demo-device", api_url="http://127.0.0.1:8000/midi/events")
+    pipeline = EventPipeline(session, session.api_url, MagicMock(), workers=1, queue_size=8, policy="coalesce")
+    for value in range(20):
+        pipeline.submit(make_event(channel=0, value=value))
+    pipeline.start()
+    pipeline.close()
+
+    assert session.coalesced_events == 19
+    assert session.processed_events == 1
+
+
+
+def test_batching_pipeline_groups_events_within_window(monkeypatch, make_event) -> None:
+    batches: list[int] = []
+
+    def fake_process_batch(events: list[MidiEvent], batch_url: str, sender: object) -> list[DeliveryResult]:
+        batches.append(len(events))
+        return [DeliveryResult(event, batch_url) for event in events]
+
+    monkeypatch.setattr("blink_midi.pipeline.process_batch", fake_process_batch)
+
+    session = BridgeSession(selected_device="demo-device", api_url="http://127.0.0.1:8000/midi/events")
+    pipeline = EventPipeline(
+        session,
+        session.api_url,
+        MagicMock(),
+        workers=1,
+        queue_size=16,
+        batch_url="http://127.0.0.1:8000/midi/events:batch",
+        batch_window=0.05,
+        batch_size=4,
+    )
+    for channel in range(10):
+        pipeline.submit(make_event(channel=channel))
+    pipeline.start()
+    pipeline.close()
+
+    assert batches == [4, 4, 2]
+    assert session.processed_events == 10
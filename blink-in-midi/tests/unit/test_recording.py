@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import time
+
+import mido
+
+from blink_midi.recording import MidiRecorder, ReplaySource, read_recording
+
+
+
+def write_recording(path, offsets_ms: list[int]) -> None:
+    with MidiRecorder(path) as recorder:
+        base_ns = 5_000_000_000
+        for index, offset_ms in enumerate(offsets_ms):
+            message = mido.Message("note_on", note=60 + index, velocity=100, channel=index % 16)
+            recorder.write(base_ns + offset_ms * 1_000_000, message)
+
+
+
+def test_recording_round_trips_offsets_and_messages(tmp_path) -> None:
+    path = tmp_path / "session.bmid"
+    write_recording(path, [0, 10, 25])
+
+    records = list(read_recording(path))
+    assert [offset_ns for offset_ns, _ in records] == [0, 10_000_000, 25_000_000]
+    assert [message.note for _, message in records] == [60, 61, 62]  # type: ignore[attr-defined]
+    assert records[2][1].channel == 2  # type: ignore[attr-defined]
+
+
+
+def test_truncated_final_record_is_ignored(tmp_path) -> None:
+    path = tmp_path / "session.bmid"
+    write_recording(path, [0, 10])
+    path.write_bytes(path.read_bytes()[:-2])
+
+    assert len(list(read_recording(path))) == 1
+
+
+
+def test_records_reach_the_file_before_close(tmp_path) -> None:
+    path = tmp_path / "session.bmid"
+    with MidiRecorder(path) as recorder:
+        recorder.write(5_000_000_000, mido.Message("note_on", note=60, velocity=100))
+        recorder.write(5_010_000_000, mido.Message("note_off", note=60))
+
+        assert [offset_ns for offset_ns, _ in read_recording(path)] == [0, 10_000_000]
+
+
+
+def test_replay_at_max_speed_yields_everything_immediately(tmp_path) -> None:
+    path = tmp_path / "session.bmid"
+    write_recording(path, [0, 500, 1000])
+
+    started = time.monotonic()
+    source = ReplaySource(path, speed=0)
+    received = [received_ns for received_ns, _, _ in source]
+    assert time.monotonic() - started < 0.2
+    assert source.replayed == 3
+    assert received == sorted(received)
+
+
+
+def test_replay_keeps_recorded_spacing_scaled_by_speed(tmp_path) -> None:
+    path = tmp_path / "session.bmid"
+    write_recording(path, [0, 100, 200])
+
+    received = [received_ns for received_ns, _, _ in ReplaySource(path, speed=2.0)]
+    gaps_ms = [(later - earlier) / 1e6 for earlier, later in zip(received, received[1:])]
+    assert gaps_ms == [50.0, 50.0]
+
+
+
+def test_replay_reads_standard_midi_files(tmp_path) -> None:
+    path = tmp_path / "song.mid"
+    midi = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    track.append(mido.Message("note_on", note=60, velocity=90, time=0))
+    track.append(mido.Message("note_on", note=62, velocity=90, time=480))
+    midi.tracks.append(track)
+    midi.save(path)
+
+    records = list(read_recording(path))
+    assert [message.note for _, message in records] == [60, 62]  # type: ignore[attr-defined]
+    # 480 ticks at the default 120 bpm is half a second.
+    assert records[1][0] == 500_000_000
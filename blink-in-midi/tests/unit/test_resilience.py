@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from blink_midi.models import DeliveryResult, MidiEvent
+from blink_midi.resilience import CircuitBreaker, ResilientDelivery, RetryPolicy
+from blink_midi.sender import ApiStatusError, is_retryable
+
+
+
+class FlakyApi:
+    """Stands in for process_event: fails with a transport error while `down`."""
+
+    def __init__(self) -> None:
+        self.down = True
+        self.calls: list[MidiEvent] = []
+        self.delivered: list[int] = []
+
+    def __call__(self, event: MidiEvent, api_url: str, sender: object) -> DeliveryResult:
+        self.calls.append(event)
+        if self.down:
+            return DeliveryResult(event, api_url, "connection refused", None, True)
+        self.delivered.append(event.value)
+        return DeliveryResult(event, api_url)
+
+
+
+def wait_until(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+
+def test_only_transport_errors_and_server_errors_are_retryable() -> None:
+    assert is_retryable(ConnectionError("refused"))
+    assert is_retryable(ApiStatusError(503, "unavailable"))
+    assert not is_retryable(ApiStatusError(400, "channel out of range"))
+    assert not is_retryable(ValueError("stream rejected event"))
+
+
+
+def test_breaker_opens_after_threshold_and_doubles_backoff_on_failed_probe() -> None:
+    breaker = CircuitBreaker(threshold=2, backoff=0.1, backoff_max=0.3)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opened == 1
+    assert 0 < breaker.probe_delay() <= 0.1
+
+    for expected in (0.2, 0.3, 0.3):
+        breaker.state = "half-open"
+        breaker.record_failure()
+        assert breaker.backoff == expected
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.backoff == 0.1
+
+
+
+def test_open_breaker_buffers_latest_value_per_slot_without_sending(monkeypatch, make_event) -> None:
+    api = FlakyApi()
+    monkeypatch.setattr("blink_midi.resilience.process_event", api)
+    results: list[DeliveryResult] = []
+    delivery = ResilientDelivery("http://api", object(), results.append, RetryPolicy(1, 2, 10.0, 10.0))
+
+    assert delivery.deliver(make_event(value=1)) is None
+    assert delivery.breaker.state == "open"
+    sent = len(api.calls)
+    for value in range(2, 6):
+        delivery.deliver(make_event(value=value))
+    delivery.deliver(make_event(channel=1))
+    delivery.deliver(make_event(channel=2))
+
+    assert len(api.calls) == sent
+    counters = delivery.counters()
+    assert counters["pending"] == 2
+    assert counters["superseded"] == 4
+    assert counters["evicted"] == 1
+
+
+
+def test_recovery_flushes_buffer_and_reports_results(monkeypatch, make_event) -> None:
+    api = FlakyApi()
+    monkeypatch.setattr("blink_midi.resilience.process_event", api)
+    results: list[DeliveryResult] = []
+    lock = threading.Lock()
+
+    def record(result: DeliveryResult) -> None:
+        with lock:
+            results.append(result)
+
+    with ResilientDelivery("http://api", object(), record, RetryPolicy(1, 16, 0.02, 0.05)) as delivery:
+        delivery.deliver(make_event(channel=0, value=1))
+        delivery.deliver(make_event(channel=0, value=2))
+        delivery.deliver(make_event(channel=1, value=3))
+        assert wait_until(lambda: delivery.counters()["retried"] >= 2)
+        api.down = False
+        assert wait_until(lambda: len(results) == 2)
+        assert delivery.breaker.state == "closed"
+        live = delivery.deliver(make_event(channel=2, value=4))
+
+    assert sorted(api.delivered) == [2, 3, 4]
+    assert live is not None and live.failure_reason is None
+    assert all(result.failure_reason is None for result in results)
+    assert delivery.abandoned == 0
+
+
+
+def test_rejections_are_returned_and_never_retried(monkeypatch, make_event) -> None:
+    calls: list[MidiEvent] = []
+
+    def rejecting(event: MidiEvent, api_url: str, sender: object) -> DeliveryResult:
+        calls.append(event)
+        return DeliveryResult(event, api_url, "api returned 400: bad channel")
+
+    monkeypatch.setattr("blink_midi.resilience.process_event", rejecting)
+    with ResilientDelivery("http://api", object(), lambda result: None, RetryPolicy(1, 4, 0.01, 0.01)) as delivery:
+        result = delivery.deliver(make_event())
+        time.sleep(0.05)
+
+    assert result is not None and result.failure_reason is not None
+    assert len(calls) == 1
+    assert delivery.breaker.state == "closed"
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+
+import mido
+import pytest
+
+from blink_midi.config import load_config
+from blink_midi.mapper import map_message
+from blink_midi.routing import RoutingRule, compile_rules, load_routing_table
+
+
+
+def test_unmatched_channels_and_notes_are_dropped() -> None:
+    table = compile_rules([RoutingRule(channels=list(range(12)), notes=(0, 17))])
+
+    assert table.route("note_on", 0, 17, 100) is not None
+    assert table.route("note_on", 0, 18, 100) is None
+    assert table.route("note_on", 12, 5, 100) is None
+    assert table.route("control_change", 0, 5, 100) is None
+
+
+
+def test_min_value_and_remap_apply_to_matching_slots() -> None:
+    table = compile_rules(
+        [
+            RoutingRule(channels=[9], notes=(36, 53), min_value=20, to_channel=10, transpose=-36),
+            RoutingRule(channels=[0], controls=[7]),
+        ]
+    )
+
+    assert table.route("note_on", 9, 36, 19) is None
+    route = table.route("note_on", 9, 40, 64)
+    assert route is not None
+    assert (route.channel, route.key) == (10, 4)
+    assert table.route("control_change", 0, 7, 0) is not None
+
+
+
+def test_first_rule_covering_a_slot_wins() -> None:
+    table = compile_rules(
+        [
+            RoutingRule(channels=[0], notes=(0, 3), to_channel=5),
+            RoutingRule(channels=[0], notes=(0, 17), to_channel=6),
+        ]
+    )
+    assert table.route("note_on", 0, 2, 64).channel == 5  # type: ignore[union-attr]
+    assert table.route("note_on", 0, 10, 64).channel == 6  # type: ignore[union-attr]
+
+
+
+def test_transpose_outside_midi_range_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        compile_rules([RoutingRule(channels=[0], notes=(120, 127), transpose=10)])
+
+
+
+def test_mapper_uses_routed_channel_and_key() -> None:
+    table = compile_rules([RoutingRule(channels=[9], notes=(36, 53), to_channel=10, transpose=-36)])
+
+    event = map_message(mido.Message("note_on", note=38, velocity=90, channel=9), "pad", routing=table)
+    assert event is not None
+    assert (event.channel, event.key) == (10, 2)
+    assert map_message(mido.Message("note_on", note=60, velocity=90, channel=9), "pad", routing=table) is None
+
+
+
+def test_load_config_compiles_rules_file(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps({"rules": [{"channels": [0, 1], "notes": [0, 17]}]}))
+    monkeypatch.setenv("ROUTING_RULES_FILE", str(path))
+
+    cfg = load_config()
+    assert cfg.routing is not None
+    assert cfg.routing.route("note_on", 1, 17, 1) is not None
+    assert load_routing_table(path).route("note_on", 2, 0, 1) is None
+
+
+
+def test_invalid_rules_file_raises_value_error(tmp_path) -> None:
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps({"rules": [{"channels": [16], "notes": [0, 17]}]}))
+    with pytest.raises(ValueError):
+        load_routing_table(path)
+    with pytest.raises(ValueError):
+        load_routing_table(tmp_path / "missing.json")
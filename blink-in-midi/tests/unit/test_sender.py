@@ -1,28 +1,32 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import json
 from unittest.mock import MagicMock
 
-from blink_midi.models import MidiInputEvent
-from blink_midi.sender import build_request_intent, process_intent
+import pytest
 
+import httpx
+import mido
 
+from blink_midi.mapper import map_message
+from blink_midi.models import REQUIRED_PAYLOAD_FIELDS, MidiEventPayload
+from blink_midi.sender import (
+    HttpSender,
+    MqttSender,
+    WebSocketSender,
+    build_request_intent,
+    encode_event_payload,
+    encoded_payload_prefix,
+    event_payload_json,
+    process_batch,
+    process_event,
+    process_intent,
+)
 
-def make_event() -> MidiInputEvent:
-    return MidiInputEvent(
-        event_type="note_on",
-        channel=0,
-        key=60,
-        value=100,
-        state="on",
-        timestamp=datetime.now(timezone.utc),
-        source_device="demo-device",
-    )
 
 
-
-def test_build_request_intent_has_expected_shape() -> None:
-    intent = build_request_intent(make_event(), "http://127.0.0.1:8000/midi/events")
+def test_build_request_intent_has_expected_shape(make_input_event) -> None:
+    intent = build_request_intent(make_input_event(), "http://127.0.0.1:8000/midi/events")
     assert intent.method == "POST"
     assert intent.url == "http://127.0.0.1:8000/midi/events"
     assert intent.payload.event_type == "note_on"
@@ -33,7 +37,55 @@ def test_build_request_intent_has_expected_shape() -> None:
 
 
 
-def test_process_intent_logs_and_returns_success(monkeypatch) -> None:
+def test_fast_path_payload_matches_contract_model() -> None:
+    event = map_message(mido.Message("note_on", note=64, velocity=112, channel=2), "demo-device")
+    assert event is not None
+    payload = event_payload_json(event)
+    assert list(payload) == REQUIRED_PAYLOAD_FIELDS
+
+    validated = MidiEventPayload.model_validate(payload)
+    assert validated.model_dump(exclude={"timestamp"}) == {
+        "event_type": "note_on",
+        "channel": 2,
+        "key": 64,
+        "value": 112,
+        "state": "on",
+    }
+    assert validated.timestamp == event.timestamp
+
+
+
+def test_encoded_payload_matches_json_payload_and_is_memoized(make_input_event) -> None:
+    encoded_payload_prefix.cache_clear()
+    first = make_input_event()
+    second = make_input_event()
+
+    assert json.loads(encode_event_payload(first)) == event_payload_json(first)
+    encode_event_payload(second)
+    assert encoded_payload_prefix.cache_info().hits == 1
+
+
+
+def test_http_sender_posts_pre_encoded_body(make_input_event) -> None:
+    bodies: list[bytes] = []
+    trace_ids: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(request.content)
+        trace_ids.append(request.headers.get("X-Trace-Id"))
+        return httpx.Response(200, json={"status": "ok"})
+
+    event = make_input_event()
+    with HttpSender(transport=httpx.MockTransport(handler)) as sender:
+        result = process_event(event, "http://127.0.0.1:8000/midi/events", sender)
+
+    assert result.failure_reason is None
+    assert bodies == [encode_event_payload(event)]
+    assert trace_ids == [result.trace_id]
+
+
+
+def test_process_intent_logs_and_returns_success(monkeypatch, make_input_event) -> None:
     response = MagicMock()
     response.status_code = 200
     response.json.return_value = {"status": "ok"}
@@ -45,16 +97,157 @@ def test_process_intent_logs_and_returns_success(monkeypatch) -> None:
 
     monkeypatch.setattr("blink_midi.sender.httpx.Client", lambda timeout: client)
 
-    intent = build_request_intent(make_event(), "http://127.0.0.1:8000/midi/events")
+    intent = build_request_intent(make_input_event(), "http://127.0.0.1:8000/midi/events")
     result = process_intent(intent)
     assert result.failure_reason is None
     assert result.simulated_sent is True
 
 
 
-def test_process_intent_marks_failure_on_error() -> None:
-    intent = build_request_intent(make_event(), "http://127.0.0.1:8000/midi/events")
+def test_process_intent_marks_failure_on_error(make_input_event) -> None:
+    intent = build_request_intent(make_input_event(), "http://127.0.0.1:8000/midi/events")
     broken = intent.model_copy(update={"payload": None})  # type: ignore[arg-type]
     result = process_intent(broken)
     assert result.simulated_sent is False
     assert result.failure_reason is not None
+
+
+
+def test_http_sender_reuses_one_client_across_events(monkeypatch, make_input_event) -> None:
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"status": "ok"}
+
+    created: list[MagicMock] = []
+
+    def make_client(**kwargs: object) -> MagicMock:
+        client = MagicMock()
+        client.post.return_value = response
+        created.append(client)
+        return client
+
+    monkeypatch.setattr("blink_midi.sender.httpx.Client", make_client)
+
+    with HttpSender(timeout=1.0, pool_size=2) as sender:
+        for _ in range(3):
+            result = process_event(make_input_event(), "http://127.0.0.1:8000/midi/events", sender)
+            assert result.failure_reason is None
+
+    assert len(created) == 1
+    assert created[0].post.call_count == 3
+    created[0].close.assert_called_once()
+
+
+
+def test_process_batch_reports_per_item_failures(make_input_event) -> None:
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        "status": "ok",
+        "results": [
+            {"index": 0, "status": "ok"},
+            {"index": 1, "status": "error", "message": "Channel is outside mapped range 0..11"},
+        ],
+    }
+    sender = MagicMock()
+    sender.post.return_value = response
+
+    intents = process_batch([make_input_event(), make_input_event()], "http://127.0.0.1:8000/midi/events:batch", sender)
+
+    assert sender.post.call_count == 1
+    assert len(sender.post.call_args.args[1]) == 2
+    assert intents[0].failure_reason is None
+    assert intents[1].failure_reason == "Channel is outside mapped range 0..11"
+
+
+
+def test_process_batch_fails_every_item_on_transport_error(make_input_event) -> None:
+    sender = MagicMock()
+    sender.post.side_effect = RuntimeError("connection refused")
+
+    intents = process_batch([make_input_event(), make_input_event()], "http://127.0.0.1:8000/midi/events:batch", sender)
+
+    assert [intent.failure_reason for intent in intents] == ["connection refused", "connection refused"]
+
+
+
+def test_websocket_sender_streams_binary_frames_and_checks_acks(monkeypatch, make_input_event) -> None:
+    pytest.importorskip("websockets")
+    connection = MagicMock()
+    connection.recv.side_effect = ['{"status": "ok"}', '{"status": "error", "message": "unmapped"}']
+    connect = MagicMock(return_value=connection)
+    monkeypatch.setattr("websockets.sync.client.connect", connect)
+
+    with WebSocketSender("ws://127.0.0.1:8000/midi/stream", ack=True) as sender:
+        connect.assert_not_called()
+        ok = process_event(make_input_event(), "ws://127.0.0.1:8000/midi/stream", sender)
+        rejected = process_event(make_input_event(), "ws://127.0.0.1:8000/midi/stream", sender)
+
+    assert connect.call_count == 1
+    assert connect.call_args.args[0] == "ws://127.0.0.1:8000/midi/stream?ack=true"
+    assert connection.send.call_args_list[0].args[0] == bytes((0, 0, 60, 100))
+    assert ok.failure_reason is None
+    assert rejected.failure_reason is not None and "unmapped" in rejected.failure_reason
+    connection.close.assert_called_once()
+
+
+
+def test_websocket_sender_reopens_a_closed_stream(monkeypatch, make_input_event) -> None:
+    pytest.importorskip("websockets")
+    from websockets.exceptions import ConnectionClosed
+
+    dropped = MagicMock()
+    dropped.send.side_effect = ConnectionClosed(None, None)
+    reopened = MagicMock()
+    connect = MagicMock(side_effect=[dropped, reopened, OSError("connection refused"), reopened])
+    monkeypatch.setattr("websockets.sync.client.connect", connect)
+
+    with WebSocketSender("ws://127.0.0.1:8000/midi/stream") as sender:
+        first = process_event(make_input_event(), sender.url, sender)
+        reopened.send.side_effect = ConnectionClosed(None, None)
+        down = process_event(make_input_event(), sender.url, sender)
+        reopened.send.side_effect = None
+        recovered = process_event(make_input_event(), sender.url, sender)
+
+    assert first.failure_reason is None
+    assert down.failure_reason is not None and down.retryable
+    assert recovered.failure_reason is None
+    # The first open is lazy, not a reconnect; the refused attempt is not counted.
+    assert connect.call_count == 4
+    assert sender.reconnects == 2
+    assert reopened.send.call_count == 3
+
+
+
+def test_websocket_sender_never_used_opens_no_socket(monkeypatch) -> None:
+    pytest.importorskip("websockets")
+    connect = MagicMock()
+    monkeypatch.setattr("websockets.sync.client.connect", connect)
+
+    with WebSocketSender("ws://127.0.0.1:8000/midi/stream") as sender:
+        assert sender.connection is None
+
+    connect.assert_not_called()
+    assert sender.reconnects == 0
+
+
+
+def test_mqtt_sender_publishes_control_api_topic_and_brightness(monkeypatch, make_input_event) -> None:
+    pytest.importorskip("paho.mqtt.client")
+    client = MagicMock()
+    client.publish.return_value = MagicMock(rc=0)
+    monkeypatch.setattr("paho.mqtt.client.Client", MagicMock(return_value=client))
+
+    with MqttSender("127.0.0.1", bulb_ids="bulb_a,bulb_b") as sender:
+        ok = process_event(make_input_event(), sender.url, sender)
+        note = map_message(mido.Message("note_on", note=17, velocity=90, channel=1), "demo-device")
+        assert note is not None
+        top = process_event(note, sender.url, sender)
+        unmapped = process_event(note._replace(channel=9), sender.url, sender)
+
+    assert ok.failure_reason is not None and "0..17" in ok.failure_reason
+    assert top.failure_reason is None
+    assert client.publish.call_args.args == ("zigbee2mqtt/bulb_b/set", b'{"brightness":254}')
+    assert unmapped.failure_reason is not None and "not mapped" in unmapped.failure_reason
+    client.loop_start.assert_called_once()
+    client.disconnect.assert_called_once()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_POLL_SECONDS = 2.0
+
+
+class DeviceIndex(NamedTuple):
+    devices: List[Dict[str, Any]]
+    by_id: Dict[str, Dict[str, Any]]
+    by_name: Dict[str, Dict[str, Any]]
+
+
+def raw_device_id(raw: Dict[str, Any]) -> str:
+    return raw.get("ieee_address") or raw.get("friendly_name") or raw.get("device_id") or "unknown"
+
+
+def build_index(raw_devices: Any) -> DeviceIndex:
+    devices = [raw for raw in raw_devices if isinstance(raw, dict)] if isinstance(raw_devices, list) else []
+    by_id: Dict[str, Dict[str, Any]] = {}
+    by_name: Dict[str, Dict[str, Any]] = {}
+    for raw in devices:
+        by_id.setdefault(raw_device_id(raw), raw)
+        name = raw.get("friendly_name") or raw.get("name")
+        if name:
+            by_name.setdefault(name, raw)
+    return DeviceIndex(devices, by_id, by_name)
+
+
+class DeviceRegistry:
+    """In-memory copy of the Zigbee2MQTT device list, indexed by ID and friendly name.
+
+    Lookups never touch the disk. The index is rebuilt off the request path
+    when devices.json changes (mtime/size poll) or when Zigbee2MQTT publishes
+    `zigbee2mqtt/bridge/devices`, and swapped in with a single assignment.
+    """
+
+    def __init__(self, devices_file: Path, poll_seconds: float = DEFAULT_POLL_SECONDS) -> None:
+        self.devices_file = devices_file
+        self.poll_seconds = poll_seconds
+        self._index = build_index([])
+        self._file_signature: Optional[Tuple[int, int]] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.devices_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh_from_file(self, force: bool = False) -> bool:
+        """Reload devices.json if it changed since the last load. Returns True on reload."""
+        with self._reload_lock:
+            signature = self._stat_signature()
+            if not force and signature == self._file_signature:
+                return False
+            raw_devices: Any = []
+            if signature is not None:
+                try:
+                    raw_devices = json.loads(self.devices_file.read_text())
+                except (OSError, json.JSONDecodeError):
+                    # Zigbee2MQTT may be mid-write; keep the old index and retry next poll.
+                    return False
+            self._file_signature = signature
+            self._index = build_index(raw_devices)
+        logger.info("device_registry source=file devices=%s", len(self._index.devices))
+        return True
+
+    def load_bridge_devices(self, raw_devices: Any) -> None:
+        """Replace the index with the payload of `zigbee2mqtt/bridge/devices`."""
+        if not isinstance(raw_devices, list):
+            return
+        self._index = build_index(raw_devices)
+        logger.info("device_registry source=mqtt devices=%s", len(self._index.devices))
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._index.devices
+
+    def get(self, device_id: str) -> Optional[Dict[str, Any]]:
+        index = self._index
+        return index.by_id.get(device_id) or index.by_name.get(device_id)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            self.refresh_from_file()
+
+    def start(self) -> None:
+        self.refresh_from_file(force=True)
+        if self._thread is None and self.poll_seconds > 0:
+            self._thread = threading.Thread(target=self._watch, name="device-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
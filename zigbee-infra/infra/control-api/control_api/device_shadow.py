@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Keys Zigbee2MQTT publishes on the device topic that are not device state.
+NON_STATE_KEYS = frozenset({"availability", "last_seen", "linkquality", "update", "update_available"})
+# Command options that describe how to get to a state rather than the state itself.
+COMMAND_OPTION_KEYS = frozenset({"transition"})
+
+
+def desired_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields a command actually sets; `None` means "leave unchanged"."""
+    return {
+        key: value
+        for key, value in payload.items()
+        if value is not None and key not in COMMAND_OPTION_KEYS
+    }
+
+
+class DeviceShadow:
+    """Last known state per device, fed by Zigbee2MQTT reports and our own commands.
+
+    Reports from `zigbee2mqtt/<device>` overwrite the fields they carry. Commands
+    we publish are applied optimistically, so a read straight after a write
+    sees the requested state before the bulb reports back. The reported state
+    is kept apart from that view: a publish that fails or is never acked
+    leaves only the view wrong, and `matches` still sends the retry. Each
+    device's state is replaced rather than mutated, so readers can use a
+    returned dict without holding the lock.
+    """
+
+    def __init__(self) -> None:
+        # Reported state with our commands applied on top; what reads see.
+        self._states: Dict[str, Dict[str, Any]] = {}
+        # Only what Zigbee2MQTT reported.
+        self._reported: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def _merge(self, device_id: str, fields: Dict[str, Any], reported: bool = False) -> None:
+        if not fields:
+            return
+        with self._lock:
+            self._states[device_id] = {**self._states.get(device_id, {}), **fields}
+            if reported:
+                self._reported[device_id] = {**self._reported.get(device_id, {}), **fields}
+
+    def apply_reported(self, device_id: str, data: Dict[str, Any]) -> None:
+        fields = {key: value for key, value in data.items() if key not in NON_STATE_KEYS}
+        self._merge(device_id, fields, reported=True)
+
+    def apply_desired(self, device_ids: Iterable[str], payload: Dict[str, Any]) -> None:
+        fields = desired_fields(payload)
+        for device_id in device_ids:
+            self._merge(device_id, fields)
+
+    def get(self, device_id: str) -> Dict[str, Any]:
+        return self._states.get(device_id, {})
+
+    def matches(self, device_id: str, payload: Dict[str, Any]) -> bool:
+        """True when the device reported every field the command sets and no other command is pending.
+
+        Both the reported state and the optimistic view must agree: the
+        reported state alone would skip a command that undoes one still in
+        flight, the view alone would skip the retry of a lost command.
+        """
+        reported = self._reported.get(device_id)
+        current = self._states.get(device_id)
+        if reported is None or current is None:
+            return False
+        fields = desired_fields(payload)
+        return all(reported.get(key) == value and current.get(key) == value for key, value in fields.items())
+
+    def record_skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def load_state_file(self, state_file: Path, canonical_id: Optional[Callable[[str], str]] = None) -> None:
+        """Seed from Zigbee2MQTT's state.json ({device: {state...}}) if it exists."""
+        try:
+            raw_states = json.loads(state_file.read_text())
+        except (OSError, json.JSONDecodeError):
+            return
+        if not isinstance(raw_states, dict):
+            return
+        for device_id, data in raw_states.items():
+            if isinstance(data, dict):
+                self.apply_reported(canonical_id(device_id) if canonical_id else device_id, data)
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return {"devices": len(self._states), "skipped_publishes": self.skipped}
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from control_api.publish_scheduler import PendingPublish, SendFn, merge_pending
+
+DEFAULT_WINDOW_MS = 5.0
+TOPIC_PREFIX = "zigbee2mqtt/"
+TOPIC_SUFFIX = "/set"
+
+
+def command_target(topic: str) -> Optional[str]:
+    if topic.startswith(TOPIC_PREFIX) and topic.endswith(TOPIC_SUFFIX):
+        return topic[len(TOPIC_PREFIX) : -len(TOPIC_SUFFIX)]
+    return None
+
+
+def bridge_groups_to_members(raw_groups: Any) -> Dict[str, List[str]]:
+    """Convert a `zigbee2mqtt/bridge/groups` payload to group name -> member IEEE addresses."""
+    groups: Dict[str, List[str]] = {}
+    if not isinstance(raw_groups, list):
+        return groups
+    for raw in raw_groups:
+        if not isinstance(raw, dict) or not raw.get("friendly_name"):
+            continue
+        members = [m.get("ieee_address") for m in raw.get("members") or [] if isinstance(m, dict)]
+        groups[raw["friendly_name"]] = [member for member in members if member]
+    return groups
+
+
+class GroupFanout:
+    """Collapses same-payload device commands into Zigbee group commands.
+
+    Commands to devices that belong to a known group are held for a short
+    window. At the end of the window devices are bucketed by payload, and every
+    fold target whose members all received that exact payload is sent one
+    group command instead of one unicast per member (largest groups first).
+    Devices that are left over are published individually. Only groups from a
+    source set with `fold=True` are fold targets, since a group command only
+    works for groups Zigbee2MQTT knows; groups from every source resolve
+    members.
+    """
+
+    def __init__(
+        self,
+        publish: SendFn,
+        canonical_id: Callable[[str], str] = lambda device_id: device_id,
+        window_ms: float = DEFAULT_WINDOW_MS,
+    ) -> None:
+        self.publish = publish
+        self.canonical_id = canonical_id
+        self.window = window_ms / 1000
+        self.group_commands = 0
+        self.device_commands = 0
+        self.saved_commands = 0
+        self._sources: Dict[str, Tuple[bool, Dict[str, FrozenSet[str]]]] = {}
+        # Fold targets, largest first.
+        self._groups: List[Tuple[str, FrozenSet[str]]] = []
+        self._known: Dict[str, FrozenSet[str]] = {}
+        self._members: FrozenSet[str] = frozenset()
+        self._pending: Dict[str, Tuple[str, PendingPublish]] = {}
+        self._deadline: Optional[float] = None
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def set_groups(self, source: str, groups: Dict[str, Iterable[str]], fold: bool = True) -> None:
+        """Replace the groups known from one source (local groups.json or Zigbee2MQTT)."""
+        resolved = {
+            name: frozenset(self.canonical_id(member) for member in members)
+            for name, members in groups.items()
+        }
+        with self._condition:
+            self._sources[source] = (fold, resolved)
+            known: Dict[str, FrozenSet[str]] = {}
+            targets: Dict[str, FrozenSet[str]] = {}
+            for source_fold, source_groups in self._sources.values():
+                known.update(source_groups)
+                if source_fold:
+                    targets.update((name, members) for name, members in source_groups.items() if len(members) > 1)
+            self._known = known
+            self._groups = sorted(targets.items(), key=lambda item: len(item[1]), reverse=True)
+            self._members = frozenset().union(*targets.values()) if targets else frozenset()
+
+    def group_members(self, name: str) -> FrozenSet[str]:
+        return self._known.get(name, frozenset())
+
+    def start(self) -> None:
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mqtt-group-fanout", daemon=True)
+            self._thread.start()
+
+    def submit(self, topic: str, item: PendingPublish) -> bool:
+        """Buffer a device command; returns False when the caller should publish it directly."""
+        if not self.enabled or self._closed:
+            return False
+        target = command_target(topic)
+        if target is None:
+            return False
+        device_id = self.canonical_id(target)
+        with self._condition:
+            if device_id not in self._members:
+                return False
+            previous = self._pending.get(device_id)
+            self._pending[device_id] = (topic, merge_pending(previous[1], item) if previous else item)
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.window
+                self._condition.notify()
+        return True
+
+    def _take_window(self) -> Optional[Dict[str, Tuple[str, PendingPublish]]]:
+        with self._condition:
+            while not self._closed:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                delay = self._deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                pending, self._pending, self._deadline = self._pending, {}, None
+                return pending
+            return None
+
+    def _run(self) -> None:
+        while True:
+            pending = self._take_window()
+            if pending is None:
+                return
+            self._dispatch(pending)
+
+    def _dispatch(self, pending: Dict[str, Tuple[str, PendingPublish]]) -> None:
+        by_payload: Dict[str, Dict[str, Tuple[str, PendingPublish]]] = {}
+        for device_id, item in pending.items():
+            key = json.dumps(item[1].payload, sort_keys=True)
+            by_payload.setdefault(key, {})[device_id] = item
+
+        groups = self._groups
+        for devices in by_payload.values():
+            remaining = set(devices)
+            for name, members in groups:
+                if len(remaining) < 2:
+                    break
+                if members <= remaining:
+                    _topic, first = devices[next(iter(members))]
+                    waiters = tuple(waiter for member in members for waiter in devices[member][1].waiters)
+                    self.publish(f"{TOPIC_PREFIX}{name}{TOPIC_SUFFIX}", first._replace(waiters=waiters))
+                    remaining -= members
+                    self.group_commands += 1
+                    self.saved_commands += len(members) - 1
+            for device_id in remaining:
+                topic, item = devices[device_id]
+                self.publish(topic, item)
+                self.device_commands += 1
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            pending, self._pending, self._deadline = self._pending, {}, None
+            self._condition.notify_all()
+        self._dispatch(pending)
+
+    def counters(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "window_ms": self.window * 1000,
+                "known_groups": len(self._groups),
+                "group_commands": self.group_commands,
+                "device_commands": self.device_commands,
+                "saved_commands": self.saved_commands,
+            }
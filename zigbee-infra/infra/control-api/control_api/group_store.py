@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_SAVE_DEBOUNCE_SECONDS = 0.2
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write to a temp file in the same directory and rename it over `path`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w") as handle:
+            json.dump(data, handle, indent=2)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class GroupStore:
+    """groups.json held in memory, indexed by group_id and name, persisted write-behind.
+
+    Reads return the current list without touching the disk. Changes update
+    the index under a lock and schedule a debounced save, so a burst of
+    creates produces one atomic temp-file-plus-rename write off the request path.
+    Writes are serialized and each takes its snapshot only once the previous
+    one has landed, so an older snapshot can never be renamed over a newer one.
+    A failed write is retried after another debounce interval.
+    """
+
+    def __init__(self, groups_file: Path, save_debounce: float = DEFAULT_SAVE_DEBOUNCE_SECONDS) -> None:
+        self.groups_file = groups_file
+        self.save_debounce = save_debounce
+        self._groups: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Held for a whole flush, snapshot included; never taken while holding _lock.
+        self._write_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+
+    def load(self) -> None:
+        try:
+            raw_groups = json.loads(self.groups_file.read_text())
+        except (OSError, json.JSONDecodeError):
+            raw_groups = []
+        groups = [group for group in raw_groups if isinstance(group, dict)] if isinstance(raw_groups, list) else []
+        with self._lock:
+            self._groups = groups
+            self._by_id = {group["group_id"]: group for group in groups if "group_id" in group}
+            self._by_name = {group["name"]: group for group in groups if "name" in group}
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._groups
+
+    def get(self, group_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(group_id) or self._by_name.get(group_id)
+
+    def add(self, group: Dict[str, Any]) -> bool:
+        """Insert a group unless its group_id or name is taken. Returns False on conflict."""
+        with self._lock:
+            if group["group_id"] in self._by_id or group["name"] in self._by_name:
+                return False
+            # Readers may hold the old list; replace it instead of appending in place.
+            self._groups = [*self._groups, group]
+            self._by_id = {**self._by_id, group["group_id"]: group}
+            self._by_name = {**self._by_name, group["name"]: group}
+            self._dirty = True
+            self._schedule_save()
+        return True
+
+    def _schedule_save(self) -> None:
+        if self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(self.save_debounce, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self) -> None:
+        """Persist pending changes now; a no-op when nothing changed since the last save."""
+        with self._write_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                groups = self._groups
+            try:
+                write_json_atomic(self.groups_file, groups)
+            except OSError as exc:
+                with self._lock:
+                    self._dirty = True
+                    self._schedule_save()
+                logger.error("group_store save failed path=%s error=%s, retrying", self.groups_file, exc)
@@ -1,38 +1,88 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
+import signal
 import threading
+import time
+from concurrent.futures import Future, InvalidStateError
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import uuid4
 
 import paho.mqtt.client as mqtt
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError
 from control_api.midi_mapping import (
-    MIDI_ALL_CHANNELS,
-    MIDI_BULB_CHANNELS,
-    MIDI_CHANNEL_GROUP_MAP,
     MIDI_CHANNEL_MAX,
     MIDI_CHANNEL_MIN,
     MIDI_NOTE_MAX,
     MIDI_NOTE_MIN,
-    midi_channel_to_device_id as mapping_channel_to_device_id,
-    midi_channel_to_slot,
-    midi_note_to_brightness,
-    normalize_midi_bulb_ids,
+    NOTE_BRIGHTNESS_TABLE,
+    MidiRoutingTable,
+    build_midi_routing,
+    build_velocity_transition_table,
+)
+from control_api.device_registry import DeviceRegistry, raw_device_id
+from control_api.device_shadow import DeviceShadow
+from control_api.group_fanout import DEFAULT_WINDOW_MS, GroupFanout, bridge_groups_to_members, command_target
+from control_api.group_store import GroupStore
+from control_api.metrics import ApiMetrics
+from control_api.midi_stream import decode_midi_frames
+from control_api.mqtt_messages import (
+    TOPIC_PREFIX,
+    availability_from_report,
+    availability_status,
+    parse_json,
+    parse_json_object,
+)
+from control_api.publish_scheduler import DEFAULT_MAX_RATE_HZ, PendingPublish, TopicRateLimiter, is_command_topic
+from control_api.scenes import Scene, SceneStore
+from control_api.transitions import (
+    DEFAULT_TICK_HZ,
+    TRANSITION_MODES,
+    TRANSITION_SOURCE,
+    TransitionEngine,
+    native_transition_payload,
 )
 
 MQTT_HOST = os.getenv("MQTT_HOST", "mosquitto")
 MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
 Z2M_DATA_DIR = Path(os.getenv("Z2M_DATA_DIR", "/app/zigbee2mqtt-data"))
 GROUPS_FILE = Path(os.getenv("GROUPS_FILE", "/app/data/groups.json"))
+SCENES_FILE = Path(os.getenv("SCENES_FILE", str(GROUPS_FILE.parent / "scenes.json")))
+GROUPS_SAVE_DEBOUNCE_SECONDS = float(os.getenv("GROUPS_SAVE_DEBOUNCE_MS", "200")) / 1000
+DEVICES_POLL_SECONDS = float(os.getenv("DEVICES_POLL_SECONDS", "2.0"))
+MIDI_BULB_IDS_FILE = os.getenv("MIDI_BULB_IDS_FILE")
+# Per device/group command cap; 0 publishes every command immediately.
+MQTT_MAX_RATE_HZ = float(os.getenv("MQTT_MAX_RATE_HZ", str(DEFAULT_MAX_RATE_HZ)))
+# Window for folding same-payload device commands into one group command; 0 disables.
+MQTT_GROUP_WINDOW_MS = float(os.getenv("MQTT_GROUP_WINDOW_MS", str(DEFAULT_WINDOW_MS)))
+MQTT_QOS = int(os.getenv("MQTT_QOS", "0"))
+# Publishes handed to paho but not yet acknowledged (PUBACK for QoS 1, socket write for QoS 0).
+MQTT_MAX_INFLIGHT = int(os.getenv("MQTT_MAX_INFLIGHT", "20"))
+# Make MIDI/state handlers wait for the publish acknowledgement and fail with 504 without it.
+MQTT_AWAIT_PUBLISH = os.getenv("MQTT_AWAIT_PUBLISH", "false").lower() in ("1", "true", "yes", "on")
+MQTT_PUBLISH_TIMEOUT = float(os.getenv("MQTT_PUBLISH_TIMEOUT_MS", "1000")) / 1000
+# native: one command with Zigbee2MQTT's `transition`; interpolate: stepped on our scheduler thread.
+TRANSITION_MODE = os.getenv("TRANSITION_MODE", "native")
+if TRANSITION_MODE not in TRANSITION_MODES:
+    raise ValueError(f"TRANSITION_MODE must be one of {', '.join(TRANSITION_MODES)}")
+TRANSITION_TICK_HZ = float(os.getenv("TRANSITION_TICK_HZ", str(DEFAULT_TICK_HZ)))
+# Fade MIDI notes over up to this many ms depending on velocity; 0 keeps notes instant.
+MIDI_VELOCITY_TRANSITION_MS = int(os.getenv("MIDI_VELOCITY_TRANSITION_MS", "0"))
+MIDI_TRANSITION_TABLE = build_velocity_transition_table(MIDI_VELOCITY_TRANSITION_MS)
 
 app = FastAPI(title="Zigbee Demo Control API")
 logger = logging.getLogger("uvicorn.error")
+api_metrics = ApiMetrics()
+device_registry = DeviceRegistry(Z2M_DATA_DIR / "devices.json", poll_seconds=DEVICES_POLL_SECONDS)
+device_shadow = DeviceShadow()
+group_store = GroupStore(GROUPS_FILE, save_debounce=GROUPS_SAVE_DEBOUNCE_SECONDS)
+scene_store = SceneStore(SCENES_FILE)
 
 
 class PairingStartRequest(BaseModel):
@@ -49,134 +99,389 @@ class GroupCreateRequest(BaseModel):
     device_ids: List[str]
 
 
+class TransitionRequest(BaseModel):
+    brightness: int = Field(ge=0, le=254)
+    duration_ms: int = Field(ge=0, le=600_000)
+    mode: Optional[str] = Field(default=None, pattern="^(native|interpolate)$")
+    from_brightness: Optional[int] = Field(default=None, ge=0, le=254)
+
+
+class MidiMappingReloadRequest(BaseModel):
+    bulb_ids: Optional[List[str]] = None
+
+
 class MidiEventRequest(BaseModel):
     event_type: Optional[str] = None
     channel: int = Field(ge=0, le=15)
     key: Optional[int] = Field(default=None, ge=MIDI_NOTE_MIN, le=MIDI_NOTE_MAX)
+    value: Optional[int] = Field(default=None, ge=0, le=127)
     timestamp: Optional[str] = None
+    trace_id: Optional[str] = None
 
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def resolve_waiters(waiters: Iterable["Future[bool]"], published: bool) -> None:
+    for waiter in waiters:
+        if not waiter.done():
+            try:
+                waiter.set_result(published)
+            except InvalidStateError:
+                # Cancelled by a caller that stopped waiting.
+                pass
+
+
+def combine_receipts(receipts: List["Future[bool]"]) -> "Future[bool]":
+    """One receipt that resolves True once every publish in `receipts` succeeded."""
+    combined: "Future[bool]" = Future()
+    if not receipts:
+        combined.set_result(True)
+        return combined
+    lock = threading.Lock()
+    state = {"remaining": len(receipts), "published": True}
+
+    def on_done(receipt: "Future[bool]") -> None:
+        published = not receipt.cancelled() and receipt.result()
+        with lock:
+            state["published"] = state["published"] and published
+            state["remaining"] -= 1
+            finished = state["remaining"] == 0
+        if finished:
+            resolve_waiters((combined,), state["published"])
+
+    for receipt in receipts:
+        receipt.add_done_callback(on_done)
+    return combined
+
+
+def state_payload(body: DeviceStateRequest) -> Dict[str, Any]:
+    """Only the fields the caller set; a None would overwrite a merged command's value."""
+    return {key: value for key, value in (("state", body.state), ("brightness", body.brightness)) if value is not None}
+
+
+def canonical_device_id(device_id: str) -> str:
+    raw = device_registry.get(device_id)
+    return raw_device_id(raw) if raw is not None else device_id
+
+
 class MqttClient:
     def __init__(self) -> None:
         self.client = mqtt.Client()
         self.client.on_message = self._on_message
         self.client.on_connect = self._on_connect
+        self.client.on_publish = self._on_publish
+        self.client.on_disconnect = self._on_disconnect
+        self.client.max_inflight_messages_set(MQTT_MAX_INFLIGHT)
+        # Copy-on-write: only the MQTT network thread replaces it, readers never lock.
         self.status_map: Dict[str, str] = {}
-        self._lock = threading.Lock()
+        self._bridge_handlers = {
+            "devices": device_registry.load_bridge_devices,
+            "groups": lambda data: self.fanout.set_groups("zigbee2mqtt", bridge_groups_to_members(data)),
+        }
+        self.window = threading.Semaphore(MQTT_MAX_INFLIGHT)
+        self.published = 0
+        self.acked = 0
+        self.failed = 0
+        self._ack_lock = threading.Lock()
+        self._inflight: Dict[int, Tuple["Future[bool]", ...]] = {}
+        self._early_acks: Set[int] = set()
+        # QoS 1/2 publishes we already failed but paho will still resend (and ack) after a reconnect.
+        self._abandoned: Set[int] = set()
+        # Bumped on every disconnect so a publish that raced the drop is not left in flight.
+        self._connection = 0
+        self.rate_limiter = TopicRateLimiter(
+            self._publish_now,
+            max_rate_hz=MQTT_MAX_RATE_HZ,
+            window=self.window,
+        )
+        self.fanout = GroupFanout(
+            self.rate_limiter.submit,
+            canonical_id=canonical_device_id,
+            window_ms=MQTT_GROUP_WINDOW_MS,
+        )
 
     def connect(self) -> None:
         self.client.connect(MQTT_HOST, MQTT_PORT, keepalive=60)
         self.client.loop_start()
+        self.rate_limiter.start()
+        self.fanout.start()
+
+    def close(self) -> None:
+        self.fanout.close()
+        self.rate_limiter.close()
+        self.client.loop_stop()
+        self.client.disconnect()
 
     def _on_connect(self, client, _userdata, _flags, _rc) -> None:
         client.subscribe("zigbee2mqtt/+/availability")
         client.subscribe("zigbee2mqtt/+")
+        client.subscribe("zigbee2mqtt/bridge/devices")
+        client.subscribe("zigbee2mqtt/bridge/groups")
+
+    def _on_disconnect(self, _client, _userdata, _rc) -> None:
+        # paho drops unsent QoS 0 packets on reconnect without calling on_publish,
+        # and resends QoS 1/2 ones under the same mid. Either way the waiters
+        # see a failure now and the permits go back to the window.
+        with self._ack_lock:
+            self._connection += 1
+            lost = list(self._inflight.items())
+            self._inflight.clear()
+            self._early_acks.clear()
+            self.failed += len(lost)
+            if MQTT_QOS > 0:
+                self._abandoned.update(mid for mid, _waiters in lost)
+        for _mid, waiters in lost:
+            self.window.release()
+            resolve_waiters(waiters, False)
+        if lost:
+            logger.warning("mqtt_disconnected rc=%s lost_publishes=%s", _rc, len(lost))
 
     def _on_message(self, _client, _userdata, msg) -> None:
         topic = msg.topic
-        payload = msg.payload.decode("utf-8", errors="ignore")
-        parts = topic.split("/")
-        if len(parts) < 2 or parts[0] != "zigbee2mqtt":
+        if not topic.startswith(TOPIC_PREFIX):
+            return
+        device_id, _, suffix = topic[len(TOPIC_PREFIX) :].partition("/")
+
+        if device_id == "bridge":
+            handler = self._bridge_handlers.get(suffix)
+            if handler is not None:
+                data = parse_json(msg.payload)
+                if data is not None:
+                    handler(data)
             return
-        device_id = parts[1]
-        suffix = parts[2] if len(parts) > 2 else None
 
         if suffix == "availability":
-            status = "available" if payload.lower() == "online" else "unavailable"
-            with self._lock:
-                self.status_map[device_id] = status
+            self._set_status(device_id, availability_status(msg.payload))
             return
-
-        try:
-            data = json.loads(payload)
-            if isinstance(data, dict) and "availability" in data:
-                status = "available" if str(data["availability"]).lower() == "online" else "unavailable"
-                with self._lock:
-                    self.status_map[device_id] = status
-        except json.JSONDecodeError:
+        if suffix:
             return
 
-    def publish_json(self, topic: str, payload: Dict[str, Any], source: str = "unknown") -> bool:
-        serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"))
-        self.client.publish(topic, serialized)
+        data = parse_json_object(msg.payload)
+        if data is None:
+            return
+        status = availability_from_report(data)
+        if status is not None:
+            self._set_status(device_id, status)
+        device_shadow.apply_reported(canonical_device_id(device_id), data)
+
+    def _set_status(self, device_id: str, status: str) -> None:
+        if self.status_map.get(device_id) != status:
+            self.status_map = {**self.status_map, device_id: status}
+
+    def publish_json(
+        self,
+        topic: str,
+        payload: Dict[str, Any],
+        source: str = "unknown",
+        trace_id: Optional[str] = None,
+    ) -> "Future[bool]":
+        """Queue a publish; the returned future resolves once the broker has it (or it failed)."""
+        receipt: "Future[bool]" = Future()
+        item = PendingPublish(payload, source, trace_id, (receipt,))
+        if is_command_topic(topic):
+            if source != TRANSITION_SOURCE:
+                # A direct command takes over from any fade running on the target.
+                transition_engine.cancel(topic)
+            self._apply_optimistic(topic, payload)
+            if not self.fanout.submit(topic, item):
+                self.rate_limiter.submit(topic, item)
+        elif self.window.acquire(timeout=MQTT_PUBLISH_TIMEOUT):
+            self._publish_now(topic, item)
+        else:
+            with self._ack_lock:
+                self.failed += 1
+            resolve_waiters(item.waiters, False)
+        return receipt
+
+    def publish_scene(self, scene: Scene, source: str = "scene", trace_id: Optional[str] = None) -> "Future[bool]":
+        """Send a scene's pre-serialized commands; they skip fan-out since scenes pick their own targets."""
+        receipts = []
+        for publish in scene.publishes:
+            receipt: "Future[bool]" = Future()
+            transition_engine.cancel(publish.topic)
+            self._apply_optimistic(publish.topic, publish.payload)
+            item = PendingPublish(publish.payload, source, trace_id, (receipt,), publish.serialized)
+            self.rate_limiter.submit(publish.topic, item)
+            receipts.append(receipt)
+        return combine_receipts(receipts)
+
+    def _apply_optimistic(self, topic: str, payload: Dict[str, Any]) -> None:
+        target = command_target(topic)
+        if target is None:
+            return
+        members = self.fanout.group_members(target)
+        device_shadow.apply_desired(members or (canonical_device_id(target),), payload)
+
+    def _publish_now(self, topic: str, item: PendingPublish) -> None:
+        """Hand one publish to paho. The caller holds a window permit, released on ack or failure."""
+        if item.serialized is not None:
+            serialized: Any = item.serialized
+        else:
+            serialized = json.dumps(item.payload, sort_keys=True, separators=(",", ":"))
+        connection = self._connection
+        started_ns = time.monotonic_ns()
+        info = self.client.publish(topic, serialized, qos=MQTT_QOS)
+        api_metrics.observe_since("mqtt_publish", started_ns)
+        published = info.rc == mqtt.MQTT_ERR_SUCCESS
+        acked_early = False
+        with self._ack_lock:
+            self.published += 1
+            if published and connection != self._connection and info.mid not in self._early_acks:
+                # The connection dropped while we were publishing; _on_disconnect
+                # has already settled the in-flight set, so settle this one too.
+                published = False
+            if not published:
+                self.failed += 1
+                if MQTT_QOS > 0:
+                    # paho keeps QoS 1/2 messages and delivers them after a
+                    # reconnect; ignore that late ack. QoS 0 is never acked, so
+                    # remembering its mid would swallow the ack of whichever
+                    # publish reuses it.
+                    self._abandoned.add(info.mid)
+            elif info.mid in self._early_acks:
+                self._early_acks.discard(info.mid)
+                self.acked += 1
+                acked_early = True
+            else:
+                self._inflight[info.mid] = item.waiters
+        if not published or acked_early:
+            self.window.release()
+            resolve_waiters(item.waiters, published)
         logger.info(
-            "z2m_request source=%s published=%s topic=%s payload=%s",
-            source,
-            True,
+            "z2m_request source=%s published=%s topic=%s payload=%s trace_id=%s",
+            item.source,
+            published,
             topic,
-            serialized,
+            serialized.decode("utf-8") if isinstance(serialized, bytes) else serialized,
+            item.trace_id,
         )
-        return True
+
+    def _on_publish(self, _client, _userdata, mid) -> None:
+        with self._ack_lock:
+            if mid in self._abandoned:
+                self._abandoned.discard(mid)
+                return
+            waiters = self._inflight.pop(mid, None)
+            if waiters is None:
+                # Acknowledged before publish() returned; _publish_now completes it.
+                self._early_acks.add(mid)
+                return
+            self.acked += 1
+        self.window.release()
+        resolve_waiters(waiters, True)
+
+    def publish_counters(self) -> Dict[str, Any]:
+        with self._ack_lock:
+            return {
+                "qos": MQTT_QOS,
+                "max_inflight": MQTT_MAX_INFLIGHT,
+                "inflight": len(self._inflight),
+                "published": self.published,
+                "acked": self.acked,
+                "failed": self.failed,
+            }
 
     def get_status(self, device_id: str) -> str:
-        with self._lock:
-            return self.status_map.get(device_id, "unavailable")
+        return self.status_map.get(device_id, "unavailable")
 
 
 mqtt_client = MqttClient()
+transition_engine = TransitionEngine(
+    lambda topic, payload, source, trace_id: mqtt_client.publish_json(topic, payload, source, trace_id),
+    tick_hz=TRANSITION_TICK_HZ,
+)
 
 
 @app.on_event("startup")
 def startup() -> None:
+    device_registry.start()
+    device_shadow.load_state_file(Z2M_DATA_DIR / "state.json", canonical_device_id)
+    group_store.load()
+    scene_store.load()
+    refresh_group_fanout()
     mqtt_client.connect()
+    transition_engine.start()
+    if hasattr(signal, "SIGHUP"):
+        try:
+            signal.signal(signal.SIGHUP, lambda _signum, _frame: reload_from_disk())
+        except ValueError:
+            # Not running in the main thread (embedded server); use the reload endpoint.
+            pass
 
 
-def read_devices() -> List[Dict[str, Any]]:
-    devices_file = Z2M_DATA_DIR / "devices.json"
-    if devices_file.exists():
-        try:
-            return json.loads(devices_file.read_text())
-        except json.JSONDecodeError:
-            return []
-    return []
+@app.on_event("shutdown")
+def shutdown() -> None:
+    device_registry.stop()
+    group_store.flush()
+    transition_engine.close()
+    mqtt_client.close()
 
 
 def to_device(raw: Dict[str, Any]) -> Dict[str, Any]:
-    device_id = raw.get("ieee_address") or raw.get("friendly_name") or raw.get("device_id") or "unknown"
+    device_id = raw_device_id(raw)
     return {
         "device_id": device_id,
         "friendly_name": raw.get("friendly_name") or raw.get("name") or device_id,
         "status": mqtt_client.get_status(device_id),
+        "state": device_shadow.get(device_id),
         "last_seen_at": raw.get("last_seen"),
         "capabilities": raw.get("definition") or {},
     }
 
 
 def list_devices() -> List[Dict[str, Any]]:
-    return [to_device(d) for d in read_devices()]
+    return [to_device(d) for d in device_registry.all()]
 
 
 def get_device(device_id: str) -> Optional[Dict[str, Any]]:
-    for d in list_devices():
-        if d["device_id"] == device_id:
-            return d
-    return None
+    raw = device_registry.get(device_id)
+    return to_device(raw) if raw is not None else None
 
 
 def list_groups() -> List[Dict[str, Any]]:
-    if not GROUPS_FILE.exists():
-        return []
-    try:
-        return json.loads(GROUPS_FILE.read_text())
-    except json.JSONDecodeError:
-        return []
+    return group_store.all()
 
 
-def save_groups(groups: List[Dict[str, Any]]) -> None:
-    GROUPS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    GROUPS_FILE.write_text(json.dumps(groups, indent=2))
+def refresh_group_fanout() -> None:
+    groups = group_store.all()
+    # POST /groups never creates the group in Zigbee2MQTT, which would ignore a
+    # command to it: local groups resolve members but are never folded into.
+    mqtt_client.fanout.set_groups("local", {g["group_id"]: g.get("device_ids") or [] for g in groups}, fold=False)
 
 
-def midi_bulb_ids() -> List[str]:
-    return normalize_midi_bulb_ids(os.getenv("MIDI_BULB_IDS"))
+def read_midi_bulb_ids() -> Optional[str]:
+    if MIDI_BULB_IDS_FILE:
+        try:
+            return Path(MIDI_BULB_IDS_FILE).read_text().replace("\n", ",")
+        except OSError:
+            logger.warning("midi_routing bulb_ids_file=%s unreadable, using MIDI_BULB_IDS", MIDI_BULB_IDS_FILE)
+    return os.getenv("MIDI_BULB_IDS")
 
 
-def midi_channel_to_device_id(channel: int) -> Optional[str]:
-    return mapping_channel_to_device_id(channel, os.getenv("MIDI_BULB_IDS"))
+midi_routing = build_midi_routing(read_midi_bulb_ids())
+
+
+def reload_midi_routing(raw_ids: Optional[str] = None) -> MidiRoutingTable:
+    global midi_routing
+    midi_routing = build_midi_routing(raw_ids if raw_ids is not None else read_midi_bulb_ids())
+    logger.info("midi_routing reloaded bulb_ids=%s", ",".join(midi_routing.bulb_ids))
+    return midi_routing
+
+
+def reload_from_disk() -> None:
+    reload_midi_routing()
+    scene_store.load()
+
+
+def to_scene(scene: Scene) -> Dict[str, Any]:
+    return {
+        "scene_id": scene.scene_id,
+        "name": scene.name,
+        "commands": [{"topic": publish.topic, "payload": publish.payload} for publish in scene.publishes],
+        "midi": scene.raw.get("midi"),
+    }
 
 
 @app.get("/health")
@@ -184,6 +489,17 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics() -> Dict[str, Any]:
+    return {
+        "stages": api_metrics.summary(),
+        "mqtt": {**mqtt_client.rate_limiter.counters(), **mqtt_client.publish_counters()},
+        "fanout": mqtt_client.fanout.counters(),
+        "shadow": device_shadow.counters(),
+        "transitions": transition_engine.counters(),
+    }
+
+
 @app.post("/pairing/start")
 def pairing_start(body: PairingStartRequest) -> Dict[str, Any]:
     session = {
@@ -224,16 +540,76 @@ def device_detail(device_id: str) -> Dict[str, Any]:
     return device
 
 
+async def await_publish(receipt: "Future[bool]") -> bool:
+    """Wait for the broker acknowledgement when MQTT_AWAIT_PUBLISH is on; otherwise fire and forget."""
+    if not MQTT_AWAIT_PUBLISH:
+        return True
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(receipt), MQTT_PUBLISH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return False
+
+
+async def require_publish(receipt: "Future[bool]") -> None:
+    if not await await_publish(receipt):
+        raise HTTPException(status_code=504, detail="MQTT publish was not acknowledged")
+
+
 @app.post("/devices/{device_id}/state")
-def device_state(device_id: str, body: DeviceStateRequest) -> Dict[str, Any]:
-    mqtt_client.publish_json(
-        f"zigbee2mqtt/{device_id}/set",
-        {"state": body.state, "brightness": body.brightness},
-        source="device_state",
-    )
+async def device_state(device_id: str, body: DeviceStateRequest) -> Dict[str, Any]:
+    payload = state_payload(body)
+    if device_shadow.matches(canonical_device_id(device_id), payload):
+        # Already in the requested state; don't spend a radio frame on it.
+        device_shadow.record_skip()
+        return get_device(device_id) or {"device_id": device_id}
+    receipt = mqtt_client.publish_json(f"zigbee2mqtt/{device_id}/set", payload, source="device_state")
+    await require_publish(receipt)
     return get_device(device_id) or {"device_id": device_id}
 
 
+def current_brightness(target_id: str) -> int:
+    """Best known brightness for a device, or for a group's first known member."""
+    members = mqtt_client.fanout.group_members(target_id) or (canonical_device_id(target_id),)
+    for member in members:
+        brightness = device_shadow.get(member).get("brightness")
+        if isinstance(brightness, int):
+            return brightness
+    return 0
+
+
+async def start_transition(target_id: str, body: TransitionRequest, trace_id: Optional[str]) -> Dict[str, Any]:
+    topic = f"zigbee2mqtt/{target_id}/set"
+    mode = body.mode or TRANSITION_MODE
+    if mode == "native":
+        receipt = mqtt_client.publish_json(
+            topic,
+            native_transition_payload(body.brightness, body.duration_ms),
+            source="transition_native",
+            trace_id=trace_id,
+        )
+        await require_publish(receipt)
+    else:
+        start = body.from_brightness if body.from_brightness is not None else current_brightness(target_id)
+        transition_engine.begin(topic, start, body.brightness, body.duration_ms, trace_id)
+    return {
+        "target": target_id,
+        "mqtt_topic": topic,
+        "mode": mode,
+        "brightness": body.brightness,
+        "duration_ms": body.duration_ms,
+        "trace_id": trace_id,
+    }
+
+
+@app.post("/devices/{device_id}/transition")
+async def device_transition(
+    device_id: str,
+    body: TransitionRequest,
+    x_trace_id: Optional[str] = Header(default=None),
+) -> Dict[str, Any]:
+    return await start_transition(device_id, body, x_trace_id)
+
+
 @app.post("/devices/{device_id}/refresh")
 def device_refresh(device_id: str) -> Dict[str, Any]:
     mqtt_client.publish_json("zigbee2mqtt/bridge/request/device/refresh", {"id": device_id}, source="device_refresh")
@@ -247,59 +623,96 @@ def groups() -> List[Dict[str, Any]]:
 
 @app.post("/groups")
 def create_group(body: GroupCreateRequest) -> Dict[str, Any]:
-    groups = list_groups()
     group_id = body.name.lower().replace(" ", "-")
-    if any(g["name"] == body.name or g["group_id"] == group_id for g in groups):
-        raise HTTPException(status_code=400, detail="Group already exists")
     group = {"group_id": group_id, "name": body.name, "device_ids": body.device_ids}
-    groups.append(group)
-    save_groups(groups)
+    if not group_store.add(group):
+        raise HTTPException(status_code=400, detail="Group already exists")
+    refresh_group_fanout()
     return group
 
 
 @app.post("/groups/{group_id}/state")
-def group_state(group_id: str, body: DeviceStateRequest) -> Dict[str, Any]:
-    mqtt_client.publish_json(
+async def group_state(group_id: str, body: DeviceStateRequest) -> Dict[str, Any]:
+    receipt = mqtt_client.publish_json(
         f"zigbee2mqtt/{group_id}/set",
-        {"state": body.state, "brightness": body.brightness},
+        state_payload(body),
         source="group_state",
     )
+    await require_publish(receipt)
     return {"group_id": group_id, "state": body.state, "brightness": body.brightness}
 
 
+@app.post("/groups/{group_id}/transition")
+async def group_transition(
+    group_id: str,
+    body: TransitionRequest,
+    x_trace_id: Optional[str] = Header(default=None),
+) -> Dict[str, Any]:
+    return await start_transition(group_id, body, x_trace_id)
+
+
+@app.get("/scenes")
+def scenes() -> List[Dict[str, Any]]:
+    return [to_scene(scene) for scene in scene_store.all()]
+
+
+@app.post("/scenes/reload")
+def scenes_reload() -> List[Dict[str, Any]]:
+    scene_store.load()
+    return [to_scene(scene) for scene in scene_store.all()]
+
+
+@app.post("/scenes/{scene_id}/apply")
+async def scene_apply(scene_id: str, x_trace_id: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    scene = scene_store.get(scene_id)
+    if scene is None:
+        raise HTTPException(status_code=404, detail="Scene not found")
+    await require_publish(mqtt_client.publish_scene(scene, source="scene_apply", trace_id=x_trace_id))
+    return {"scene_id": scene.scene_id, "published": len(scene.publishes), "trace_id": x_trace_id}
+
+
 @app.get("/midi/mapping")
 def midi_mapping() -> List[Dict[str, Any]]:
-    device_ids = midi_bulb_ids()
-    mapping: List[Dict[str, Any]] = []
-    for channel in MIDI_ALL_CHANNELS:
-        if channel in MIDI_CHANNEL_GROUP_MAP:
-            mapping.append(
-                {
-                    "channel": channel,
-                    "slot": channel,
-                    "device_id": MIDI_CHANNEL_GROUP_MAP[channel],
-                }
-            )
-            continue
-
-        index = channel
-        mapping.append(
-            {
-                "channel": channel,
-                "slot": index,
-                "device_id": device_ids[index] if index < len(device_ids) else None,
-            }
+    return midi_routing.mapping()
+
+
+@app.post("/midi/mapping/reload")
+def midi_mapping_reload(body: Optional[MidiMappingReloadRequest] = None) -> List[Dict[str, Any]]:
+    raw_ids = ",".join(body.bulb_ids) if body and body.bulb_ids is not None else None
+    if raw_ids is not None and not raw_ids.replace(",", "").strip():
+        # An empty list would normalize to the built-in defaults; omit bulb_ids to re-read the config.
+        raise HTTPException(
+            status_code=400,
+            detail="bulb_ids must list at least one ID; omit it to re-read MIDI_BULB_IDS",
         )
-    return mapping
+    return reload_midi_routing(raw_ids).mapping()
 
 
-@app.post("/midi/events")
-def midi_event(body: MidiEventRequest) -> Dict[str, Any]:
+def resolve_scene_event(body: MidiEventRequest, scene: Scene) -> Dict[str, Any]:
+    # A bound note triggers its scene; releasing the note does nothing.
+    triggered = body.event_type != "note_off"
+    return {
+        "scene_id": scene.scene_id,
+        "scene_triggered": triggered,
+        "key": body.key,
+        "event_type": body.event_type,
+        "channel": body.channel,
+        "timestamp": body.timestamp,
+        "mqtt_topics": [publish.topic for publish in scene.publishes] if triggered else [],
+    }
+
+
+def resolve_midi_event(body: MidiEventRequest) -> Dict[str, Any]:
+    scene_id = scene_store.bindings.scene_for(body.channel, body.key)
+    scene = scene_store.get(scene_id) if scene_id is not None else None
+    if scene is not None:
+        return resolve_scene_event(body, scene)
+
     if body.channel < MIDI_CHANNEL_MIN or body.channel > MIDI_CHANNEL_MAX:
         raise HTTPException(status_code=400, detail="Channel is outside mapped range 0..11")
 
-    device_id = midi_channel_to_device_id(body.channel)
-    if not device_id:
+    route = midi_routing.route(body.channel)
+    if route is None or route.mqtt_topic is None:
         raise HTTPException(
             status_code=400,
             detail="Channel is not mapped to a real bulb ID. Configure MIDI_BULB_IDS with real IDs.",
@@ -307,27 +720,139 @@ def midi_event(body: MidiEventRequest) -> Dict[str, Any]:
 
     # Turn OFF when note ends (note_off) or when there is no note value.
     # Otherwise use the note to drive intensity.
+    transition_ms = 0
     if body.event_type == "note_off" or body.key is None:
         brightness = 0
     else:
-        brightness = midi_note_to_brightness(body.key)
-
-    payload = {"brightness": brightness}
-    mqtt_client.publish_json(f"zigbee2mqtt/{device_id}/set", payload, source="midi_event")
+        brightness = NOTE_BRIGHTNESS_TABLE[body.key]
+        if MIDI_TRANSITION_TABLE and body.value is not None:
+            transition_ms = MIDI_TRANSITION_TABLE[body.value]
 
+    if transition_ms and TRANSITION_MODE == "native":
+        payload = native_transition_payload(brightness, transition_ms)
+    else:
+        payload = {"brightness": brightness}
     return {
-        "device_id": device_id,
-        "slot": midi_channel_to_slot(body.channel),
+        "device_id": route.device_id,
+        "slot": route.slot,
         "key": body.key,
         "event_type": body.event_type,
         "channel": body.channel,
         "brightness": brightness,
         "timestamp": body.timestamp,
-        "mqtt_topic": f"zigbee2mqtt/{device_id}/set",
+        "mqtt_topic": route.mqtt_topic,
         "mqtt_payload": payload,
+        "transition_ms": transition_ms,
     }
 
 
+def publish_midi_result(
+    result: Dict[str, Any],
+    source: str,
+    received_ns: int,
+    trace_id: Optional[str],
+) -> "Future[bool]":
+    api_metrics.observe_since("resolve", received_ns)
+    if "scene_id" in result:
+        scene = scene_store.get(result["scene_id"])
+        if scene is None or not result["scene_triggered"]:
+            return combine_receipts([])
+        return mqtt_client.publish_scene(scene, source=source, trace_id=trace_id)
+    if result["transition_ms"] and TRANSITION_MODE == "interpolate":
+        start = current_brightness(result["device_id"])
+        transition_engine.begin(result["mqtt_topic"], start, result["brightness"], result["transition_ms"], trace_id)
+        return combine_receipts([])
+    return mqtt_client.publish_json(result["mqtt_topic"], result["mqtt_payload"], source=source, trace_id=trace_id)
+
+
+@app.post("/midi/events")
+async def midi_event(body: MidiEventRequest, x_trace_id: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    received_ns = time.monotonic_ns()
+    api_metrics.observe_transit(body.timestamp)
+    trace_id = x_trace_id or body.trace_id
+    result = resolve_midi_event(body)
+    receipt = publish_midi_result(result, "midi_event", received_ns, trace_id)
+    await require_publish(receipt)
+    api_metrics.observe_since("handler", received_ns)
+    return {**result, "trace_id": trace_id}
+
+
+def resolve_raw_midi_event(raw: Any) -> Dict[str, Any]:
+    """Validate and resolve one raw event, reporting errors in the result instead of raising."""
+    try:
+        result = resolve_midi_event(MidiEventRequest.model_validate(raw))
+    except ValidationError as exc:
+        return {"status": "error", "message": str(exc)}
+    except HTTPException as exc:
+        return {"status": "error", "message": exc.detail}
+    return {"status": "ok", **result}
+
+
+@app.post("/midi/events:batch")
+async def midi_events_batch(
+    body: List[Any],
+    x_trace_id: Optional[str] = Header(default=None),
+) -> Dict[str, Any]:
+    # Items are validated one by one so a bad event is reported in its own
+    # result instead of rejecting the whole batch.
+    received_ns = time.monotonic_ns()
+    results = [{"index": index, **resolve_raw_midi_event(raw)} for index, raw in enumerate(body)]
+
+    receipts = []
+    for result in results:
+        if result["status"] == "ok":
+            api_metrics.observe_transit(result["timestamp"])
+            trace_id = f"{x_trace_id}.{result['index']}" if x_trace_id else None
+            receipts.append((result, publish_midi_result(result, "midi_event_batch", received_ns, trace_id)))
+    published = await asyncio.gather(*(await_publish(receipt) for _result, receipt in receipts))
+    for (result, _receipt), ok in zip(receipts, published):
+        if not ok:
+            result.update(status="error", message="MQTT publish was not acknowledged")
+    api_metrics.observe_since("handler", received_ns)
+
+    failed = sum(1 for result in results if result["status"] != "ok")
+    return {"status": "ok", "accepted": len(results) - failed, "failed": failed, "results": results}
+
+
+@app.websocket("/midi/stream")
+async def midi_stream(websocket: WebSocket, ack: bool = False) -> None:
+    # Text frames carry one JSON event or an array of events; binary frames use
+    # the 4-byte framing from control_api.midi_stream. With ?ack=true every
+    # event is answered with its result, otherwise only decode errors reply.
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                if message.get("bytes") is not None:
+                    events = decode_midi_frames(message["bytes"])
+                else:
+                    decoded = json.loads(message.get("text") or "")
+                    events = decoded if isinstance(decoded, list) else [decoded]
+            except ValueError as exc:
+                await websocket.send_json({"status": "error", "message": str(exc)})
+                continue
+
+            for raw in events:
+                received_ns = time.monotonic_ns()
+                result = resolve_raw_midi_event(raw)
+                if result["status"] == "ok":
+                    api_metrics.observe_transit(result["timestamp"])
+                    trace_id = raw.get("trace_id") if isinstance(raw, dict) else None
+                    receipt = publish_midi_result(result, "midi_stream", received_ns, trace_id)
+                    if ack and not await await_publish(receipt):
+                        result = {"status": "error", "message": "MQTT publish was not acknowledged"}
+                    api_metrics.observe_since("handler", received_ns)
+                if ack:
+                    await websocket.send_json(result)
+                elif result["status"] != "ok":
+                    logger.warning("midi_stream_rejected message=%s", result["message"])
+    except WebSocketDisconnect:
+        return
+
+
 def run() -> None:
     import uvicorn
 
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Intentional copy of blink_midi.metrics.LatencyHistogram (the API image does
+# not install the bridge package): log buckets ~5% wide, in microseconds up to
+# ~10 minutes. Keep the layout identical so bridge and API percentiles compare;
+# the bridge's test suite checks that they bucket the same way.
+BUCKET_GROWTH = 1.05
+BUCKET_COUNT = 450
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+# transit: client event timestamp -> API receive (wall clock, same host or NTP)
+# resolve: API receive -> MQTT publish start
+# mqtt_publish: paho publish call
+# handler: API receive -> response ready
+API_STAGES: Tuple[str, ...] = ("transit", "resolve", "mqtt_publish", "handler")
+
+
+class LatencyHistogram:
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self._lock = threading.Lock()
+
+    def observe_ns(self, duration_ns: int) -> None:
+        micros = max(duration_ns, 0) / 1000
+        index = min(int(math.log1p(micros) / _LOG_GROWTH), BUCKET_COUNT - 1)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_us += micros
+            if micros > self.max_us:
+                self.max_us = micros
+
+    def percentile_ms(self, percentile: float) -> float:
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = math.ceil(self.count * percentile / 100)
+            seen = 0
+            for index, bucket in enumerate(self.counts):
+                seen += bucket
+                if seen >= rank:
+                    upper_us = math.expm1((index + 1) * _LOG_GROWTH)
+                    return min(upper_us, self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": (self.total_us / self.count / 1000) if self.count else 0.0,
+            "p50_ms": self.percentile_ms(50),
+            "p95_ms": self.percentile_ms(95),
+            "p99_ms": self.percentile_ms(99),
+            "max_ms": self.max_us / 1000,
+        }
+
+
+class ApiMetrics:
+    def __init__(self) -> None:
+        self.histograms = {stage: LatencyHistogram() for stage in API_STAGES}
+
+    def observe_ns(self, stage: str, duration_ns: int) -> None:
+        self.histograms[stage].observe_ns(duration_ns)
+
+    def observe_since(self, stage: str, started_ns: int) -> None:
+        self.histograms[stage].observe_ns(time.monotonic_ns() - started_ns)
+
+    def observe_transit(self, timestamp: Optional[str]) -> None:
+        if not timestamp:
+            return
+        try:
+            sent_at = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            return
+        if sent_at.tzinfo is None:
+            sent_at = sent_at.replace(tzinfo=timezone.utc)
+        delta = datetime.now(timezone.utc) - sent_at
+        self.histograms["transit"].observe_ns(int(delta.total_seconds() * 1_000_000_000))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
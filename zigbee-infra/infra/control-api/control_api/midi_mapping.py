@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 MIDI_BULB_CHANNELS: List[int] = list(range(10))
 MIDI_GROUP_CHANNEL = 10
@@ -15,6 +15,9 @@ MIDI_CHANNEL_MIN = MIDI_BULB_CHANNELS[0]
 MIDI_NOTE_MAX = 17
 MIDI_NOTE_MIN = 0
 MIDI_NOTE_STEP_COUNT = MIDI_NOTE_MAX - MIDI_NOTE_MIN + 1
+MIDI_VELOCITY_MAX = 127
+MIDI_CHANNEL_COUNT = 16
+MIDI_NOTE_COUNT = 128
 UNMAPPED_DEVICE_ID = "NONE"
 
 # Shared source of truth for channel->bulb defaults.
@@ -64,3 +67,95 @@ def midi_note_to_brightness(note: int) -> int:
 
 def is_real_device_id(device_id: str) -> bool:
     return bool(device_id) and device_id != UNMAPPED_DEVICE_ID
+
+
+def midi_velocity_to_transition_ms(velocity: int, max_ms: int) -> int:
+    # Harder hits fade faster: velocity 127 is instant, velocity 0 takes max_ms.
+    return round(max_ms * (MIDI_VELOCITY_MAX - velocity) / MIDI_VELOCITY_MAX)
+
+
+# Precomputed note->brightness for every MIDI note; notes above MIDI_NOTE_MAX
+# saturate at full brightness.
+NOTE_BRIGHTNESS_TABLE: Tuple[int, ...] = tuple(
+    min(midi_note_to_brightness(note), 254) for note in range(MIDI_NOTE_COUNT)
+)
+
+
+def build_velocity_transition_table(max_ms: int) -> Tuple[int, ...]:
+    """Velocity -> fade duration for every MIDI velocity; empty when fades are disabled."""
+    if max_ms <= 0:
+        return ()
+    return tuple(midi_velocity_to_transition_ms(velocity, max_ms) for velocity in range(MIDI_VELOCITY_MAX + 1))
+
+
+class MidiRoute(NamedTuple):
+    channel: int
+    slot: int
+    device_id: Optional[str]
+    mqtt_topic: Optional[str]
+
+
+class MidiRoutingTable:
+    """Channel->target routes resolved once from MIDI_BULB_IDS.
+
+    Lookups are a tuple index; rebuild the table (build_midi_routing) to pick
+    up a new bulb ID list and swap it in with a single assignment.
+    """
+
+    def __init__(self, bulb_ids: List[str]) -> None:
+        self.bulb_ids = list(bulb_ids)
+        routes: List[Optional[MidiRoute]] = [None] * MIDI_CHANNEL_COUNT
+        for channel in MIDI_ALL_CHANNELS:
+            slot = midi_channel_to_slot(channel)
+            if channel in MIDI_CHANNEL_GROUP_MAP:
+                device_id: Optional[str] = MIDI_CHANNEL_GROUP_MAP[channel]
+            else:
+                device_id = bulb_ids[slot] if slot < len(bulb_ids) else None
+            real_id = device_id if device_id and is_real_device_id(device_id) else None
+            topic = f"zigbee2mqtt/{real_id}/set" if real_id else None
+            routes[channel] = MidiRoute(channel, slot, device_id, topic)
+        self.routes: Tuple[Optional[MidiRoute], ...] = tuple(routes)
+
+    def route(self, channel: int) -> Optional[MidiRoute]:
+        if 0 <= channel < MIDI_CHANNEL_COUNT:
+            return self.routes[channel]
+        return None
+
+    def mapping(self) -> List[Dict[str, Any]]:
+        return [
+            {"channel": route.channel, "slot": route.slot, "device_id": route.device_id}
+            for route in self.routes
+            if route is not None
+        ]
+
+
+def build_midi_routing(raw_ids: Optional[str]) -> MidiRoutingTable:
+    return MidiRoutingTable(normalize_midi_bulb_ids(raw_ids))
+
+
+class MidiSceneBinding(NamedTuple):
+    channel: int
+    note_min: int
+    note_max: int
+    scene_id: str
+
+
+class MidiSceneBindings:
+    """(channel, note) -> scene_id lookup flattened to a 16x128 tuple.
+
+    Bindings take precedence over the channel route, so a whole channel or a
+    note range on it can trigger scenes instead of driving one bulb.
+    """
+
+    def __init__(self, bindings: List[MidiSceneBinding]) -> None:
+        self.bindings = list(bindings)
+        table: List[Optional[str]] = [None] * (MIDI_CHANNEL_COUNT * MIDI_NOTE_COUNT)
+        for binding in self.bindings:
+            for note in range(max(binding.note_min, 0), min(binding.note_max, MIDI_NOTE_COUNT - 1) + 1):
+                table[binding.channel * MIDI_NOTE_COUNT + note] = binding.scene_id
+        self.table: Tuple[Optional[str], ...] = tuple(table)
+
+    def scene_for(self, channel: int, note: Optional[int]) -> Optional[str]:
+        if note is None or not 0 <= channel < MIDI_CHANNEL_COUNT or not 0 <= note < MIDI_NOTE_COUNT:
+            return None
+        return self.table[channel * MIDI_NOTE_COUNT + note]
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+# Compact binary framing for /midi/stream: every event is 4 bytes
+# (event type code, channel, key, value) and one frame may carry several events.
+MIDI_STREAM_FRAME_SIZE = 4
+MIDI_STREAM_EVENT_TYPES: List[str] = ["note_on", "note_off", "control_change"]
+
+
+def decode_midi_frames(data: bytes) -> List[Dict[str, Any]]:
+    if len(data) % MIDI_STREAM_FRAME_SIZE:
+        raise ValueError(f"binary frame length must be a multiple of {MIDI_STREAM_FRAME_SIZE}")
+    events: List[Dict[str, Any]] = []
+    for offset in range(0, len(data), MIDI_STREAM_FRAME_SIZE):
+        code, channel, key, value = data[offset : offset + MIDI_STREAM_FRAME_SIZE]
+        if code >= len(MIDI_STREAM_EVENT_TYPES):
+            raise ValueError(f"unknown event type code {code}")
+        events.append(
+            {
+                "event_type": MIDI_STREAM_EVENT_TYPES[code],
+                "channel": channel,
+                "key": key,
+                "value": value,
+            }
+        )
+    return events
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: pip install zigbee-control-api[fast-json]
+    orjson = None
+
+TOPIC_PREFIX = "zigbee2mqtt/"
+
+# Both accept bytes, so payloads are never decoded to str first.
+loads: Callable[[bytes], Any] = orjson.loads if orjson is not None else json.loads
+
+
+def parse_json_object(payload: bytes) -> Optional[Dict[str, Any]]:
+    """Decode a payload only if it looks like a JSON object; state reports always are."""
+    if not payload or payload.lstrip()[:1] != b"{":
+        return None
+    try:
+        data = loads(payload)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def parse_json(payload: bytes) -> Any:
+    try:
+        return loads(payload)
+    except ValueError:
+        return None
+
+
+def availability_status(payload: bytes) -> str:
+    """Map a `<device>/availability` payload (legacy `online` or `{"state":"online"}`) to a status."""
+    value = payload.strip()
+    if value[:1] == b"{":
+        data = parse_json_object(value)
+        value = str(data.get("state", "")).encode() if data else b""
+    return "available" if value.lower() == b"online" else "unavailable"
+
+
+def availability_from_report(data: Dict[str, Any]) -> Optional[str]:
+    if "availability" not in data:
+        return None
+    return "available" if str(data["availability"]).lower() == "online" else "unavailable"
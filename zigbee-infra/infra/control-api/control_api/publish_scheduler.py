@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+DEFAULT_MAX_RATE_HZ = 10.0
+
+
+class PendingPublish(NamedTuple):
+    payload: Dict[str, Any]
+    source: str
+    trace_id: Optional[str]
+    # Resolved with True/False once the publish carrying this command is acknowledged.
+    waiters: Tuple["Future[bool]", ...] = ()
+    # Pre-encoded payload (scenes); dropped when commands are merged.
+    serialized: Optional[bytes] = None
+
+
+SendFn = Callable[[str, PendingPublish], None]
+
+
+def merge_pending(previous: PendingPublish, item: PendingPublish) -> PendingPublish:
+    """Later fields win; every superseded caller waits on the merged publish.
+
+    A None field means "not set" (DeviceStateRequest sends both state and
+    brightness), so it never overwrites a value from an earlier command.
+    """
+    return PendingPublish(
+        {**previous.payload, **{key: value for key, value in item.payload.items() if value is not None}},
+        item.source,
+        item.trace_id,
+        previous.waiters + item.waiters,
+    )
+
+
+def is_command_topic(topic: str) -> bool:
+    """Only device/group `/set` commands are rate limited; bridge requests go straight out."""
+    return topic.endswith("/set")
+
+
+class TopicRateLimiter:
+    """Caps publishes per topic and keeps only the latest desired state.
+
+    The first command for an idle topic is sent immediately. Commands that
+    arrive before the topic's next slot are merged into one pending payload
+    (later fields win) and sent by a single scheduler thread when the slot
+    opens, so a burst of MIDI brightness changes becomes at most `max_rate_hz`
+    Zigbee commands per device.
+
+    With a `window` semaphore every send must hold a permit, which the caller
+    releases when the broker acknowledges the publish. A command that finds
+    the window full is parked as pending instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        send: SendFn,
+        max_rate_hz: float = DEFAULT_MAX_RATE_HZ,
+        window: Optional[threading.Semaphore] = None,
+    ) -> None:
+        self.send = send
+        self.interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+        self.window = window
+        self.sent = 0
+        self.superseded = 0
+        self._pending: Dict[str, PendingPublish] = {}
+        self._next_allowed: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self) -> None:
+        if (self.enabled or self.window is not None) and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mqtt-rate-limiter", daemon=True)
+            self._thread.start()
+
+    def submit(self, topic: str, item: PendingPublish) -> None:
+        if not self.enabled and self.window is None:
+            self._send(topic, item)
+            return
+
+        now = time.monotonic()
+        with self._condition:
+            pending = self._pending.get(topic)
+            if pending is not None:
+                self._pending[topic] = merge_pending(pending, item)
+                self.superseded += 1
+                return
+            if now < self._next_allowed.get(topic, 0.0) or not self._try_acquire():
+                self._pending[topic] = item
+                self._condition.notify()
+                return
+            self._next_allowed[topic] = now + self.interval
+        self._send(topic, item)
+
+    def _try_acquire(self) -> bool:
+        return self.window is None or self.window.acquire(blocking=False)
+
+    def _send(self, topic: str, item: PendingPublish) -> None:
+        self.send(topic, item)
+        with self._condition:
+            self.sent += 1
+
+    def _take_due(self) -> Optional[Tuple[str, PendingPublish]]:
+        """Pop the pending publish whose slot opened first, waiting until one is due."""
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                due_topic = None
+                wait: Optional[float] = None
+                for topic in self._pending:
+                    delay = self._next_allowed.get(topic, 0.0) - now
+                    if delay <= 0:
+                        due_topic = topic
+                        break
+                    wait = delay if wait is None else min(wait, delay)
+                if due_topic is not None:
+                    pending = self._pending.pop(due_topic)
+                    self._next_allowed[due_topic] = now + self.interval
+                    return due_topic, pending
+                self._condition.wait(wait)
+            return None
+
+    def _run(self) -> None:
+        while True:
+            due = self._take_due()
+            if due is None:
+                return
+            if self.window is not None:
+                self.window.acquire()
+            self._send(*due)
+
+    def flush(self) -> None:
+        """Send every pending publish now, ignoring the rate limit and the window."""
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        for topic, item in pending.items():
+            self._send(topic, item)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self.flush()
+
+    def counters(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "max_rate_hz": 1.0 / self.interval if self.interval else 0.0,
+                "sent": self.sent,
+                "superseded": self.superseded,
+                "pending": len(self._pending),
+            }
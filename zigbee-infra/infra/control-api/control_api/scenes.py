@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from control_api.midi_mapping import (
+    MIDI_CHANNEL_COUNT,
+    MIDI_NOTE_MAX,
+    MIDI_NOTE_MIN,
+    MidiSceneBinding,
+    MidiSceneBindings,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class ScenePublish(NamedTuple):
+    topic: str
+    payload: Dict[str, Any]
+    serialized: bytes
+
+
+class Scene(NamedTuple):
+    scene_id: str
+    name: str
+    publishes: Tuple[ScenePublish, ...]
+    raw: Dict[str, Any]
+
+
+def serialize_payload(payload: Dict[str, Any]) -> bytes:
+    """Same encoding MqttClient uses for ad-hoc publishes."""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def compile_scene(raw: Dict[str, Any]) -> Scene:
+    """Turn a scene definition into ready-to-send topics and payload bytes.
+
+    ```json
+    {"scene_id": "warm", "name": "Warm", "midi": {"channel": 12, "notes": [0, 5]},
+     "commands": [{"target": "all_bulbs", "payload": {"state": "ON", "brightness": 120}}]}
+    ```
+    """
+    scene_id = raw.get("scene_id")
+    if not isinstance(scene_id, str) or not scene_id:
+        raise ValueError("scene_id is required")
+    publishes = []
+    for command in raw.get("commands") or []:
+        target = command.get("target") if isinstance(command, dict) else None
+        payload = command.get("payload") if isinstance(command, dict) else None
+        if not isinstance(target, str) or not target or not isinstance(payload, dict):
+            raise ValueError(f"scene {scene_id}: every command needs a target and a payload object")
+        publishes.append(ScenePublish(f"zigbee2mqtt/{target}/set", payload, serialize_payload(payload)))
+    return Scene(scene_id, raw.get("name") or scene_id, tuple(publishes), raw)
+
+
+def scene_binding(scene: Scene) -> Optional[MidiSceneBinding]:
+    midi = scene.raw.get("midi")
+    if not isinstance(midi, dict):
+        return None
+    channel = midi.get("channel")
+    if not isinstance(channel, int) or not 0 <= channel < MIDI_CHANNEL_COUNT:
+        raise ValueError(f"scene {scene.scene_id}: midi.channel must be 0..{MIDI_CHANNEL_COUNT - 1}")
+    if "notes" in midi:
+        note_min, note_max = midi["notes"]
+    else:
+        note_min = note_max = midi.get("note")
+    if not isinstance(note_min, int) or not isinstance(note_max, int) or note_min > note_max:
+        raise ValueError(f"scene {scene.scene_id}: midi needs a note or a [min, max] notes range")
+    # MidiEventRequest only accepts keys in this range, so a note outside it could never fire.
+    if note_min < MIDI_NOTE_MIN or note_max > MIDI_NOTE_MAX:
+        raise ValueError(f"scene {scene.scene_id}: midi notes must be {MIDI_NOTE_MIN}..{MIDI_NOTE_MAX}")
+    return MidiSceneBinding(channel, note_min, note_max, scene.scene_id)
+
+
+class SceneStore:
+    """Scenes from scenes.json, compiled once per load and swapped in as a whole."""
+
+    def __init__(self, scenes_file: Path) -> None:
+        self.scenes_file = scenes_file
+        self._scenes: Dict[str, Scene] = {}
+        self.bindings = MidiSceneBindings([])
+
+    def load(self) -> None:
+        try:
+            raw_scenes = json.loads(self.scenes_file.read_text())
+        except OSError:
+            raw_scenes = []
+        except json.JSONDecodeError as exc:
+            logger.error("scenes path=%s invalid JSON, keeping previous scenes: %s", self.scenes_file, exc)
+            return
+        try:
+            scenes = [compile_scene(raw) for raw in raw_scenes if isinstance(raw, dict)]
+            bindings = [binding for binding in (scene_binding(scene) for scene in scenes) if binding]
+        except (TypeError, ValueError) as exc:
+            logger.error("scenes path=%s rejected, keeping previous scenes: %s", self.scenes_file, exc)
+            return
+        self._scenes = {scene.scene_id: scene for scene in scenes}
+        self.bindings = MidiSceneBindings(bindings)
+        logger.info("scenes loaded count=%s midi_bindings=%s", len(scenes), len(bindings))
+
+    def all(self) -> List[Scene]:
+        return list(self._scenes.values())
+
+    def get(self, scene_id: str) -> Optional[Scene]:
+        return self._scenes.get(scene_id)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_TICK_HZ = 10.0
+TRANSITION_SOURCE = "transition"
+TRANSITION_MODES = ("native", "interpolate")
+
+PublishFn = Callable[[str, Dict[str, Any], str, Optional[str]], Any]
+
+
+class Transition(NamedTuple):
+    start: int
+    target: int
+    started_at: float
+    duration: float
+    trace_id: Optional[str]
+
+
+def native_transition_payload(brightness: int, duration_ms: int) -> Dict[str, Any]:
+    """Let Zigbee2MQTT/the bulb fade: one command with `transition` in seconds."""
+    payload: Dict[str, Any] = {"brightness": brightness}
+    if duration_ms > 0:
+        payload["transition"] = round(duration_ms / 1000, 3)
+    return payload
+
+
+class TransitionEngine:
+    """Interpolates brightness fades on one scheduler thread.
+
+    Active fades are advanced together once per tick (at most `tick_hz`), and
+    a command is published only when a fade's rounded brightness changes. A new
+    fade for the same topic replaces the running one; `cancel` drops it when a
+    direct command takes over the device.
+    """
+
+    def __init__(self, publish: PublishFn, tick_hz: float = DEFAULT_TICK_HZ) -> None:
+        self.publish = publish
+        self.tick = 1.0 / max(tick_hz, 0.1)
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.published = 0
+        self._active: Dict[str, Transition] = {}
+        self._last_sent: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="transition-engine", daemon=True)
+            self._thread.start()
+
+    def begin(self, topic: str, start: int, target: int, duration_ms: int, trace_id: Optional[str] = None) -> None:
+        if duration_ms <= 0 or start == target:
+            self.cancel(topic)
+            self.publish(topic, {"brightness": target}, TRANSITION_SOURCE, trace_id)
+            return
+        with self._condition:
+            if topic in self._active:
+                self.cancelled += 1
+            self._active[topic] = Transition(start, target, time.monotonic(), duration_ms / 1000, trace_id)
+            self._last_sent.pop(topic, None)
+            self.started += 1
+            self._condition.notify()
+
+    def cancel(self, topic: str) -> None:
+        if topic not in self._active:
+            return
+        with self._condition:
+            if self._active.pop(topic, None) is not None:
+                self._last_sent.pop(topic, None)
+                self.cancelled += 1
+
+    def _advance(self) -> List[Tuple[str, int, Optional[str]]]:
+        """Compute this tick's commands and retire finished fades."""
+        now = time.monotonic()
+        commands = []
+        with self._condition:
+            for topic, transition in list(self._active.items()):
+                progress = min((now - transition.started_at) / transition.duration, 1.0)
+                value = round(transition.start + (transition.target - transition.start) * progress)
+                if progress >= 1.0:
+                    del self._active[topic]
+                    self.completed += 1
+                    if self._last_sent.pop(topic, None) == value:
+                        continue
+                elif self._last_sent.get(topic) == value:
+                    continue
+                else:
+                    self._last_sent[topic] = value
+                commands.append((topic, value, transition.trace_id))
+            self.published += len(commands)
+        return commands
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._active and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            tick_started = time.monotonic()
+            for topic, value, trace_id in self._advance():
+                self.publish(topic, {"brightness": value}, TRANSITION_SOURCE, trace_id)
+            time.sleep(max(self.tick - (time.monotonic() - tick_started), 0.0))
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def counters(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "tick_hz": 1.0 / self.tick,
+                "active": len(self._active),
+                "started": self.started,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "published": self.published,
+            }
@@ -0,0 +1,99 @@
+import json
+from concurrent.futures import Future
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from control_api import main
+from control_api.device_registry import DeviceRegistry
+
+DEVICES = [
+    {"ieee_address": "0x01", "friendly_name": "kitchen", "definition": {"model": "LED1623G12"}},
+    {"ieee_address": "0x02", "friendly_name": "hall"},
+    "not a device",
+]
+
+
+def write_devices(path: Path, devices) -> None:
+    path.write_text(json.dumps(devices))
+
+
+def test_lookup_by_ieee_address_and_friendly_name(tmp_path) -> None:
+    devices_file = tmp_path / "devices.json"
+    write_devices(devices_file, DEVICES)
+    registry = DeviceRegistry(devices_file, poll_seconds=0)
+    registry.start()
+
+    assert len(registry.all()) == 2
+    assert registry.get("0x01") is registry.get("kitchen")
+    assert registry.get("hall")["ieee_address"] == "0x02"
+    assert registry.get("cellar") is None
+
+
+def test_reloads_only_when_the_file_changes(tmp_path) -> None:
+    devices_file = tmp_path / "devices.json"
+    write_devices(devices_file, DEVICES)
+    registry = DeviceRegistry(devices_file, poll_seconds=0)
+    registry.start()
+
+    assert not registry.refresh_from_file()
+
+    write_devices(devices_file, [*DEVICES, {"ieee_address": "0x03", "friendly_name": "porch"}])
+    assert registry.refresh_from_file()
+    assert registry.get("porch")["ieee_address"] == "0x03"
+
+
+def test_half_written_file_keeps_the_previous_index(tmp_path) -> None:
+    devices_file = tmp_path / "devices.json"
+    write_devices(devices_file, DEVICES)
+    registry = DeviceRegistry(devices_file, poll_seconds=0)
+    registry.start()
+
+    devices_file.write_text('[{"ieee_address": "0x0')
+
+    assert not registry.refresh_from_file()
+    assert registry.get("kitchen") is not None
+
+
+def test_bridge_devices_replace_the_index(tmp_path) -> None:
+    registry = DeviceRegistry(tmp_path / "missing.json", poll_seconds=0)
+    registry.start()
+    assert registry.all() == []
+
+    registry.load_bridge_devices([{"ieee_address": "0x09", "friendly_name": "loft"}])
+    registry.load_bridge_devices({"not": "a list"})
+
+    assert [device["friendly_name"] for device in registry.all()] == ["loft"]
+    assert registry.get("0x09") is registry.get("loft")
+
+
+def test_device_endpoints_do_not_read_the_file(tmp_path, monkeypatch) -> None:
+    devices_file = tmp_path / "devices.json"
+    write_devices(devices_file, DEVICES)
+    registry = DeviceRegistry(devices_file, poll_seconds=0)
+    registry.start()
+    monkeypatch.setattr(main, "device_registry", registry)
+
+    published = []
+
+    def publish_json(topic, payload, source="unknown", trace_id=None):
+        published.append(topic)
+        receipt: "Future[bool]" = Future()
+        receipt.set_result(True)
+        return receipt
+
+    monkeypatch.setattr(main.mqtt_client, "publish_json", publish_json)
+
+    def no_disk(*_args, **_kwargs):
+        raise AssertionError("request handler touched the disk")
+
+    monkeypatch.setattr(Path, "read_text", no_disk)
+    monkeypatch.setattr(Path, "stat", no_disk)
+    client = TestClient(main.app)
+
+    assert client.get("/devices/kitchen").json()["device_id"] == "0x01"
+    assert client.get("/devices/0x02").json()["friendly_name"] == "hall"
+    assert client.get("/devices/cellar").status_code == 404
+    assert client.post("/devices/kitchen/state", json={"state": "ON"}).json()["device_id"] == "0x01"
+    assert client.post("/devices/kitchen/refresh").json()["device_id"] == "0x01"
+    assert published == ["zigbee2mqtt/kitchen/set", "zigbee2mqtt/bridge/request/device/refresh"]
@@ -0,0 +1,45 @@
+from control_api.device_shadow import DeviceShadow
+
+
+def test_matches_reported_state() -> None:
+    shadow = DeviceShadow()
+    shadow.apply_reported("bulb", {"state": "ON", "brightness": 120, "linkquality": 80})
+
+    assert shadow.matches("bulb", {"state": "ON", "brightness": None})
+    assert shadow.matches("bulb", {"brightness": 120, "transition": 0.5})
+    assert not shadow.matches("bulb", {"brightness": 10})
+    assert not shadow.matches("unknown", {"state": "ON"})
+    assert "linkquality" not in shadow.get("bulb")
+
+
+def test_optimistic_value_is_read_but_never_skips() -> None:
+    shadow = DeviceShadow()
+    shadow.apply_reported("bulb", {"state": "OFF"})
+    shadow.apply_desired(["bulb"], {"state": "ON", "brightness": None})
+
+    assert shadow.get("bulb") == {"state": "ON"}
+    # The ON publish may have been lost; asking again must send it again.
+    assert not shadow.matches("bulb", {"state": "ON"})
+
+    shadow.apply_reported("bulb", {"state": "ON"})
+    assert shadow.matches("bulb", {"state": "ON"})
+
+
+def test_pending_command_blocks_skip_back_to_reported_state() -> None:
+    shadow = DeviceShadow()
+    shadow.apply_reported("bulb", {"state": "ON"})
+    shadow.apply_desired(["bulb"], {"state": "OFF"})
+
+    # An OFF is in flight, so ON has to be published even though the bulb last reported ON.
+    assert not shadow.matches("bulb", {"state": "ON"})
+
+
+def test_load_state_file_seeds_reported_state(tmp_path) -> None:
+    state_file = tmp_path / "state.json"
+    state_file.write_text('{"Kitchen": {"state": "ON"}, "bad": 3}')
+    shadow = DeviceShadow()
+
+    shadow.load_state_file(state_file, lambda name: name.lower())
+
+    assert shadow.matches("kitchen", {"state": "ON"})
+    assert shadow.counters()["devices"] == 1
@@ -0,0 +1,61 @@
+from typing import List, Tuple
+
+from control_api.group_fanout import GroupFanout, bridge_groups_to_members
+from control_api.publish_scheduler import PendingPublish
+
+
+def make_fanout() -> Tuple[GroupFanout, List[Tuple[str, PendingPublish]]]:
+    sent: List[Tuple[str, PendingPublish]] = []
+    fanout = GroupFanout(lambda topic, item: sent.append((topic, item)), window_ms=5)
+    return fanout, sent
+
+
+def command(device_id: str, brightness: int) -> Tuple[str, PendingPublish]:
+    return f"zigbee2mqtt/{device_id}/set", PendingPublish({"brightness": brightness}, "test", None, (device_id,))
+
+
+def test_dispatch_folds_same_payload_into_largest_group() -> None:
+    fanout, sent = make_fanout()
+    fanout.set_groups("zigbee2mqtt", {"all": ["a", "b", "c"], "pair": ["a", "b"]})
+
+    fanout._dispatch({device: command(device, 100) for device in ("a", "b", "c")})
+
+    assert [topic for topic, _item in sent] == ["zigbee2mqtt/all/set"]
+    assert sorted(sent[0][1].waiters) == ["a", "b", "c"]
+    assert fanout.counters()["saved_commands"] == 2
+
+
+def test_dispatch_sends_leftovers_and_different_payloads_per_device() -> None:
+    fanout, sent = make_fanout()
+    fanout.set_groups("zigbee2mqtt", {"pair": ["a", "b"]})
+
+    fanout._dispatch({"a": command("a", 100), "b": command("b", 100), "c": command("c", 100), "d": command("d", 5)})
+
+    assert sorted(topic for topic, _item in sent) == [
+        "zigbee2mqtt/c/set",
+        "zigbee2mqtt/d/set",
+        "zigbee2mqtt/pair/set",
+    ]
+    counters = fanout.counters()
+    assert counters["group_commands"] == 1
+    assert counters["device_commands"] == 2
+
+
+def test_local_groups_resolve_members_but_are_not_folded_into() -> None:
+    fanout, sent = make_fanout()
+    fanout.set_groups("local", {"desk": ["a", "b"]}, fold=False)
+
+    assert fanout.group_members("desk") == frozenset({"a", "b"})
+    assert not fanout.submit(*command("a", 100))
+
+    fanout._dispatch({"a": command("a", 100), "b": command("b", 100)})
+    assert sorted(topic for topic, _item in sent) == ["zigbee2mqtt/a/set", "zigbee2mqtt/b/set"]
+
+
+def test_bridge_groups_are_fold_targets() -> None:
+    fanout, _sent = make_fanout()
+    raw = [{"friendly_name": "desk", "members": [{"ieee_address": "a"}, {"ieee_address": "b"}]}, {"id": 3}]
+    fanout.set_groups("zigbee2mqtt", bridge_groups_to_members(raw))
+
+    assert fanout.submit(*command("a", 100))
+    assert fanout.counters()["known_groups"] == 1
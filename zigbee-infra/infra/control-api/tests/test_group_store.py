@@ -0,0 +1,90 @@
+import json
+import threading
+
+from control_api import group_store
+from control_api.group_store import GroupStore
+
+
+def group(name: str) -> dict:
+    return {"group_id": name, "name": name.title(), "device_ids": ["a", "b"]}
+
+
+def test_add_rejects_duplicate_id_or_name(tmp_path) -> None:
+    store = GroupStore(tmp_path / "groups.json", save_debounce=60)
+
+    assert store.add(group("desk"))
+    assert not store.add(group("desk"))
+    assert not store.add({"group_id": "other", "name": "Desk"})
+    assert store.get("Desk")["group_id"] == "desk"
+
+
+def test_burst_of_adds_is_saved_once_on_flush(tmp_path, monkeypatch) -> None:
+    writes = []
+    real_write = group_store.write_json_atomic
+    monkeypatch.setattr(
+        group_store, "write_json_atomic", lambda path, data: (writes.append(data), real_write(path, data))
+    )
+    store = GroupStore(tmp_path / "groups.json", save_debounce=60)
+    for name in ("desk", "hall", "loft"):
+        store.add(group(name))
+
+    store.flush()
+    store.flush()
+
+    assert len(writes) == 1
+    reloaded = GroupStore(tmp_path / "groups.json")
+    reloaded.load()
+    assert [g["group_id"] for g in reloaded.all()] == ["desk", "hall", "loft"]
+
+
+def test_concurrent_flushes_land_the_newest_snapshot(tmp_path, monkeypatch) -> None:
+    first_write_started = threading.Event()
+    release_first_write = threading.Event()
+    real_write = group_store.write_json_atomic
+
+    def slow_first_write(path, data):
+        if not first_write_started.is_set():
+            first_write_started.set()
+            release_first_write.wait(2)
+        real_write(path, data)
+
+    monkeypatch.setattr(group_store, "write_json_atomic", slow_first_write)
+    store = GroupStore(tmp_path / "groups.json", save_debounce=60)
+    store.add(group("desk"))
+    old = threading.Thread(target=store.flush)
+    old.start()
+    assert first_write_started.wait(2)
+
+    store.add(group("hall"))
+    new = threading.Thread(target=store.flush)
+    new.start()
+    # Give the newer flush time to finish first if nothing holds it back.
+    new.join(0.2)
+    release_first_write.set()
+    old.join(2)
+    new.join(2)
+
+    saved = json.loads((tmp_path / "groups.json").read_text())
+    assert [g["group_id"] for g in saved] == ["desk", "hall"]
+
+
+def test_failed_save_is_rescheduled(tmp_path, monkeypatch) -> None:
+    saved = threading.Event()
+    attempts = []
+    real_write = group_store.write_json_atomic
+
+    def flaky_write(path, data):
+        attempts.append(len(data))
+        if len(attempts) == 1:
+            raise OSError("disk full")
+        real_write(path, data)
+        saved.set()
+
+    monkeypatch.setattr(group_store, "write_json_atomic", flaky_write)
+    store = GroupStore(tmp_path / "groups.json", save_debounce=0.01)
+    store.add(group("desk"))
+    store.flush()
+
+    assert saved.wait(2)
+    assert attempts == [1, 1]
+    assert json.loads((tmp_path / "groups.json").read_text())[0]["group_id"] == "desk"
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from control_api import main
+from control_api.metrics import API_STAGES, ApiMetrics
+from control_api.midi_mapping import build_midi_routing
+
+
+def test_midi_events_feed_stage_percentiles_and_echo_the_trace_id(monkeypatch) -> None:
+    monkeypatch.setattr(main, "api_metrics", ApiMetrics())
+    monkeypatch.setattr(main, "midi_routing", build_midi_routing("bulb_a,bulb_b,bulb_c"))
+    client = main.MqttClient()
+    monkeypatch.setattr(client.client, "publish", lambda *_args, **_kwargs: SimpleNamespace(rc=0, mid=1))
+    monkeypatch.setattr(main, "mqtt_client", client)
+    api = TestClient(main.app)
+
+    sent_at = (datetime.now(timezone.utc) - timedelta(milliseconds=200)).isoformat()
+    responses = [
+        api.post(
+            "/midi/events",
+            json={"channel": channel, "key": 17, "timestamp": sent_at},
+            headers={"X-Trace-Id": f"trace-{channel}"},
+        )
+        for channel in range(3)
+    ]
+
+    assert [response.json()["trace_id"] for response in responses] == ["trace-0", "trace-1", "trace-2"]
+    stages = api.get("/metrics").json()["stages"]
+    assert set(stages) == set(API_STAGES)
+    for stage in API_STAGES:
+        summary = stages[stage]
+        assert summary["count"] == 3
+        assert 0 <= summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+    assert stages["transit"]["p50_ms"] >= 190
@@ -0,0 +1,17 @@
+from fastapi.testclient import TestClient
+
+from control_api import main
+
+
+def test_batch_reports_non_object_items_per_item() -> None:
+    client = TestClient(main.app)
+
+    response = client.post("/midi/events:batch", json=[1, "note", None, {"channel": 14, "key": 3}])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["accepted"] == 0
+    assert body["failed"] == 4
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3]
+    assert all(result["status"] == "error" for result in body["results"])
+    assert "outside mapped range" in body["results"][3]["message"]
@@ -0,0 +1,93 @@
+from concurrent.futures import Future
+
+import pytest
+from fastapi.testclient import TestClient
+
+from control_api import main
+from control_api.midi_mapping import (
+    DEFAULT_MIDI_BULB_ID_MAP,
+    MIDI_NOTE_COUNT,
+    MIDI_NOTE_MAX,
+    NOTE_BRIGHTNESS_TABLE,
+    UNMAPPED_DEVICE_ID,
+    build_midi_routing,
+    midi_channel_to_device_id,
+    midi_note_to_brightness,
+    normalize_midi_bulb_ids,
+)
+
+
+def test_ids_are_trimmed_and_padded_to_ten_channels() -> None:
+    assert normalize_midi_bulb_ids(" a , b ,,") == ["a", "b"] + [UNMAPPED_DEVICE_ID] * 8
+    assert normalize_midi_bulb_ids(",".join(str(index) for index in range(12))) == [str(i) for i in range(10)]
+    assert normalize_midi_bulb_ids(None)[0] == DEFAULT_MIDI_BULB_ID_MAP[0]
+    assert normalize_midi_bulb_ids("")[9] == UNMAPPED_DEVICE_ID
+
+
+def test_routes_carry_preformatted_topics() -> None:
+    routing = build_midi_routing("bulb_a,NONE,bulb_c")
+
+    assert routing.route(0).mqtt_topic == "zigbee2mqtt/bulb_a/set"
+    assert routing.route(1).device_id == UNMAPPED_DEVICE_ID and routing.route(1).mqtt_topic is None
+    assert routing.route(10).mqtt_topic == "zigbee2mqtt/all_bulbs/set"
+    assert routing.route(11).mqtt_topic == "zigbee2mqtt/except_ceiling/set"
+    assert routing.route(12) is None and routing.route(16) is None
+    # The table agrees with the per-call lookup it replaced.
+    for channel in range(12):
+        route = routing.route(channel)
+        expected = midi_channel_to_device_id(channel, "bulb_a,NONE,bulb_c")
+        assert (route.mqtt_topic is None) == (expected is None)
+
+
+def test_note_table_matches_the_step_formula() -> None:
+    assert len(NOTE_BRIGHTNESS_TABLE) == MIDI_NOTE_COUNT
+    for note in range(MIDI_NOTE_MAX + 1):
+        assert NOTE_BRIGHTNESS_TABLE[note] == midi_note_to_brightness(note)
+    assert (NOTE_BRIGHTNESS_TABLE[0], NOTE_BRIGHTNESS_TABLE[MIDI_NOTE_MAX]) == (1, 254)
+    assert set(NOTE_BRIGHTNESS_TABLE[MIDI_NOTE_MAX:]) == {254}
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    # Keep the module's routing table; the tests below swap it.
+    monkeypatch.setattr(main, "midi_routing", main.midi_routing)
+
+    def publish_json(topic, payload, source="unknown", trace_id=None):
+        receipt: "Future[bool]" = Future()
+        receipt.set_result(True)
+        return receipt
+
+    monkeypatch.setattr(main.mqtt_client, "publish_json", publish_json)
+    return TestClient(main.app)
+
+
+def test_reload_swaps_routes_for_midi_events(client) -> None:
+    mapping = client.post("/midi/mapping/reload", json={"bulb_ids": ["left", "right"]}).json()
+    assert [item["device_id"] for item in mapping[:3]] == ["left", "right", UNMAPPED_DEVICE_ID]
+
+    event = client.post("/midi/events", json={"event_type": "note_on", "channel": 1, "key": 17}).json()
+    assert event["mqtt_topic"] == "zigbee2mqtt/right/set"
+    assert event["mqtt_payload"] == {"brightness": 254}
+
+    unmapped = client.post("/midi/events", json={"event_type": "note_on", "channel": 2, "key": 3})
+    assert unmapped.status_code == 400
+
+
+@pytest.mark.parametrize("bulb_ids", [[], ["", " "]])
+def test_reload_rejects_an_empty_id_list(client, bulb_ids) -> None:
+    before = main.midi_routing
+
+    response = client.post("/midi/mapping/reload", json={"bulb_ids": bulb_ids})
+
+    assert response.status_code == 400
+    assert main.midi_routing is before
+
+
+def test_sighup_reload_rereads_the_environment(client, monkeypatch) -> None:
+    monkeypatch.setattr(main, "MIDI_BULB_IDS_FILE", None)
+    monkeypatch.setenv("MIDI_BULB_IDS", "from_env")
+    monkeypatch.setattr(main.scene_store, "load", lambda: None)
+
+    main.reload_from_disk()
+
+    assert main.midi_routing.route(0).mqtt_topic == "zigbee2mqtt/from_env/set"
@@ -0,0 +1,79 @@
+from concurrent.futures import Future
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from control_api import main
+from control_api.midi_stream import decode_midi_frames
+
+
+def test_decode_several_events_per_frame() -> None:
+    assert decode_midi_frames(bytes((0, 1, 17, 100, 1, 1, 17, 0))) == [
+        {"event_type": "note_on", "channel": 1, "key": 17, "value": 100},
+        {"event_type": "note_off", "channel": 1, "key": 17, "value": 0},
+    ]
+    assert decode_midi_frames(b"") == []
+
+
+@pytest.mark.parametrize("data", [bytes((0, 1, 17)), bytes((0, 1, 17, 100, 2)), bytes((9, 1, 17, 100))])
+def test_decode_rejects_partial_frames_and_unknown_codes(data) -> None:
+    with pytest.raises(ValueError):
+        decode_midi_frames(data)
+
+
+@pytest.fixture
+def published(monkeypatch) -> List[str]:
+    topics: List[str] = []
+
+    def publish_json(topic, payload, source="unknown", trace_id=None):
+        topics.append(topic)
+        receipt: "Future[bool]" = Future()
+        receipt.set_result(True)
+        return receipt
+
+    monkeypatch.setattr(main.mqtt_client, "publish_json", publish_json)
+    return topics
+
+
+def test_acked_binary_frame_gets_one_result_per_event(published) -> None:
+    with TestClient(main.app).websocket_connect("/midi/stream?ack=true") as websocket:
+        websocket.send_bytes(bytes((0, 10, 17, 100, 0, 14, 3, 100)))
+        first, second = websocket.receive_json(), websocket.receive_json()
+
+    assert first["status"] == "ok" and first["mqtt_topic"] == "zigbee2mqtt/all_bulbs/set"
+    assert second["status"] == "error" and "outside mapped range" in second["message"]
+    assert published == ["zigbee2mqtt/all_bulbs/set"]
+
+
+def test_acked_json_array_frame(published) -> None:
+    events = [
+        {"event_type": "note_on", "channel": 10, "key": 0, "trace_id": "t-1"},
+        {"event_type": "note_off", "channel": 11},
+        "not an event",
+    ]
+    with TestClient(main.app).websocket_connect("/midi/stream?ack=true") as websocket:
+        websocket.send_json(events)
+        results = [websocket.receive_json() for _ in events]
+
+    assert [result["status"] for result in results] == ["ok", "ok", "error"]
+    assert results[1]["brightness"] == 0
+    assert published == ["zigbee2mqtt/all_bulbs/set", "zigbee2mqtt/except_ceiling/set"]
+
+
+def test_malformed_frames_are_answered_and_the_stream_continues(published) -> None:
+    with TestClient(main.app).websocket_connect("/midi/stream") as websocket:
+        # Without ack, accepted events get no reply; the next reply is the decode error.
+        websocket.send_bytes(bytes((0, 10, 17, 100)))
+        websocket.send_bytes(bytes((0, 10, 17)))
+        partial = websocket.receive_json()
+        websocket.send_text("{not json")
+        malformed = websocket.receive_json()
+        websocket.send_json({"event_type": "note_on", "channel": 11, "key": 5})
+        websocket.send_bytes(bytes((7, 0, 0, 0)))
+        unknown = websocket.receive_json()
+
+    assert partial["status"] == "error" and "multiple of 4" in partial["message"]
+    assert malformed["status"] == "error"
+    assert unknown["status"] == "error" and "unknown event type" in unknown["message"]
+    assert published == ["zigbee2mqtt/all_bulbs/set", "zigbee2mqtt/except_ceiling/set"]
@@ -0,0 +1,133 @@
+from typing import List, Tuple
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from control_api import main
+from control_api.publish_scheduler import PendingPublish
+
+
+class FakePaho:
+    """Stands in for paho's publish(): hands out the queued mids and return codes."""
+
+    def __init__(self) -> None:
+        self.results: List[Tuple[int, int]] = []
+        self.sent: List[str] = []
+
+    def publish(self, topic: str, payload, qos: int = 0) -> mqtt.MQTTMessageInfo:
+        mid, rc = self.results.pop(0)
+        info = mqtt.MQTTMessageInfo(mid)
+        info.rc = rc
+        self.sent.append(topic)
+        return info
+
+
+@pytest.fixture
+def client(monkeypatch):
+    mqtt_client = main.MqttClient()
+    fake = FakePaho()
+    monkeypatch.setattr(mqtt_client.client, "publish", fake.publish)
+    mqtt_client.fake = fake
+    return mqtt_client
+
+
+def publish(client: main.MqttClient, mid: int, rc: int = mqtt.MQTT_ERR_SUCCESS):
+    """Publish like the rate limiter does: take a window permit, then hand off."""
+    client.fake.results.append((mid, rc))
+    assert client.window.acquire(blocking=False)
+    receipt = main.Future()
+    client._publish_now("zigbee2mqtt/bulb/set", PendingPublish({"brightness": 1}, "test", None, (receipt,)))
+    return receipt
+
+
+def free_permits(client: main.MqttClient) -> int:
+    permits = 0
+    while client.window.acquire(blocking=False):
+        permits += 1
+    for _ in range(permits):
+        client.window.release()
+    return permits
+
+
+def test_ack_releases_permit_and_resolves_receipt(client) -> None:
+    receipt = publish(client, 1)
+    assert not receipt.done()
+    assert client.publish_counters()["inflight"] == 1
+
+    client._on_publish(None, None, 1)
+
+    assert receipt.result(timeout=1) is True
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT
+    assert client.publish_counters()["acked"] == 1
+
+
+def test_ack_before_publish_returns_is_not_lost(client) -> None:
+    client._on_publish(None, None, 2)
+    receipt = publish(client, 2)
+
+    assert receipt.result(timeout=1) is True
+    assert client.publish_counters()["inflight"] == 0
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT
+
+
+def test_failed_qos0_mid_does_not_swallow_ack_after_wrap(client, monkeypatch) -> None:
+    monkeypatch.setattr(main, "MQTT_QOS", 0)
+    failed = publish(client, 7, mqtt.MQTT_ERR_NO_CONN)
+    assert failed.result(timeout=1) is False
+
+    # paho wrapped its mid counter and reused 7 for a publish that went out.
+    receipt = publish(client, 7)
+    client._on_publish(None, None, 7)
+
+    assert receipt.result(timeout=1) is True
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT
+    assert client.publish_counters()["failed"] == 1
+
+
+def test_failed_qos1_publish_ignores_late_ack(client, monkeypatch) -> None:
+    monkeypatch.setattr(main, "MQTT_QOS", 1)
+    failed = publish(client, 3, mqtt.MQTT_ERR_NO_CONN)
+    assert failed.result(timeout=1) is False
+
+    # paho resends the queued QoS 1 message after reconnecting and acks it.
+    client._on_publish(None, None, 3)
+    receipt = publish(client, 4)
+    client._on_publish(None, None, 4)
+
+    assert receipt.result(timeout=1) is True
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT
+
+
+def test_disconnect_fails_inflight_and_returns_permits(client) -> None:
+    receipts = [publish(client, mid) for mid in (10, 11, 12)]
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT - 3
+
+    client._on_disconnect(None, None, mqtt.MQTT_ERR_CONN_LOST)
+
+    assert [receipt.result(timeout=1) for receipt in receipts] == [False, False, False]
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT
+    counters = client.publish_counters()
+    assert counters["inflight"] == 0
+    assert counters["failed"] == 3
+
+    # After the reconnect the same mids are handed out again and acked normally.
+    receipt = publish(client, 10)
+    client._on_publish(None, None, 10)
+    assert receipt.result(timeout=1) is True
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT
+
+
+def test_publish_racing_a_disconnect_is_settled(client, monkeypatch) -> None:
+    real_publish = client.fake.publish
+
+    def publish_then_drop(topic, payload, qos=0):
+        info = real_publish(topic, payload, qos)
+        client._on_disconnect(None, None, mqtt.MQTT_ERR_CONN_LOST)
+        return info
+
+    monkeypatch.setattr(client.client, "publish", publish_then_drop)
+    receipt = publish(client, 20)
+
+    assert receipt.result(timeout=1) is False
+    assert client.publish_counters()["inflight"] == 0
+    assert free_permits(client) == main.MQTT_MAX_INFLIGHT
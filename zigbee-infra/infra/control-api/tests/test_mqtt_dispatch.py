@@ -0,0 +1,100 @@
+import json
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from control_api import main
+from control_api.device_registry import DeviceRegistry
+from control_api.device_shadow import DeviceShadow
+from control_api.mqtt_messages import availability_status
+
+
+def message(topic: str, payload) -> SimpleNamespace:
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload).encode()
+    return SimpleNamespace(topic=topic, payload=payload)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch) -> main.MqttClient:
+    monkeypatch.setattr(main, "device_registry", DeviceRegistry(tmp_path / "devices.json", poll_seconds=0))
+    monkeypatch.setattr(main, "device_shadow", DeviceShadow())
+    return main.MqttClient()
+
+
+@pytest.fixture
+def parsed(monkeypatch) -> List[bytes]:
+    calls: List[bytes] = []
+    for name in ("parse_json", "parse_json_object"):
+        real = getattr(main, name)
+
+        def spy(payload, real=real):
+            calls.append(payload)
+            return real(payload)
+
+        monkeypatch.setattr(main, name, spy)
+    return calls
+
+
+def test_unrelated_topics_are_not_parsed(client, parsed) -> None:
+    for topic in (
+        "homeassistant/light/config",
+        "zigbee2mqtt/bulb/set",
+        "zigbee2mqtt/bulb/get",
+        "zigbee2mqtt/bridge/state",
+        "zigbee2mqtt/bridge/logging",
+        "zigbee2mqtt/bridge/response/device/refresh",
+    ):
+        client._on_message(None, None, message(topic, {"state": "ON"}))
+
+    assert parsed == []
+    assert client.status_map == {}
+
+
+def test_availability_replaces_the_status_map(client) -> None:
+    client._on_message(None, None, message("zigbee2mqtt/bulb/availability", b"online"))
+    before = client.status_map
+
+    client._on_message(None, None, message("zigbee2mqtt/bulb/availability", {"state": "offline"}))
+
+    assert before == {"bulb": "available"}
+    assert client.status_map == {"bulb": "unavailable"}
+    assert client.get_status("bulb") == "unavailable"
+
+    unchanged = client.status_map
+    client._on_message(None, None, message("zigbee2mqtt/bulb/availability", b"offline"))
+    assert client.status_map is unchanged
+
+
+@pytest.mark.parametrize(
+    "payload, status",
+    [(b"online", "available"), (b" ONLINE ", "available"), (b'{"state":"online"}', "available"), (b"{", "unavailable")],
+)
+def test_availability_payloads(payload, status) -> None:
+    assert availability_status(payload) == status
+
+
+def test_state_report_feeds_shadow_and_availability(client) -> None:
+    main.device_registry.load_bridge_devices([{"ieee_address": "0x01", "friendly_name": "kitchen"}])
+
+    client._on_message(None, None, message("zigbee2mqtt/kitchen", {"state": "ON", "availability": "online"}))
+    client._on_message(None, None, message("zigbee2mqtt/kitchen", b"not json"))
+
+    assert client.get_status("kitchen") == "available"
+    assert main.device_shadow.get("0x01") == {"state": "ON"}
+
+
+def test_bridge_topics_reach_registry_and_fanout(client) -> None:
+    devices = [
+        {"ieee_address": "0x01", "friendly_name": "kitchen"},
+        {"ieee_address": "0x02", "friendly_name": "hall"},
+    ]
+    groups = [{"friendly_name": "downstairs", "members": [{"ieee_address": "0x01"}, {"ieee_address": "0x02"}]}]
+
+    client._on_message(None, None, message("zigbee2mqtt/bridge/devices", devices))
+    client._on_message(None, None, message("zigbee2mqtt/bridge/groups", groups))
+
+    assert main.device_registry.get("hall")["ieee_address"] == "0x02"
+    assert client.fanout.group_members("downstairs") == frozenset({"0x01", "0x02"})
+    assert client.fanout.counters()["known_groups"] == 1
@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from control_api.publish_scheduler import PendingPublish, TopicRateLimiter, merge_pending
+
+
+def test_merge_keeps_fields_the_later_command_leaves_unset() -> None:
+    first = PendingPublish({"state": "ON", "brightness": None}, "device_state", None)
+    second = PendingPublish({"state": None, "brightness": 100}, "device_state", "trace-2")
+
+    merged = merge_pending(first, second)
+
+    assert merged.payload == {"state": "ON", "brightness": 100}
+    assert merged.trace_id == "trace-2"
+
+
+def test_merge_later_value_wins() -> None:
+    first = PendingPublish({"brightness": 10}, "midi_event", None)
+    second = PendingPublish({"brightness": 200, "transition": 0.5}, "midi_event", None)
+
+    assert merge_pending(first, second).payload == {"brightness": 200, "transition": 0.5}
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.sent: List[Tuple[str, Dict[str, Any]]] = []
+
+    def __call__(self, topic: str, item: PendingPublish) -> None:
+        self.sent.append((topic, item.payload))
+
+    def wait(self, count: int, timeout: float = 2.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while len(self.sent) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return len(self.sent) >= count
+
+
+def test_first_command_goes_out_and_burst_is_merged_into_one() -> None:
+    send = Recorder()
+    limiter = TopicRateLimiter(send, max_rate_hz=20)
+    limiter.start()
+    try:
+        limiter.submit("zigbee2mqtt/bulb/set", PendingPublish({"brightness": 1}, "midi", None))
+        limiter.submit("zigbee2mqtt/bulb/set", PendingPublish({"brightness": 2}, "midi", None))
+        limiter.submit("zigbee2mqtt/bulb/set", PendingPublish({"state": "ON", "brightness": 3}, "midi", None))
+        limiter.submit("zigbee2mqtt/other/set", PendingPublish({"brightness": 9}, "midi", None))
+
+        assert send.sent == [("zigbee2mqtt/bulb/set", {"brightness": 1}), ("zigbee2mqtt/other/set", {"brightness": 9})]
+        assert send.wait(3)
+        assert send.sent[2] == ("zigbee2mqtt/bulb/set", {"state": "ON", "brightness": 3})
+        assert limiter.counters()["superseded"] == 1
+    finally:
+        limiter.close()
+
+
+def test_full_window_parks_command_until_a_permit_is_released() -> None:
+    send = Recorder()
+    window = threading.Semaphore(1)
+    limiter = TopicRateLimiter(send, max_rate_hz=0, window=window)
+    limiter.start()
+    try:
+        limiter.submit("zigbee2mqtt/a/set", PendingPublish({"brightness": 1}, "midi", None))
+        limiter.submit("zigbee2mqtt/b/set", PendingPublish({"brightness": 2}, "midi", None))
+        limiter.submit("zigbee2mqtt/b/set", PendingPublish({"brightness": 3}, "midi", None))
+
+        assert send.sent == [("zigbee2mqtt/a/set", {"brightness": 1})]
+        assert limiter.counters()["pending"] == 1
+
+        window.release()  # the broker acked the first publish
+        assert send.wait(2)
+        assert send.sent[1] == ("zigbee2mqtt/b/set", {"brightness": 3})
+    finally:
+        limiter.close()
+
+
+def test_close_flushes_pending_commands() -> None:
+    send = Recorder()
+    limiter = TopicRateLimiter(send, max_rate_hz=0.1)
+    limiter.start()
+    limiter.submit("zigbee2mqtt/bulb/set", PendingPublish({"brightness": 1}, "midi", None))
+    limiter.submit("zigbee2mqtt/bulb/set", PendingPublish({"brightness": 2}, "midi", None))
+
+    limiter.close()
+
+    assert send.sent == [("zigbee2mqtt/bulb/set", {"brightness": 1}), ("zigbee2mqtt/bulb/set", {"brightness": 2})]
+    assert limiter.counters()["pending"] == 0
+
+
+def test_disabled_limiter_sends_inline() -> None:
+    send = Recorder()
+    limiter = TopicRateLimiter(send, max_rate_hz=0)
+    for brightness in (1, 2):
+        limiter.submit("zigbee2mqtt/bulb/set", PendingPublish({"brightness": brightness}, "midi", None))
+
+    assert [payload for _topic, payload in send.sent] == [{"brightness": 1}, {"brightness": 2}]
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from control_api.scenes import SceneStore, compile_scene, scene_binding
+
+
+def test_compile_scene_serializes_each_command() -> None:
+    scene = compile_scene(
+        {
+            "scene_id": "warm",
+            "commands": [
+                {"target": "all_bulbs", "payload": {"state": "ON", "brightness": 120}},
+                {"target": "0xabc", "payload": {"brightness": 254}},
+            ],
+        }
+    )
+
+    assert scene.name == "warm"
+    assert [publish.topic for publish in scene.publishes] == ["zigbee2mqtt/all_bulbs/set", "zigbee2mqtt/0xabc/set"]
+    assert scene.publishes[0].serialized == b'{"brightness":120,"state":"ON"}'
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        {"commands": []},
+        {"scene_id": "x", "commands": [{"target": "bulb"}]},
+        {"scene_id": "x", "commands": [{"payload": {"state": "ON"}}]},
+    ],
+)
+def test_compile_scene_rejects_incomplete_definitions(raw) -> None:
+    with pytest.raises(ValueError):
+        compile_scene(raw)
+
+
+def test_scene_binding_single_note_and_range() -> None:
+    single = scene_binding(compile_scene({"scene_id": "a", "midi": {"channel": 12, "note": 3}}))
+    ranged = scene_binding(compile_scene({"scene_id": "b", "midi": {"channel": 13, "notes": [0, 17]}}))
+
+    assert (single.channel, single.note_min, single.note_max) == (12, 3, 3)
+    assert (ranged.note_min, ranged.note_max) == (0, 17)
+    assert scene_binding(compile_scene({"scene_id": "c"})) is None
+
+
+@pytest.mark.parametrize(
+    "midi",
+    [
+        {"channel": 16, "note": 1},
+        {"channel": 12},
+        {"channel": 12, "notes": [5, 2]},
+        {"channel": 12, "note": 60},
+        {"channel": 12, "notes": [10, 18]},
+    ],
+)
+def test_scene_binding_rejects_bindings_that_cannot_fire(midi) -> None:
+    with pytest.raises(ValueError):
+        scene_binding(compile_scene({"scene_id": "x", "midi": midi}))
+
+
+def test_store_keeps_previous_scenes_when_a_binding_is_out_of_range(tmp_path) -> None:
+    scenes_file = tmp_path / "scenes.json"
+    scenes_file.write_text(json.dumps([{"scene_id": "warm", "midi": {"channel": 12, "note": 1}}]))
+    store = SceneStore(scenes_file)
+    store.load()
+    assert store.bindings.scene_for(12, 1) == "warm"
+
+    scenes_file.write_text(json.dumps([{"scene_id": "cold", "midi": {"channel": 12, "note": 60}}]))
+    store.load()
+
+    assert store.get("cold") is None
+    assert store.bindings.scene_for(12, 1) == "warm"
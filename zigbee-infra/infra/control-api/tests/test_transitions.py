@@ -0,0 +1,152 @@
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from control_api import main, transitions
+from control_api.midi_mapping import build_velocity_transition_table
+from control_api.transitions import TRANSITION_SOURCE, TransitionEngine
+
+TOPIC = "zigbee2mqtt/bulb/set"
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.sent: List[Tuple[str, Dict[str, Any], str, Optional[str]]] = []
+
+    def __call__(self, topic: str, payload: Dict[str, Any], source: str = "unknown", trace_id: Optional[str] = None):
+        self.sent.append((topic, payload, source, trace_id))
+        receipt: "Future[bool]" = Future()
+        receipt.set_result(True)
+        return receipt
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(transitions, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+def test_steps_publish_only_when_the_value_changes(clock) -> None:
+    engine = TransitionEngine(Recorder(), tick_hz=10)
+    engine.begin(TOPIC, 0, 10, 1000, "trace")
+
+    steps = []
+    for tick in range(25):
+        clock.now = 100.0 + tick * 0.05
+        steps.extend(value for _topic, value, _trace in engine._advance())
+
+    # Ticks are half a brightness step apart, and the final tick repeats the
+    # last stepped value: each value is still sent once.
+    assert steps == [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert engine.counters()["completed"] == 1
+    assert engine.counters()["active"] == 0
+
+
+def test_new_fade_replaces_and_cancel_drops_the_running_one(clock) -> None:
+    engine = TransitionEngine(Recorder())
+    engine.begin(TOPIC, 0, 100, 1000)
+    engine.begin(TOPIC, 100, 0, 1000)
+    assert engine._advance() == [(TOPIC, 100, None)]
+
+    engine.cancel(TOPIC)
+
+    assert engine._advance() == []
+    counters = engine.counters()
+    assert (counters["started"], counters["cancelled"], counters["active"]) == (2, 2, 0)
+
+
+def test_zero_duration_publishes_the_target_at_once(clock) -> None:
+    publish = Recorder()
+    engine = TransitionEngine(publish)
+
+    engine.begin(TOPIC, 0, 80, 0, "trace")
+
+    assert publish.sent == [(TOPIC, {"brightness": 80}, TRANSITION_SOURCE, "trace")]
+    assert engine.counters()["active"] == 0
+
+
+def test_scheduler_thread_stays_under_the_tick_cap() -> None:
+    publish = Recorder()
+    engine = TransitionEngine(publish, tick_hz=20)
+    engine.start()
+    try:
+        engine.begin(TOPIC, 0, 254, 300)
+        deadline = time.monotonic() + 2
+        while engine.counters()["active"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        engine.close()
+
+    values = [payload["brightness"] for _topic, payload, _source, _trace in publish.sent]
+    assert values[-1] == 254
+    assert values == sorted(set(values))
+    # 300 ms at 20 Hz is six ticks, plus the final value and some scheduling slack.
+    assert len(values) <= 9
+
+
+def test_direct_command_cancels_a_running_fade(monkeypatch) -> None:
+    engine = TransitionEngine(Recorder())
+    monkeypatch.setattr(main, "transition_engine", engine)
+    client = main.MqttClient()
+    monkeypatch.setattr(client.client, "publish", lambda *_args, **_kwargs: SimpleNamespace(rc=0, mid=1))
+    engine.begin(TOPIC, 0, 200, 5000)
+
+    client.publish_json(TOPIC, {"brightness": 10}, source="device_state")
+
+    assert engine.counters()["active"] == 0
+    assert engine.counters()["cancelled"] == 1
+
+
+def test_native_transition_endpoint_sends_one_command(monkeypatch) -> None:
+    publish = Recorder()
+    monkeypatch.setattr(main.mqtt_client, "publish_json", publish)
+
+    response = TestClient(main.app).post(
+        "/devices/bulb/transition",
+        json={"brightness": 200, "duration_ms": 1500, "mode": "native"},
+        headers={"X-Trace-Id": "t-1"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["mode"] == "native"
+    assert publish.sent == [(TOPIC, {"brightness": 200, "transition": 1.5}, "transition_native", "t-1")]
+
+
+def test_interpolated_group_transition_starts_from_given_brightness(monkeypatch) -> None:
+    begun = []
+    monkeypatch.setattr(main, "transition_engine", SimpleNamespace(begin=lambda *args: begun.append(args)))
+
+    response = TestClient(main.app).post(
+        "/groups/all_bulbs/transition",
+        json={"brightness": 10, "duration_ms": 800, "mode": "interpolate", "from_brightness": 250},
+    )
+
+    assert response.status_code == 200
+    assert begun == [("zigbee2mqtt/all_bulbs/set", 250, 10, 800, None)]
+
+
+@pytest.mark.parametrize("velocity, transition_ms", [(127, 0), (0, 1000), (64, 496)])
+def test_velocity_picks_the_fade_duration(monkeypatch, velocity, transition_ms) -> None:
+    monkeypatch.setattr(main, "MIDI_TRANSITION_TABLE", build_velocity_transition_table(1000))
+    monkeypatch.setattr(main, "TRANSITION_MODE", "native")
+
+    result = main.resolve_midi_event(
+        main.MidiEventRequest(event_type="note_on", channel=0, key=17, value=velocity)
+    )
+
+    assert result["transition_ms"] == transition_ms
+    expected = {"brightness": 254, "transition": transition_ms / 1000} if transition_ms else {"brightness": 254}
+    assert result["mqtt_payload"] == expected
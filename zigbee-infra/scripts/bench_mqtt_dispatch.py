@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Replay a burst of zigbee2mqtt traffic through the control API's MQTT handler.
+
+Compares the original handler (decode + split + json.loads of every payload,
+status map behind a lock) with the current `MqttClient._on_message` (topic
+dispatch, JSON parsed only for relevant topics, copy-on-write status map).
+The current handler also merges every report into the device shadow and
+rebuilds the registry index on `bridge/devices`, work the original never did,
+so it is timed twice: `dispatch` with the shadow, registry and group updates
+stubbed out (topic dispatch and parsing only, comparable with `legacy`), and
+`current` with them. `state` is the difference per message.
+A reader thread calls `get_status` in a loop during the replay to show how
+much request handlers are slowed down by the network thread.
+
+The burst is synthetic by default (device state reports, availability
+messages, and periodic large `bridge/devices` payloads). Pass `--capture` with
+a JSON-lines file of {"topic": ..., "payload": ...} records to replay real
+traffic, for example captured with:
+
+  mosquitto_sub -t 'zigbee2mqtt/#' -F '{"topic":"%t","payload":%j}' > capture.jsonl
+
+Examples:
+  python scripts/bench_mqtt_dispatch.py --messages 200000
+  python scripts/bench_mqtt_dispatch.py --capture capture.jsonl --repeat 20
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List
+
+CONTROL_API_DIR = Path(__file__).resolve().parents[1] / "infra" / "control-api"
+if str(CONTROL_API_DIR) not in sys.path:
+    sys.path.insert(0, str(CONTROL_API_DIR))
+
+from control_api import main as control_api_main  # noqa: E402
+from control_api.main import MqttClient  # noqa: E402
+
+
+class LegacyHandler:
+    """The handler as it was before topic dispatch, kept for comparison."""
+
+    def __init__(self) -> None:
+        self.status_map: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def on_message(self, _client, _userdata, msg) -> None:
+        topic = msg.topic
+        payload = msg.payload.decode("utf-8", errors="ignore")
+        parts = topic.split("/")
+        if len(parts) < 2 or parts[0] != "zigbee2mqtt":
+            return
+        device_id = parts[1]
+        suffix = parts[2] if len(parts) > 2 else None
+
+        if suffix == "availability":
+            status = "available" if payload.lower() == "online" else "unavailable"
+            with self._lock:
+                self.status_map[device_id] = status
+            return
+
+        try:
+            data = json.loads(payload)
+            if isinstance(data, dict) and "availability" in data:
+                status = "available" if str(data["availability"]).lower() == "online" else "unavailable"
+                with self._lock:
+                    self.status_map[device_id] = status
+        except json.JSONDecodeError:
+            return
+
+    def get_status(self, device_id: str) -> str:
+        with self._lock:
+            return self.status_map.get(device_id, "unavailable")
+
+
+def synthetic_burst(count: int, devices: int, seed: int) -> List[SimpleNamespace]:
+    rng = random.Random(seed)
+    names = [f"bulb_{index}" for index in range(devices)]
+    bridge_devices = json.dumps(
+        [
+            {
+                "ieee_address": f"0x{index:016x}",
+                "friendly_name": name,
+                "definition": {"model": "LED1623G12", "vendor": "IKEA", "exposes": [{"type": "light"}] * 4},
+            }
+            for index, name in enumerate(names)
+        ]
+    ).encode()
+    messages = []
+    for index in range(count):
+        name = rng.choice(names)
+        roll = rng.random()
+        if index % 1000 == 0:
+            messages.append(SimpleNamespace(topic="zigbee2mqtt/bridge/devices", payload=bridge_devices))
+        elif roll < 0.7:
+            report = {
+                "brightness": rng.randint(1, 254),
+                "state": rng.choice(["ON", "OFF"]),
+                "linkquality": rng.randint(0, 255),
+                "color_temp": 370,
+                "update": {"state": "idle"},
+            }
+            messages.append(SimpleNamespace(topic=f"zigbee2mqtt/{name}", payload=json.dumps(report).encode()))
+        elif roll < 0.9:
+            messages.append(
+                SimpleNamespace(topic=f"zigbee2mqtt/{name}/availability", payload=rng.choice([b"online", b"offline"]))
+            )
+        else:
+            messages.append(SimpleNamespace(topic="zigbee2mqtt/bridge", payload=b'{"state":"online"}'))
+    return messages
+
+
+def load_capture(path: Path) -> List[SimpleNamespace]:
+    messages = []
+    for line in path.read_text().splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        payload = record["payload"]
+        if not isinstance(payload, str):
+            payload = json.dumps(payload)
+        messages.append(SimpleNamespace(topic=record["topic"], payload=payload.encode()))
+    return messages
+
+
+def replay(
+    name: str,
+    messages: List[SimpleNamespace],
+    on_message: Callable[[object, object, object], None],
+    get_status: Callable[[str], str],
+) -> float:
+    stop = threading.Event()
+    reads = [0]
+
+    def reader() -> None:
+        while not stop.is_set():
+            get_status("bulb_1")
+            reads[0] += 1
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    started = time.perf_counter()
+    for msg in messages:
+        on_message(None, None, msg)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    thread.join()
+    print(
+        f"{name:<8} messages={len(messages)} elapsed={elapsed:.3f}s "
+        f"rate={len(messages) / elapsed:,.0f} msg/s per_message={elapsed / len(messages) * 1e6:.2f}us "
+        f"concurrent_reads={reads[0] / elapsed:,.0f}/s"
+    )
+    return elapsed / len(messages)
+
+
+@contextmanager
+def without_state_updates(client: MqttClient) -> Iterator[None]:
+    """Stub the shadow merge, id canonicalization and bridge handlers, keeping dispatch and parsing."""
+    shadow, canonical_id = control_api_main.device_shadow, control_api_main.canonical_device_id
+    handlers = client._bridge_handlers
+    control_api_main.device_shadow = SimpleNamespace(apply_reported=lambda _device_id, _data: None)
+    control_api_main.canonical_device_id = lambda device_id: device_id
+    client._bridge_handlers = {topic: (lambda _data: None) for topic in handlers}
+    try:
+        yield
+    finally:
+        control_api_main.device_shadow, control_api_main.canonical_device_id = shadow, canonical_id
+        client._bridge_handlers = handlers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000, help="Synthetic burst size")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--capture", type=Path, default=None, help="JSON-lines capture to replay instead")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the capture this many times")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    if args.capture:
+        messages = load_capture(args.capture) * args.repeat
+    else:
+        messages = synthetic_burst(args.messages, args.devices, args.seed)
+
+    legacy = LegacyHandler()
+    replay("legacy", messages, legacy.on_message, legacy.get_status)
+    dispatch = MqttClient()
+    with without_state_updates(dispatch):
+        dispatch_per_message = replay("dispatch", messages, dispatch._on_message, dispatch.get_status)
+    current = MqttClient()
+    current_per_message = replay("current", messages, current._on_message, current.get_status)
+    print(f"{'state':<8} per_message={(current_per_message - dispatch_per_message) * 1e6:.2f}us (shadow + registry)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Minimal in-process MQTT 3.1.1 broker for benchmarks without Mosquitto.
+
+Supports CONNECT, PUBLISH (QoS 0/1, forwarded to subscribers as QoS 0),
+SUBSCRIBE/UNSUBSCRIBE with `+`/`#` filters, PINGREQ and DISCONNECT. No
+retained messages, sessions or auth; it only needs to keep paho clients happy.
+"""
+import socket
+import socketserver
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    filter_parts = topic_filter.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(filter_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts):
+            return False
+        if part != "+" and part != topic_parts[index]:
+            return False
+    return len(filter_parts) == len(topic_parts)
+
+
+def encode_length(length: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        digit, length = length % 128, length // 128
+        encoded.append(digit | (0x80 if length else 0))
+        if not length:
+            return bytes(encoded)
+
+
+def packet(packet_type: int, body: bytes, flags: int = 0) -> bytes:
+    return bytes([(packet_type << 4) | flags]) + encode_length(len(body)) + body
+
+
+def read_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def read_packet(sock: socket.socket) -> Optional[Tuple[int, int, bytes]]:
+    header = read_exact(sock, 1)
+    if header is None:
+        return None
+    length, multiplier = 0, 1
+    while True:
+        digit = read_exact(sock, 1)
+        if digit is None:
+            return None
+        length += (digit[0] & 0x7F) * multiplier
+        if not digit[0] & 0x80:
+            break
+        multiplier *= 128
+    body = read_exact(sock, length) if length else b""
+    if body is None:
+        return None
+    return header[0] >> 4, header[0] & 0x0F, body
+
+
+class BrokerHandler(socketserver.BaseRequestHandler):
+    server: "FakeMqttBroker"
+
+    def setup(self) -> None:
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send_lock = threading.Lock()
+        self.filters: List[str] = []
+
+    def send(self, data: bytes) -> None:
+        with self.send_lock:
+            self.request.sendall(data)
+
+    def handle(self) -> None:
+        try:
+            while True:
+                received = read_packet(self.request)
+                if received is None:
+                    return
+                packet_type, flags, body = received
+                if packet_type == CONNECT:
+                    self.server.add_client(self)
+                    self.send(packet(CONNACK, b"\x00\x00"))
+                elif packet_type == PUBLISH:
+                    self.handle_publish(flags, body)
+                elif packet_type == SUBSCRIBE:
+                    self.handle_subscribe(body)
+                elif packet_type == UNSUBSCRIBE:
+                    self.send(packet(UNSUBACK, body[:2]))
+                elif packet_type == PINGREQ:
+                    self.send(packet(PINGRESP, b""))
+                elif packet_type == DISCONNECT:
+                    return
+        except OSError:
+            return
+        finally:
+            self.server.remove_client(self)
+
+    def handle_publish(self, flags: int, body: bytes) -> None:
+        qos = (flags >> 1) & 0x03
+        (topic_length,) = struct.unpack("!H", body[:2])
+        topic = body[2 : 2 + topic_length].decode("utf-8")
+        offset = 2 + topic_length
+        if qos:
+            packet_id = body[offset : offset + 2]
+            offset += 2
+            self.send(packet(PUBACK, packet_id))
+        self.server.route(topic, body[offset:])
+
+    def handle_subscribe(self, body: bytes) -> None:
+        packet_id, offset, granted = body[:2], 2, bytearray()
+        while offset < len(body):
+            (filter_length,) = struct.unpack("!H", body[offset : offset + 2])
+            self.filters.append(body[offset + 2 : offset + 2 + filter_length].decode("utf-8"))
+            offset += 2 + filter_length + 1
+            granted.append(0)
+        self.send(packet(SUBACK, packet_id + bytes(granted), flags=0))
+
+
+class FakeMqttBroker(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), BrokerHandler)
+        self.clients: List[BrokerHandler] = []
+        self.published: Dict[str, int] = {}
+        self._clients_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def add_client(self, client: BrokerHandler) -> None:
+        with self._clients_lock:
+            self.clients.append(client)
+
+    def remove_client(self, client: BrokerHandler) -> None:
+        with self._clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def route(self, topic: str, payload: bytes) -> None:
+        with self._clients_lock:
+            self.published[topic] = self.published.get(topic, 0) + 1
+            targets = [c for c in self.clients if any(topic_matches(f, topic) for f in c.filters)]
+        encoded_topic = topic.encode("utf-8")
+        message = packet(PUBLISH, struct.pack("!H", len(encoded_topic)) + encoded_topic + payload)
+        for client in targets:
+            try:
+                client.send(message)
+            except OSError:
+                continue
+
+    def start(self) -> "FakeMqttBroker":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-mqtt-broker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    broker = FakeMqttBroker(port=1883)
+    print(f"fake MQTT broker listening on 127.0.0.1:{broker.port}")
+    broker.serve_forever()
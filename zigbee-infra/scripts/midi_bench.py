@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""MIDI load generator and latency benchmark for the control API.
+
+Grown out of brightness_jitter.py: instead of a fixed 0.2 s toggle loop it
+drives configurable traffic patterns at a target event rate against one or
+more targets and reports throughput and latency percentiles.
+
+Patterns:
+  jitter  all channels toggle between a low and a high note (brightness_jitter.py)
+  chord   all channels receive the same note at once, walking up the scale
+  sweep   one channel at a time ramps its note 0..17..0 like a knob sweep
+  burst   `--burst-size` random events back to back, then idle to hold the rate
+
+Targets:
+  http    POST /midi/events on the control API (keep-alive client)
+  ws      /midi/stream WebSocket with per-event acks
+  mqtt    publish zigbee2mqtt/<id>/set straight to the broker (QoS 1)
+
+With `--local` the harness starts an in-process fake MQTT broker and an
+in-process control API wired to it, so it runs on a laptop with no hardware
+or Docker. Latency is measured from each event's scheduled send time, so a
+slow target cannot hide queueing delay. `--max-p99-ms` / `--min-rate` turn the
+run into a CI regression guard (exit status 1 when violated).
+
+Examples:
+  python scripts/midi_bench.py --local --targets http ws mqtt --rate 500 --duration 5
+  python scripts/midi_bench.py --targets http --api-url http://localhost:8080 --pattern chord
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import paho.mqtt.client as mqtt
+
+CONTROL_API_DIR = Path(__file__).resolve().parents[1] / "infra" / "control-api"
+if str(CONTROL_API_DIR) not in sys.path:
+    sys.path.insert(0, str(CONTROL_API_DIR))
+
+from control_api.midi_mapping import (  # noqa: E402
+    MIDI_ALL_CHANNELS,
+    MIDI_BULB_CHANNELS,
+    MIDI_NOTE_MAX,
+    MIDI_NOTE_MIN,
+    NOTE_BRIGHTNESS_TABLE,
+    build_midi_routing,
+)
+from fake_mqtt_broker import FakeMqttBroker  # noqa: E402
+
+PATTERNS = ("jitter", "chord", "sweep", "burst")
+TARGETS = ("http", "ws", "mqtt")
+
+Event = Tuple[int, int]
+
+
+def pattern_groups(pattern: str, channels: List[int], burst_size: int, seed: int) -> Iterator[List[Event]]:
+    """Yield groups of (channel, key) events that are sent back to back."""
+    rng = random.Random(seed)
+    if pattern == "jitter":
+        low = True
+        while True:
+            key = MIDI_NOTE_MIN if low else MIDI_NOTE_MAX
+            yield [(channel, key) for channel in channels]
+            low = not low
+    elif pattern == "chord":
+        key = MIDI_NOTE_MIN
+        while True:
+            yield [(channel, key) for channel in channels]
+            key = MIDI_NOTE_MIN if key >= MIDI_NOTE_MAX else key + 1
+    elif pattern == "sweep":
+        ramp = list(range(MIDI_NOTE_MIN, MIDI_NOTE_MAX + 1)) + list(range(MIDI_NOTE_MAX - 1, MIDI_NOTE_MIN, -1))
+        while True:
+            for channel in channels:
+                for key in ramp:
+                    yield [(channel, key)]
+    else:
+        while True:
+            yield [(rng.choice(channels), rng.randint(MIDI_NOTE_MIN, MIDI_NOTE_MAX)) for _ in range(burst_size)]
+
+
+def mapped_bulb_channels() -> List[int]:
+    routing = build_midi_routing(os.getenv("MIDI_BULB_IDS"))
+    return [channel for channel in MIDI_BULB_CHANNELS if routing.routes[channel].mqtt_topic]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(len(sorted_values) * pct / 100) - 1, 0)
+    return sorted_values[rank]
+
+
+class HttpTarget:
+    name = "http"
+
+    def __init__(self, api_url: str, timeout: float) -> None:
+        import httpx
+
+        self.url = f"{api_url.rstrip('/')}/midi/events"
+        self.client = httpx.Client(timeout=timeout)
+
+    def send(self, channel: int, key: int) -> None:
+        response = self.client.post(
+            self.url,
+            json={
+                "event_type": "note_on",
+                "channel": channel,
+                "key": key,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"http {response.status_code}: {response.text}")
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class WsTarget:
+    name = "ws"
+
+    def __init__(self, api_url: str, timeout: float) -> None:
+        from websockets.sync.client import connect
+
+        stream_url = api_url.rstrip("/").replace("http", "ws", 1) + "/midi/stream?ack=true"
+        self.timeout = timeout
+        self.connection = connect(stream_url, open_timeout=timeout)
+
+    def send(self, channel: int, key: int) -> None:
+        self.connection.send(bytes((0, channel, key, 100)))
+        reply = json.loads(self.connection.recv(timeout=self.timeout))
+        if reply.get("status") != "ok":
+            raise RuntimeError(reply.get("message", "rejected"))
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class MqttTarget:
+    name = "mqtt"
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self.timeout = timeout
+        self.client = mqtt.Client()
+        self.client.connect(host, port, keepalive=60)
+        self.client.loop_start()
+        self.routing = build_midi_routing(os.getenv("MIDI_BULB_IDS"))
+
+    def send(self, channel: int, key: int) -> None:
+        route = self.routing.route(channel)
+        if route is None or route.mqtt_topic is None:
+            raise RuntimeError(f"channel {channel} is not mapped")
+        topic = route.mqtt_topic
+        payload = json.dumps({"brightness": NOTE_BRIGHTNESS_TABLE[key]})
+        info = self.client.publish(topic, payload, qos=1)
+        info.wait_for_publish(self.timeout)
+        if not info.is_published():
+            raise RuntimeError("publish not acknowledged")
+
+    def close(self) -> None:
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+class DeliveryCounter:
+    """Counts `*/set` commands that actually reach the broker's subscribers."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+        self.client = mqtt.Client()
+        self.client.on_connect = lambda client, _u, _f, _rc: client.subscribe("zigbee2mqtt/+/set")
+        self.client.on_message = self._on_message
+        self.client.connect(host, port, keepalive=60)
+        self.client.loop_start()
+
+    def _on_message(self, _client, _userdata, _msg) -> None:
+        with self._lock:
+            self.count += 1
+
+    def take(self) -> int:
+        with self._lock:
+            count, self.count = self.count, 0
+        return count
+
+    def close(self) -> None:
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def run_target(
+    target,
+    groups: Iterator[List[Event]],
+    rate: float,
+    duration: float,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    scheduled = started
+    deadline = started + duration
+    while scheduled < deadline:
+        group = next(groups)
+        now = time.perf_counter()
+        if scheduled > now:
+            time.sleep(scheduled - now)
+        for channel, key in group:
+            try:
+                target.send(channel, key)
+            except Exception:  # noqa: BLE001 - count every failed send
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+        scheduled += interval * len(group)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    sent = len(latencies)
+    return {
+        "sent": sent,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "rate": sent / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+    }
+
+
+def start_local_stack(api_port: int) -> Tuple[FakeMqttBroker, Callable[[], None]]:
+    """Start a fake broker and the control API in-process, wired to each other."""
+    broker = FakeMqttBroker().start()
+    os.environ["MQTT_HOST"] = "127.0.0.1"
+    os.environ["MQTT_PORT"] = str(broker.port)
+
+    import uvicorn
+
+    from control_api.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=api_port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="control-api", daemon=True)
+    thread.start()
+    for _ in range(100):
+        if server.started:
+            break
+        time.sleep(0.05)
+
+    def stop() -> None:
+        server.should_exit = True
+        thread.join(timeout=5)
+        broker.stop()
+
+    return broker, stop
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=["http"])
+    parser.add_argument("--pattern", choices=PATTERNS, default="chord")
+    parser.add_argument("--rate", type=float, default=200.0, help="Target events per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per target")
+    parser.add_argument(
+        "--channels",
+        type=int,
+        nargs="+",
+        default=None,
+        help="MIDI channels to drive (default: every channel mapped to a bulb; 10/11 fan out to groups)",
+    )
+    parser.add_argument("--burst-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--local", action="store_true", help="Run against an in-process fake broker and API")
+    parser.add_argument("--api-url", default=os.getenv("CONTROL_API_URL", "http://127.0.0.1:8080"))
+    parser.add_argument("--mqtt-host", default=os.getenv("MQTT_HOST", "localhost"))
+    parser.add_argument("--mqtt-port", type=int, default=int(os.getenv("MQTT_PORT", "1883")))
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Fail if any target's p99 exceeds this")
+    parser.add_argument("--min-rate", type=float, default=None, help="Fail if any target's throughput is lower")
+    args = parser.parse_args()
+
+    channels = args.channels or mapped_bulb_channels()
+    unknown = [channel for channel in channels if channel not in MIDI_ALL_CHANNELS]
+    if unknown:
+        parser.error(f"channels must be within {MIDI_ALL_CHANNELS}, got {unknown}")
+    stop_local: Optional[Callable[[], None]] = None
+    counter: Optional[DeliveryCounter] = None
+    if args.local:
+        api_port = 18080
+        broker, stop_local = start_local_stack(api_port)
+        args.api_url = f"http://127.0.0.1:{api_port}"
+        args.mqtt_host, args.mqtt_port = "127.0.0.1", broker.port
+        counter = DeliveryCounter(args.mqtt_host, args.mqtt_port)
+
+    factories = {
+        "http": lambda: HttpTarget(args.api_url, args.timeout),
+        "ws": lambda: WsTarget(args.api_url, args.timeout),
+        "mqtt": lambda: MqttTarget(args.mqtt_host, args.mqtt_port, args.timeout),
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        for name in args.targets:
+            target = factories[name]()
+            try:
+                groups = pattern_groups(args.pattern, channels, args.burst_size, args.seed)
+                results[name] = run_target(target, groups, args.rate, args.duration)
+            finally:
+                target.close()
+            if counter is not None:
+                time.sleep(0.2)
+                results[name]["delivered"] = counter.take()
+    finally:
+        if counter is not None:
+            counter.close()
+        if stop_local is not None:
+            stop_local()
+
+    failed = False
+    for name, stats in results.items():
+        if args.max_p99_ms is not None and stats["p99_ms"] > args.max_p99_ms:
+            failed = True
+        if args.min_rate is not None and stats["rate"] < args.min_rate:
+            failed = True
+
+    if args.json:
+        print(json.dumps({"pattern": args.pattern, "rate": args.rate, "results": results, "failed": failed}))
+    else:
+        for name, stats in results.items():
+            delivered = f" delivered={stats['delivered']}" if "delivered" in stats else ""
+            print(
+                f"target={name:<4} pattern={args.pattern} sent={stats['sent']} errors={stats['errors']}"
+                f"{delivered} rate={stats['rate']:.1f}/s p50={stats['p50_ms']:.2f}ms "
+                f"p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms max={stats['max_ms']:.2f}ms"
+            )
+        if failed:
+            print("regression thresholds exceeded", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())